@@ -1,114 +1,79 @@
 # app.py — runtime enrichment version (works even if DB didn't get updated)
 
-from fastapi import FastAPI, HTTPException
+import time
+_T_IMPORT = time.perf_counter()  # start of import, for the import → first byte report
+
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Dict, Any, List, Tuple
-import sqlite3, os, json, csv, re
+from fastapi.responses import StreamingResponse
+from typing import Dict, Any, Awaitable, Callable, Iterable, Iterator, List, Optional, Tuple
+from pydantic import BaseModel
+import sqlite3, os, re, threading, unicodedata
+
+from cache import ResponseCache
+from singleflight import SingleFlight
+from db import ReadPool, has_packed_ids as _has_packed_ids
+from colstore import ColumnStore
+from lexicon import Lexicon, DATA_DIR, STRONGS_LEXICON_CSV, GREEK_LEXICON_CSV, gloss_terms
+from books import BOOK_CODES, NAME_TO_CODE, BOOK_ORDER, pack_ref, unpack_ref
+from strongs import parse_strong_id
+from folding import fold
+import morph as M
+from payloads import (TOKEN_COLS, RESOLVED_COLS, shape_token, verse_payload, chapter_payload,
+                      json_bytes as _json_bytes)
 
 # ---------- Paths ----------
 BASE_DIR = os.path.dirname(__file__)
 DB_PATH = os.environ.get("INTERLINEAR_DB", os.path.join(BASE_DIR, "interlinear.sqlite3"))
-DATA_DIR = os.path.join(BASE_DIR, "data")
-BOOK_CODES_PATH = os.path.join(DATA_DIR, "book_codes.json")
-STRONGS_LEXICON_CSV = os.path.join(DATA_DIR, "strongs_lexicon.csv")
-GREEK_LEXICON_CSV   = os.path.join(DATA_DIR, "greek_lexicon.csv")
-
-# ---------- Book codes ----------
-FALLBACK_BOOK_CODES = {
-    "GEN":"Genesis","EXO":"Exodus","LEV":"Leviticus","NUM":"Numbers","DEU":"Deuteronomy",
-    "JOS":"Joshua","JDG":"Judges","RUT":"Ruth","1SA":"1 Samuel","2SA":"2 Samuel",
-    "1KI":"1 Kings","2KI":"2 Kings","1CH":"1 Chronicles","2CH":"2 Chronicles","EZR":"Ezra",
-    "NEH":"Nehemiah","EST":"Esther","JOB":"Job","PSA":"Psalms","PRO":"Proverbs","ECC":"Ecclesiastes",
-    "SNG":"Song of Solomon","ISA":"Isaiah","JER":"Jeremiah","LAM":"Lamentations","EZK":"Ezekiel",
-    "DAN":"Daniel","HOS":"Hosea","JOL":"Joel","AMO":"Amos","OBA":"Obadiah","JON":"Jonah","MIC":"Micah",
-    "NAM":"Nahum","HAB":"Habakkuk","ZEP":"Zephaniah","HAG":"Haggai","ZEC":"Zechariah","MAL":"Malachi",
-    "MAT":"Matthew","MRK":"Mark","LUK":"Luke","JHN":"John","ACT":"Acts","ROM":"Romans",
-    "1CO":"1 Corinthians","2CO":"2 Corinthians","GAL":"Galatians","EPH":"Ephesians","PHP":"Philippians",
-    "COL":"Colossians","1TH":"1 Thessalonians","2TH":"2 Thessalonians","1TI":"1 Timothy","2TI":"2 Timothy",
-    "TIT":"Titus","PHM":"Philemon","HEB":"Hebrews","JAS":"James","1PE":"1 Peter","2PE":"2 Peter",
-    "1JN":"1 John","2JN":"2 John","3JN":"3 John","JUD":"Jude","REV":"Revelation"
-}
-
-def load_book_codes() -> Dict[str, str]:
-    try:
-        with open(BOOK_CODES_PATH, "r", encoding="utf-8") as f:
-            raw = json.load(f)
-        out = {}
-        for k, v in raw.items():
-            if isinstance(v, dict) and "name" in v:
-                out[k.upper()] = v["name"]
-            else:
-                out[k.upper()] = str(v)
-        return out
-    except Exception:
-        return FALLBACK_BOOK_CODES.copy()
-
-BOOK_CODES = load_book_codes()
-NAME_TO_CODE = {name.lower(): code for code, name in BOOK_CODES.items()}
 
 # ---------- Lexicon load ----------
-def _read_csv(path: str) -> List[Dict[str, str]]:
-    rows: List[Dict[str, str]] = []
-    with open(path, "r", encoding="utf-8-sig", newline="") as f:
-        r = csv.DictReader(f)
-        for row in r:
-            rows.append({k: (v or "").strip() for k, v in row.items()})
-    return rows
-
-def _norm_strong_keys(raw: str) -> List[str]:
-    if not raw:
-        return []
-    parts = re.split(r"[,\s/;]+", raw.strip())
-    keys = []
-    for p in parts:
-        if not p: 
-            continue
-        if re.match(r"^[HhGg]\d+$", p):
-            prefix = p[0].upper(); num = re.sub(r"\D", "", p[1:])
-            if num:
-                keys += [prefix+num, num]
-        else:
-            num = re.sub(r"\D", "", p)
-            if num:
-                keys += ["H"+num, "G"+num, num]
-    # dedupe preserving order
-    seen = set(); out=[]
-    for k in keys:
-        if k not in seen:
-            seen.add(k); out.append(k)
-    return out
-
-class Lexicon:
-    def __init__(self):
-        self.by_strong: Dict[str, Dict[str, str]] = {}
-        self.by_lemma: Dict[str, Dict[str, str]] = {}
-
-    def load(self):
-        if os.path.isfile(STRONGS_LEXICON_CSV):
-            for r in _read_csv(STRONGS_LEXICON_CSV):
-                strong = (r.get("strong") or "").strip()
-                if strong:
-                    entry = {
-                        "lemma": (r.get("lemma") or "").strip(),
-                        "translit": (r.get("translit") or "").strip(),
-                        "gloss": (r.get("gloss") or "").strip(),
-                    }
-                    for k in _norm_strong_keys(strong):
-                        self.by_strong[k] = entry
-
-        if os.path.isfile(GREEK_LEXICON_CSV):
-            for r in _read_csv(GREEK_LEXICON_CSV):
-                lemma = (r.get("lemma") or "").strip()
-                if lemma:
-                    self.by_lemma[lemma] = {
-                        "lemma": lemma,
-                        "translit": (r.get("translit") or "").strip(),
-                        "gloss": (r.get("gloss") or "").strip(),
-                    }
-
 LEX = Lexicon()
 LEX.load()
-print(f"[lexicon] strongs loaded: {len(LEX.by_strong)} | greek lemmas loaded: {len(LEX.by_lemma)}")
+print(f"[lexicon] strongs loaded: {len(LEX.by_strong)} | greek lemmas loaded: {len(LEX.by_lemma)} "
+      f"({LEX.source}, {LEX.load_ms:.0f} ms)")
+
+# ---------- SQLite read pool ----------
+POOL = ReadPool(
+    DB_PATH,
+    cache_size_kib=int(os.environ.get("INTERLINEAR_SQLITE_CACHE_KIB", "16384")),
+    mmap_size=int(os.environ.get("INTERLINEAR_SQLITE_MMAP_BYTES", str(256 * 1024 * 1024))),
+)
+
+# Token backend for verse/chapter/passage/batch reads: "sqlite" (default) queries tokens per
+# request; "columnar" serves them from colstore.ColumnStore, loaded on first use.
+BACKEND = os.environ.get("INTERLINEAR_BACKEND", "sqlite").strip().lower()
+if BACKEND not in ("sqlite", "columnar"):
+    raise RuntimeError(f"INTERLINEAR_BACKEND must be 'sqlite' or 'columnar', not {BACKEND!r}")
+
+# Optional tables/columns written by the build scripts; inspected lazily, forgotten on DB change.
+_DB_FEATURES = None
+_STRUCTURE = None  # in-memory copy of the structure table
+_STORE: Optional[ColumnStore] = None
+_STORE_LOCK = threading.Lock()
+
+def _on_sources_changed():
+    global LEX, _DB_FEATURES, _STRUCTURE, _STORE
+    POOL.reset()
+    _DB_FEATURES = None
+    _STRUCTURE = None
+    _STORE = None
+    lex = Lexicon()
+    lex.load()
+    LEX = lex
+    print(f"[lexicon] sources changed; reloaded strongs: {len(LEX.by_strong)} | greek lemmas: {len(LEX.by_lemma)}")
+
+# ---------- Response cache ----------
+# Finished chapter/verse payloads keyed by (book_code, chapter[, verse]).
+# 0 disables a limit; both 0 disables the cache.
+CACHE = ResponseCache(
+    max_entries=int(os.environ.get("INTERLINEAR_CACHE_ENTRIES", "512")),
+    max_bytes=int(os.environ.get("INTERLINEAR_CACHE_BYTES", str(64 * 1024 * 1024))),
+    watch=[DB_PATH, DB_PATH + "-wal", STRONGS_LEXICON_CSV, GREEK_LEXICON_CSV],
+    on_invalidate=_on_sources_changed,
+)
+
+# Concurrent misses for the same cache key wait on one computation.
+FLIGHT = SingleFlight()
 
 # ---------- App ----------
 app = FastAPI(title="Interlinear Bible API", version="1.2.0")
@@ -118,10 +83,35 @@ app.add_middleware(
     allow_methods=["*"], allow_headers=["*"],
 )
 
+STARTUP: Dict[str, Any] = {"lexicon_source": LEX.source, "lexicon_load_ms": round(LEX.load_ms, 1),
+                           "import_ms": None, "import_to_first_byte_ms": None}
+
+class FirstByteTimer:
+    """ASGI middleware that reports import → first response byte once, then gets out of the way."""
+
+    def __init__(self, app):
+        self.app = app
+        self.done = False
+
+    async def __call__(self, scope, receive, send):
+        if self.done or scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        async def _send(message):
+            if not self.done and message["type"] == "http.response.start":
+                self.done = True
+                ms = (time.perf_counter() - _T_IMPORT) * 1000
+                STARTUP["import_to_first_byte_ms"] = round(ms, 1)
+                print(f"[startup] import → first byte: {ms:.0f} ms")
+            await send(message)
+
+        await self.app(scope, receive, _send)
+
+app.add_middleware(FirstByteTimer)
+
 def get_conn():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+    # Per-thread, read-only, long-lived; see db.ReadPool.
+    return POOL.connection()
 
 def resolve_book(book_param: str) -> Tuple[str, str]:
     raw = (book_param or "").strip()
@@ -139,44 +129,62 @@ def resolve_book(book_param: str) -> Tuple[str, str]:
         return guess, BOOK_CODES[guess]
     raise HTTPException(404, f"Unknown book: {book_param}")
 
-def enrich_token(row: sqlite3.Row) -> Dict[str, Any]:
-    surface = (row["surface"] or "")
-    lemma   = (row["lemma"] or "")
-    transl  = (row["translit"] or "")
-    gloss   = (row["gloss"] or "")
-    morph   = (row["morph"] or "")
-    strong  = (row["strong"] or "")
-    idx     = int(row["token_index"])
-
-    # Already complete?
-    if lemma and transl and gloss:
-        return {
-            "surface": surface, "lemma": lemma, "translit": transl, "gloss": gloss,
-            "morph": morph, "strong": strong, "index": idx,
-            "resolved_lemma": lemma, "resolved_translit": transl, "resolved_gloss": gloss,
-            "translation": gloss
+def db_features() -> Dict[str, Any]:
+    global _DB_FEATURES
+    if _DB_FEATURES is None:
+        c = get_conn()
+        _DB_FEATURES = {
+            "tables": {r["name"] for r in c.execute("SELECT name FROM sqlite_master WHERE type IN ('table','view')")},
+            "token_cols": {r["name"] for r in c.execute("PRAGMA table_info(tokens)")},
+            "packed_ids": _has_packed_ids(c),
+            "triggers": {r["name"] for r in c.execute("SELECT name FROM sqlite_master WHERE type='trigger'")},
         }
+    return _DB_FEATURES
 
-    # Try Strong's first, then lemma
-    resolved = {}
-    for k in _norm_strong_keys(strong):
-        hit = LEX.by_strong.get(k)
-        if hit:
-            resolved = hit; break
-    if not resolved and lemma:
-        resolved = LEX.by_lemma.get(lemma, {})
+def has_resolved_columns() -> bool:
+    # Written by materialize_resolved.py
+    return "lex_version" in db_features()["token_cols"]
 
-    r_lemma  = lemma or resolved.get("lemma", "")
-    r_transl = transl or resolved.get("translit", "")
-    r_gloss  = gloss or resolved.get("gloss", "")
+def has_packed_ids() -> bool:
+    # tokens.id is books.pack_ref (db.py): written by seed.py or tools/migrate_packed_ids.py
+    return db_features()["packed_ids"]
 
-    return {
-        "surface": surface, "lemma": lemma, "translit": transl, "gloss": gloss,
-        "morph": morph, "strong": strong, "index": idx,
-        "resolved_lemma": r_lemma, "resolved_translit": r_transl, "resolved_gloss": r_gloss,
-        # your UI wants "the English word being translated"
-        "translation": r_gloss
-    }
+def ref_bounds(code: str, sc: int, sv: int, ec: int, ev: int) -> Tuple[int, int]:
+    """Inclusive tokens.id range for (sc, sv)..(ec, ev) on a packed-id database."""
+    def clamp(n: int) -> int:
+        return max(0, min(n, 999))
+    return pack_ref(code, clamp(sc), clamp(sv), 0), pack_ref(code, clamp(ec), clamp(ev), 999)
+
+def has_payloads() -> bool:
+    # Written by payloads.py; only trusted with the triggers that mark payloads of rewritten tokens stale.
+    f = db_features()
+    return "payloads" in f["tables"] and "tokens_payloads_upd" in f["triggers"]
+
+def token_select_cols() -> str:
+    return f"{TOKEN_COLS}, {RESOLVED_COLS}" if has_resolved_columns() else TOKEN_COLS
+
+def enrich_token(row: sqlite3.Row, materialized: bool = False) -> Dict[str, Any]:
+    return shape_token(row, LEX, materialized)
+
+def column_store() -> Optional[ColumnStore]:
+    """The in-memory token store when INTERLINEAR_BACKEND=columnar, else None."""
+    global _STORE
+    if BACKEND != "columnar":
+        return None
+    store = _STORE
+    if store is None:
+        with _STORE_LOCK:
+            if _STORE is None:
+                conn = POOL.open()
+                try:
+                    _STORE = ColumnStore.load(conn, LEX)
+                finally:
+                    conn.close()
+                mem = _STORE.memory_report()
+                print(f"[columnar] {mem['tokens']:,} tokens loaded in {mem['load_ms']:.0f} ms, "
+                      f"{mem['bytes']['total'] / 1e6:.1f} MB")
+            store = _STORE
+    return store
 
 @app.get("/health")
 def health():
@@ -188,52 +196,925 @@ def health():
         "lexicon_greek_csv": os.path.isfile(GREEK_LEXICON_CSV),
         "strongs_loaded": len(LEX.by_strong),
         "greek_loaded": len(LEX.by_lemma),
+        "lexicon_version": LEX.version,
+        "startup": STARTUP,
+        "resolved_columns": has_resolved_columns() if os.path.isfile(DB_PATH) else False,
+        "cache": CACHE.stats(),
+        "singleflight": FLIGHT.stats(),
+        "pool": POOL.stats(),
+        "backend": {"name": BACKEND, **(_STORE.memory_report() if _STORE is not None else {})},
     }
 
 @app.get("/debug/resolve")
 def debug_resolve(strong: str = "", lemma: str = ""):
     # try strong then lemma and show what you’d get
     hit = {}
-    for k in _norm_strong_keys(strong or ""):
-        if k in LEX.by_strong:
-            hit = {"via": f"strong:{k}", **LEX.by_strong[k]}
-            break
-    if not hit and lemma:
-        if lemma in LEX.by_lemma:
-            hit = {"via": "lemma", **LEX.by_lemma[lemma]}
+    entry, key = LEX.lookup(strong or "", lemma or "")
+    if entry:
+        hit = {"via": "lemma" if key.startswith("lemma:") else f"strong:{key}", **entry}
     return {"input": {"strong": strong, "lemma": lemma}, "hit": hit}
 
+# ---------- Navigation ----------
+def structure() -> Dict[str, Dict[int, Dict[int, int]]]:
+    """{book_code: {chapter: {verse: token_count}}} from the structure table (built by indexes.py)."""
+    global _STRUCTURE
+    if _STRUCTURE is None:
+        if "structure" not in db_features()["tables"]:
+            raise HTTPException(503, "Navigation index missing; run `python indexes.py` against the DB.")
+        out: Dict[str, Dict[int, Dict[int, int]]] = {}
+        for r in get_conn().execute("SELECT book_code, chapter, verse, token_count FROM structure"):
+            out.setdefault(r[0], {}).setdefault(r[1], {})[r[2]] = r[3]
+        _STRUCTURE = out
+    return _STRUCTURE
+
 @app.get("/books")
 def list_books():
+    if "structure" not in db_features()["tables"]:
+        # Older DBs: fall back to scanning tokens.
+        with get_conn() as c:
+            rows = c.execute("SELECT DISTINCT book_code FROM tokens ORDER BY book_code").fetchall()
+        return {"books": [{"code": r["book_code"], "name": BOOK_CODES.get(r["book_code"], r["book_code"])} for r in rows]}
+    st = structure()
+    return {"books": [{"code": code, "name": BOOK_CODES.get(code, code), "chapters": len(st[code])}
+                      for code in sorted(st)]}
+
+@app.get("/books/{book}")
+def get_book(book: str):
+    code, name = resolve_book(book)
+    chapters = structure().get(code)
+    if not chapters:
+        raise HTTPException(404, f"No data for book: {name}")
+    out = [{"chapter": ch, "verses": len(vs), "tokens": sum(vs.values())} for ch, vs in sorted(chapters.items())]
+    return {
+        "book": name, "book_code": code,
+        "chapter_count": len(out),
+        "verse_count": sum(c["verses"] for c in out),
+        "token_count": sum(c["tokens"] for c in out),
+        "chapters": out,
+    }
+
+@app.get("/books/{book}/{chapter:int}")
+def get_book_chapter(book: str, chapter: int):
+    code, name = resolve_book(book)
+    verses = structure().get(code, {}).get(chapter)
+    if not verses:
+        raise HTTPException(404, f"No data for {name} {chapter}")
+    return {
+        "reference": f"{name} {chapter}", "book": name, "book_code": code, "chapter": chapter,
+        "verse_count": len(verses),
+        "token_count": sum(verses.values()),
+        "verses": [{"verse": v, "tokens": n} for v, n in sorted(verses.items())],
+    }
+
+def _json_response(body: bytes, cache_status: str) -> Response:
+    return Response(content=body, media_type="application/json", headers={"X-Cache": cache_status})
+
+def build_verse_payload(code: str, name: str, chapter: int, verse: int) -> Dict[str, Any]:
+    store = column_store()
+    if store is not None:
+        return verse_payload(code, name, chapter, verse, store.verse(code, chapter, verse))
+    materialized = has_resolved_columns()
+    with get_conn() as c:
+        if has_packed_ids():
+            rows = c.execute(f"SELECT {token_select_cols()} FROM tokens WHERE id BETWEEN ? AND ? ORDER BY id",
+                             ref_bounds(code, chapter, verse, chapter, verse)).fetchall()
+        else:
+            rows = c.execute(f"""
+                SELECT {token_select_cols()}
+                FROM tokens
+                WHERE book_code=? AND chapter=? AND verse=?
+                ORDER BY token_index ASC
+            """, (code, chapter, verse)).fetchall()
+    tokens = [enrich_token(r, materialized) for r in rows]
+    return verse_payload(code, name, chapter, verse, tokens)
+
+def build_chapter_payload(code: str, name: str, chapter: int) -> Dict[str, Any]:
+    store = column_store()
+    if store is not None:
+        return chapter_payload(code, name, chapter, store.chapter(code, chapter))
+    materialized = has_resolved_columns()
     with get_conn() as c:
-        rows = c.execute("SELECT DISTINCT book_code FROM tokens ORDER BY book_code").fetchall()
-    return {"books": [{"code": r["book_code"], "name": BOOK_CODES.get(r["book_code"], r["book_code"])} for r in rows]}
+        if has_packed_ids():
+            rows = c.execute(f"SELECT verse, {token_select_cols()} FROM tokens WHERE id BETWEEN ? AND ? ORDER BY id",
+                             ref_bounds(code, chapter, 0, chapter, 999)).fetchall()
+        else:
+            rows = c.execute(f"""
+                SELECT verse, {token_select_cols()}
+                FROM tokens
+                WHERE book_code=? AND chapter=?
+                ORDER BY verse ASC, token_index ASC
+            """, (code, chapter)).fetchall()
+    verses: Dict[int, List[Dict[str, Any]]] = {}
+    for r in rows:
+        v = int(r["verse"])
+        verses.setdefault(v, []).append(enrich_token(r, materialized))
+    return chapter_payload(code, name, chapter, verses)
+
+def stored_payload(code: str, chapter: int, verse: int) -> Any:
+    """Pre-serialized body from the payloads table (verse 0 = chapter), if built for the loaded lexicon
+    and its tokens haven't been written since."""
+    if not has_payloads():
+        return None
+    row = get_conn().execute(
+        """SELECT body FROM payloads p WHERE book_code=? AND chapter=? AND verse=? AND lex_version=?
+           AND NOT EXISTS (SELECT 1 FROM payloads_stale s
+                           WHERE s.book_code = p.book_code AND s.chapter = p.chapter AND s.verse = p.verse)""",
+        (code, chapter, verse, LEX.version)).fetchone()
+    return row[0] if row else None
+
+def _fill(key: Tuple, compute: Callable[[], Tuple[bytes, str]]) -> Tuple[bytes, str]:
+    generation = CACHE.generation
+    body, status = compute()
+    CACHE.put(key, body, generation)
+    return body, status
+
+def serve_cached(key: Tuple, compute: Callable[[], Tuple[bytes, str]]) -> Response:
+    """Response cache, then single-flight: concurrent misses for one key share a single compute()."""
+    body = CACHE.get(key)
+    if body is not None:
+        return _json_response(body, "HIT")
+    (body, status), shared = FLIGHT.do(key, lambda: _fill(key, compute))
+    return _json_response(body, "COALESCED" if shared else status)
+
+async def serve_cached_async(key: Tuple, compute: Callable[[], Awaitable[Tuple[bytes, str]]]) -> Response:
+    """serve_cached for async handlers; joins in-flight sync computations for the same key too."""
+    body = CACHE.get(key)
+    if body is not None:
+        return _json_response(body, "HIT")
+
+    async def _fill_async():
+        generation = CACHE.generation
+        body, status = await compute()
+        CACHE.put(key, body, generation)
+        return body, status
+
+    (body, status), shared = await FLIGHT.do_async(key, _fill_async)
+    return _json_response(body, "COALESCED" if shared else status)
 
 @app.get("/interlinear/{book}/{chapter:int}/{verse:int}")
 def get_interlinear_verse(book: str, chapter: int, verse: int):
     code, name = resolve_book(book)
-    with get_conn() as c:
-        rows = c.execute("""
-            SELECT surface, lemma, translit, gloss, morph, strong, token_index
-            FROM tokens
-            WHERE book_code=? AND chapter=? AND verse=?
-            ORDER BY token_index ASC
-        """, (code, chapter, verse)).fetchall()
-    tokens = [enrich_token(r) for r in rows]
-    return {"reference": f"{name} {chapter}:{verse}", "book": name, "book_code": code, "chapter": chapter, "verse": verse, "tokens": tokens}
+
+    def compute() -> Tuple[bytes, str]:
+        body = stored_payload(code, chapter, verse)
+        if body is not None:
+            return body, "STORED"
+        return _json_bytes(build_verse_payload(code, name, chapter, verse)), "MISS"
+
+    return serve_cached((code, chapter, verse), compute)
 
 @app.get("/interlinear/{book}/{chapter:int}")
 def get_interlinear_chapter(book: str, chapter: int):
     code, name = resolve_book(book)
-    with get_conn() as c:
+
+    def compute() -> Tuple[bytes, str]:
+        body = stored_payload(code, chapter, 0)
+        if body is not None:
+            return body, "STORED"
+        return _json_bytes(build_chapter_payload(code, name, chapter)), "MISS"
+
+    return serve_cached((code, chapter), compute)
+
+# ---------- Passages (verse ranges) ----------
+RANGE_SQL = """
+    SELECT chapter, verse, {cols}
+    FROM tokens
+    WHERE book_code=? AND (chapter, verse) BETWEEN (?, ?) AND (?, ?)
+    ORDER BY chapter ASC, verse ASC, token_index ASC
+"""
+
+# Same, on a packed-id database: one clustered range scan, already in order.
+RANGE_SQL_PACKED = """
+    SELECT chapter, verse, {cols}
+    FROM tokens
+    WHERE id BETWEEN ? AND ?
+    ORDER BY id
+"""
+
+def range_rows(conn: sqlite3.Connection, code: str, sc: int, sv: int, ec: int, ev: int) -> sqlite3.Cursor:
+    if has_packed_ids():
+        return conn.execute(RANGE_SQL_PACKED.format(cols=token_select_cols()), ref_bounds(code, sc, sv, ec, ev))
+    return conn.execute(RANGE_SQL.format(cols=token_select_cols()), (code, sc, sv, ec, ev))
+
+def _range_verse(name: str, chapter: int, verse: int, tokens: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {"reference": f"{name} {chapter}:{verse}", "chapter": chapter, "verse": verse, "tokens": tokens}
+
+def iter_range_verses(rows: Iterable[sqlite3.Row], name: str, materialized: bool) -> Iterator[Dict[str, Any]]:
+    """Group an ordered (chapter, verse, token_index) row stream into verse objects, yielding each as it closes."""
+    cur_key = None
+    tokens: List[Dict[str, Any]] = []
+    for r in rows:
+        key = (int(r["chapter"]), int(r["verse"]))
+        if key != cur_key:
+            if cur_key is not None:
+                yield _range_verse(name, *cur_key, tokens)
+            cur_key, tokens = key, []
+        tokens.append(enrich_token(r, materialized))
+    if cur_key is not None:
+        yield _range_verse(name, *cur_key, tokens)
+
+def iter_store_verses(store: ColumnStore, code: str, name: str, sc: int, sv: int, ec: int, ev: int) -> Iterator[Dict[str, Any]]:
+    for ch, vs, tokens in store.iter_verses(code, sc, sv, ec, ev):
+        yield _range_verse(name, ch, vs, tokens)
+
+def _range_label(name: str, sc: int, sv: int, ec: int, ev: int) -> str:
+    if (sc, sv) == (ec, ev):
+        return f"{name} {sc}:{sv}"
+    if sc == ec:
+        return f"{name} {sc}:{sv}-{ev}"
+    return f"{name} {sc}:{sv}-{ec}:{ev}"
+
+def build_range_payload(code: str, name: str, sc: int, sv: int, ec: int, ev: int) -> Dict[str, Any]:
+    store = column_store()
+    if store is not None:
+        verses = list(iter_store_verses(store, code, name, sc, sv, ec, ev))
+    else:
+        materialized = has_resolved_columns()
+        rows = range_rows(get_conn(), code, sc, sv, ec, ev).fetchall()
+        verses = list(iter_range_verses(rows, name, materialized))
+    return {
+        "reference": _range_label(name, sc, sv, ec, ev), "book": name, "book_code": code,
+        "start": {"chapter": sc, "verse": sv}, "end": {"chapter": ec, "verse": ev},
+        "verses": verses,
+    }
+
+def stream_range(code: str, name: str, sc: int, sv: int, ec: int, ev: int) -> Iterator[bytes]:
+    # NDJSON, one verse per line. Starlette may advance this generator from different
+    # threadpool workers, so it owns a connection instead of borrowing a thread's.
+    store = column_store()
+    if store is not None:
+        for v in iter_store_verses(store, code, name, sc, sv, ec, ev):
+            yield _json_bytes(v) + b"\n"
+        return
+    conn = POOL.open()
+    try:
+        materialized = has_resolved_columns()
+        cur = range_rows(conn, code, sc, sv, ec, ev)
+        for v in iter_range_verses(cur, name, materialized):
+            yield _json_bytes(v) + b"\n"
+    finally:
+        conn.close()
+
+def _passage(book: str, sc: int, sv: int, ec: int, ev: int, stream: bool):
+    code, name = resolve_book(book)
+    if (sc, sv) > (ec, ev):
+        raise HTTPException(400, f"Range end {ec}:{ev} is before start {sc}:{sv}.")
+    if stream:
+        return StreamingResponse(stream_range(code, name, sc, sv, ec, ev), media_type="application/x-ndjson")
+    return serve_cached((code, sc, sv, ec, ev),
+                        lambda: (_json_bytes(build_range_payload(code, name, sc, sv, ec, ev)), "MISS"))
+
+@app.get("/interlinear/{book}/{start_chapter:int}:{start_verse:int}-{end_chapter:int}:{end_verse:int}")
+def get_interlinear_passage(book: str, start_chapter: int, start_verse: int, end_chapter: int, end_verse: int,
+                            stream: bool = False):
+    return _passage(book, start_chapter, start_verse, end_chapter, end_verse, stream)
+
+@app.get("/interlinear/{book}/{chapter:int}:{start_verse:int}-{end_verse:int}")
+def get_interlinear_verse_range(book: str, chapter: int, start_verse: int, end_verse: int, stream: bool = False):
+    return _passage(book, chapter, start_verse, chapter, end_verse, stream)
+
+# ---------- Batch lookup ----------
+BATCH_MAX_REFS = int(os.environ.get("INTERLINEAR_BATCH_MAX_REFS", "100"))
+BATCH_MAX_TOKENS = int(os.environ.get("INTERLINEAR_BATCH_MAX_TOKENS", "50000"))
+_END_OF_CHAPTER = 1_000_000
+
+# "GEN 1:1", "Genesis 1", "1 Samuel 3:1-10", "GEN 1:31-2:3", "PSA 1-2" (chapters), "GEN.1.1"
+_REF_RE = re.compile(
+    r"^\s*(?P<book>.+?)[\s./]*(?P<sc>\d+)(?:[:.](?P<sv>\d+))?"
+    r"(?:\s*-\s*(?:(?P<ec>\d+)[:.])?(?P<ev>\d+))?\s*$"
+)
+
+class BatchRequest(BaseModel):
+    refs: List[str]
+
+def parse_reference(ref: str) -> Tuple[str, str, int, int, int, int]:
+    """(book_code, book_name, start_chapter, start_verse, end_chapter, end_verse) for a reference string."""
+    m = _REF_RE.match(ref or "")
+    if not m:
+        raise HTTPException(400, f"Unparseable reference: {ref!r}")
+    code, name = resolve_book(m["book"])
+    sc = int(m["sc"])
+    if m["sv"] is None:
+        # Whole chapter, or a chapter span like "PSA 1-2".
+        ec = int(m["ev"]) if m["ev"] else sc
+        sv, ev = 0, _END_OF_CHAPTER
+    else:
+        sv = int(m["sv"])
+        ec = int(m["ec"]) if m["ec"] else sc
+        ev = int(m["ev"]) if m["ev"] else sv
+    if (sc, sv) > (ec, ev):
+        raise HTTPException(400, f"Range end is before start: {ref!r}")
+    return code, name, sc, sv, ec, ev
+
+BATCH_SQL = """
+    WITH refs(ref_no, book_code, sc, sv, ec, ev) AS (VALUES {values})
+    SELECT refs.ref_no, t.chapter, t.verse, {cols}
+    FROM refs
+    JOIN tokens t ON t.book_code = refs.book_code
+                 AND (t.chapter, t.verse) BETWEEN (refs.sc, refs.sv) AND (refs.ec, refs.ev)
+    ORDER BY refs.ref_no, t.chapter, t.verse, t.token_index
+"""
+
+BATCH_SQL_PACKED = """
+    WITH refs(ref_no, lo, hi) AS (VALUES {values})
+    SELECT refs.ref_no, t.chapter, t.verse, {cols}
+    FROM refs
+    JOIN tokens t ON t.id BETWEEN refs.lo AND refs.hi
+    ORDER BY refs.ref_no, t.id
+"""
+
+@app.post("/interlinear/batch")
+def get_interlinear_batch(req: BatchRequest):
+    if len(req.refs) > BATCH_MAX_REFS:
+        raise HTTPException(413, f"Too many references: {len(req.refs)} (max {BATCH_MAX_REFS}).")
+
+    parsed: List[Tuple[str, Tuple[str, str, int, int, int, int]]] = []
+    errors: Dict[str, str] = {}
+    for ref in dict.fromkeys(req.refs):  # dedupe, keep order
+        try:
+            parsed.append((ref, parse_reference(ref)))
+        except HTTPException as e:
+            errors[ref] = e.detail
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for ref, (code, name, sc, sv, ec, ev) in parsed:
+        if (sv, ev) == (0, _END_OF_CHAPTER):
+            label = f"{name} {sc}" if sc == ec else f"{name} {sc}-{ec}"
+        else:
+            label = _range_label(name, sc, sv, ec, ev)
+        results[ref] = {"reference": label, "book": name, "book_code": code,
+                        "start": {"chapter": sc, "verse": sv}, "end": {"chapter": ec, "verse": ev},
+                        "verses": []}
+    if not parsed:
+        return {"results": results, "errors": errors}
+
+    store = column_store()
+    if store is not None:
+        seen = 0
+        for ref, (code, name, sc, sv, ec, ev) in parsed:
+            seen += store.count_tokens(code, sc, sv, ec, ev)
+            if seen > BATCH_MAX_TOKENS:
+                raise HTTPException(413, f"Batch exceeds {BATCH_MAX_TOKENS} tokens; split it into smaller requests.")
+            results[ref]["verses"] = list(iter_store_verses(store, code, name, sc, sv, ec, ev))
+        return {"results": results, "errors": errors}
+
+    # One query for the whole batch: the refs ride along as a VALUES table and each one
+    # becomes an id range scan (packed ids) or an idx_ref range probe.
+    materialized = has_resolved_columns()
+    params: List[Any] = []
+    if has_packed_ids():
+        sql = BATCH_SQL_PACKED.format(values=",".join(["(?,?,?)"] * len(parsed)), cols=token_select_cols())
+        for i, (_, (code, _name, sc, sv, ec, ev)) in enumerate(parsed):
+            params += [i, *ref_bounds(code, sc, sv, ec, ev)]
+    else:
+        sql = BATCH_SQL.format(values=",".join(["(?,?,?,?,?,?)"] * len(parsed)), cols=token_select_cols())
+        for i, (_, (code, _name, sc, sv, ec, ev)) in enumerate(parsed):
+            params += [i, code, sc, sv, ec, ev]
+    rows = get_conn().execute(sql, params)
+
+    seen = 0
+    last = None
+    current: Dict[str, Any] = {}
+    for r in rows:
+        seen += 1
+        if seen > BATCH_MAX_TOKENS:
+            raise HTTPException(413, f"Batch exceeds {BATCH_MAX_TOKENS} tokens; split it into smaller requests.")
+        ref_no, ch, vs = int(r["ref_no"]), int(r["chapter"]), int(r["verse"])
+        if (ref_no, ch, vs) != last:
+            last = (ref_no, ch, vs)
+            ref, (code, name, *_rest) = parsed[ref_no]
+            current = {"reference": f"{name} {ch}:{vs}", "chapter": ch, "verse": vs, "tokens": []}
+            results[ref]["verses"].append(current)
+        current["tokens"].append(enrich_token(r, materialized))
+    return {"results": results, "errors": errors}
+
+
+# ---------- Concordance ----------
+CONCORDANCE_MAX_LIMIT = 500
+
+def _parse_cursor(cursor: str, parts: int) -> Tuple[int, ...]:
+    try:
+        vals = tuple(int(x) for x in cursor.split("-"))
+    except ValueError:
+        vals = ()
+    if len(vals) != parts:
+        raise HTTPException(400, f"Bad cursor: {cursor!r}")
+    return vals
+
+@app.get("/concordance/{strong}")
+def get_concordance(strong: str, book: str = "", limit: int = 100, cursor: str = ""):
+    """
+    Every occurrence of a Strong's number, in canonical verse order, from the token_strongs
+    index (built by indexes.py). Keyset-paginated: pass next_cursor back as cursor.
+    """
+    sid = parse_strong_id(strong)
+    if not sid:
+        raise HTTPException(400, "Strong's number must look like H7225 or G3056.")
+    if "token_strongs" not in db_features()["tables"]:
+        raise HTTPException(503, "Strong's index missing; run `python indexes.py` against the DB.")
+    lang, num = sid
+    key = f"{lang}{num}"
+    limit = max(1, min(limit, CONCORDANCE_MAX_LIMIT))
+    c = get_conn()
+
+    counts = c.execute(
+        "SELECT book_code, occurrences FROM strong_book_counts WHERE lang=? AND num=?", (lang, num)).fetchall()
+    by_book = sorted(({"book_code": r[0], "book": BOOK_CODES.get(r[0], r[0]), "count": r[1]} for r in counts),
+                     key=lambda b: BOOK_ORDER.get(b["book_code"], 10_000))
+
+    lo, hi = 0, 10 ** 15
+    if book:
+        code, _ = resolve_book(book)
+        lo, hi = pack_ref(code, 0, 0, 0), pack_ref(code, 999, 999, 999)
+    after = _parse_cursor(cursor, 3) if cursor else (lo - 1, 0, 0)
+
+    rows = c.execute("""
+        SELECT ts.ref, ts.token_id, ts.morpheme, t.book_code, t.chapter, t.verse, t.token_index,
+               t.surface, t.strong, t.morph
+        FROM token_strongs ts
+        JOIN tokens t ON t.id = ts.token_id
+        WHERE ts.lang=? AND ts.num=? AND ts.ref BETWEEN ? AND ?
+          AND (ts.ref, ts.token_id, ts.morpheme) > (?, ?, ?)
+        ORDER BY ts.ref, ts.token_id, ts.morpheme
+        LIMIT ?
+    """, (lang, num, lo, hi, *after, limit + 1)).fetchall()
+    more = len(rows) > limit
+    rows = rows[:limit]
+
+    hits = []
+    for r in rows:
+        name = BOOK_CODES.get(r["book_code"], r["book_code"])
+        hits.append({
+            "reference": f"{name} {r['chapter']}:{r['verse']}", "book_code": r["book_code"],
+            "chapter": r["chapter"], "verse": r["verse"], "index": r["token_index"],
+            "surface": r["surface"], "strong": r["strong"], "morph": r["morph"],
+        })
+    last = rows[-1] if rows else None
+    return {
+        "strong": key,
+        "entry": LEX.by_strong.get(key, {}),
+        "total": sum(b["count"] for b in by_book),
+        "books": by_book,
+        "hits": hits,
+        "next_cursor": f"{last['ref']}-{last['token_id']}-{last['morpheme']}" if more and last else None,
+    }
+
+# ---------- Full-text search ----------
+SEARCH_MAX_LIMIT = 100
+SEARCH_FIELDS = ("surface", "lemma", "translit", "gloss")
+_CODE_BY_ORDINAL = {n: code for code, n in BOOK_ORDER.items()}
+_TERM_RE = re.compile(r'(?:(\w+):)?("[^"]*"\*?|\S+)')
+
+def fts_query(q: str) -> str:
+    """
+    Turn a user query into an FTS5 expression. Terms are ANDed; `gloss:`, `lemma:`,
+    `translit:` or `surface:` scopes a term to one column, "quotes" make a phrase and a
+    trailing * a prefix match. Everything else is quoted, so FTS5 operators can't leak in.
+    """
+    parts = []
+    for field, term in _TERM_RE.findall(unicodedata.normalize("NFC", q)):
+        prefix = term.endswith("*")
+        term = term.rstrip("*").strip('"').replace('"', '""').strip()
+        if not term:
+            continue
+        expr = f'"{term}"' + (" *" if prefix else "")
+        if field:
+            if field.lower() not in SEARCH_FIELDS:
+                raise HTTPException(400, f"Unknown search field {field!r}; use one of {', '.join(SEARCH_FIELDS)}.")
+            expr = f"{field.lower()} : {expr}"
+        parts.append(expr)
+    if not parts:
+        raise HTTPException(400, "Empty search query.")
+    return " AND ".join(parts)
+
+@app.get("/search")
+def search(q: str, book: str = "", limit: int = 20, cursor: str = ""):
+    """
+    Ranked verse hits (bm25) over surface, lemma, translit and gloss text from the verse_fts
+    index (built by indexes.py). Keyset-paginated on (rank, verse): pass next_cursor back as cursor.
+    """
+    if "verse_fts" not in db_features()["tables"]:
+        raise HTTPException(503, "Search index missing; run `python indexes.py --only fts` against the DB.")
+    match = fts_query(q)
+    limit = max(1, min(limit, SEARCH_MAX_LIMIT))
+
+    lo, hi = 0, 10 ** 15
+    if book:
+        code, _ = resolve_book(book)
+        lo, hi = pack_ref(code, 0, 0, 0), pack_ref(code, 999, 999, 999)
+    after_rank, after_id = float("-inf"), -1
+    if cursor:
+        try:
+            r, i = cursor.rsplit("~", 1)
+            after_rank, after_id = float(r), int(i)
+        except ValueError:
+            raise HTTPException(400, f"Bad cursor: {cursor!r}")
+
+    c = get_conn()
+    try:
+        total = c.execute(
+            "SELECT COUNT(*) FROM verse_fts WHERE verse_fts MATCH ? AND rowid BETWEEN ? AND ?",
+            (match, lo, hi)).fetchone()[0]
         rows = c.execute("""
-            SELECT verse, token_index, surface, lemma, translit, gloss, morph, strong
-            FROM tokens
-            WHERE book_code=? AND chapter=?
-            ORDER BY verse ASC, token_index ASC
-        """, (code, chapter)).fetchall()
-    verses: Dict[int, List[Dict[str, Any]]] = {}
+            SELECT rowid, rank, snippet(verse_fts, -1, '<b>', '</b>', '…', 12) AS snippet
+            FROM verse_fts
+            WHERE verse_fts MATCH ? AND rowid BETWEEN ? AND ?
+              AND (rank > ? OR (rank = ? AND rowid > ?))
+            ORDER BY rank, rowid
+            LIMIT ?
+        """, (match, lo, hi, after_rank, after_rank, after_id, limit + 1)).fetchall()
+    except sqlite3.OperationalError as e:
+        raise HTTPException(400, f"Bad search query: {e}")
+    more = len(rows) > limit
+    rows = rows[:limit]
+
+    hits = []
     for r in rows:
-        v = int(r["verse"])
-        verses.setdefault(v, []).append(enrich_token(r))
-    return {"reference": f"{name} {chapter}", "book": name, "book_code": code, "chapter": chapter, "verses": verses}
+        ordinal, chapter, verse, _ = unpack_ref(r["rowid"])
+        code = _CODE_BY_ORDINAL.get(ordinal, "")
+        name = BOOK_CODES.get(code, code)
+        hits.append({
+            "reference": f"{name} {chapter}:{verse}", "book_code": code, "chapter": chapter, "verse": verse,
+            "score": round(-r["rank"], 4), "snippet": r["snippet"],
+        })
+    last = rows[-1] if rows else None
+    return {
+        "query": q,
+        "match": match,
+        "total": total,
+        "hits": hits,
+        "next_cursor": f"{last['rank']!r}~{last['rowid']}" if more and last else None,
+    }
+
+# ---------- Folded lookup ----------
+LOOKUP_MAX_LIMIT = 100
+LOOKUP_FIELDS = ("surface", "lemma")
+
+@app.get("/lookup")
+def lookup(q: str, field: str = "", prefix: bool = False, limit: int = 20):
+    """
+    Point-, cantillation-, accent- and case-insensitive lookup of surface forms and lemmas:
+    `ברית` or `λογος` match their marked spellings. Only the query is folded; folded_forms (built by indexes.py) holds the corpus keys. Spellings that fold to the
+    same key are grouped per Strong's number, most frequent first.
+    """
+    if "folded_forms" not in db_features()["tables"]:
+        raise HTTPException(503, "Lookup index missing; run `python indexes.py --only folded` against the DB.")
+    if field and field not in LOOKUP_FIELDS:
+        raise HTTPException(400, f"field must be one of {', '.join(LOOKUP_FIELDS)}.")
+    key = fold(q)
+    if not key:
+        raise HTTPException(400, "Empty lookup query.")
+    limit = max(1, min(limit, LOOKUP_MAX_LIMIT))
+    fields = (field,) if field else LOOKUP_FIELDS
+
+    # Equality or prefix, both a range on the (field, folded, form) primary key.
+    hi = key + "\U0010ffff" if prefix else key
+    rows = get_conn().execute(f"""
+        SELECT field, folded, strong, form, occurrences, variants, first_ref FROM (
+            SELECT field, folded, strong, form,
+                   ROW_NUMBER() OVER w AS rn,  -- the group's most frequent spelling
+                   SUM(occurrences) OVER g AS occurrences, COUNT(*) OVER g AS variants,
+                   MIN(first_ref) OVER g AS first_ref
+            FROM folded_forms
+            WHERE field IN ({",".join("?" * len(fields))}) AND folded BETWEEN ? AND ?
+            WINDOW g AS (PARTITION BY field, folded, strong),
+                   w AS (g ORDER BY occurrences DESC, form)
+        )
+        WHERE rn = 1
+        ORDER BY folded = ? DESC, occurrences DESC, field, folded
+        LIMIT ?
+    """, (*fields, key, hi, key, limit)).fetchall()
+
+    matches = []
+    for r in rows:
+        ordinal, chapter, verse, _ = unpack_ref(r["first_ref"])
+        code = _CODE_BY_ORDINAL.get(ordinal, "")
+        matches.append({
+            "field": r["field"], "folded": r["folded"], "form": r["form"], "variants": r["variants"],
+            "occurrences": r["occurrences"], "strong": r["strong"],
+            "first": {"reference": f"{BOOK_CODES.get(code, code)} {chapter}:{verse}", "book_code": code,
+                      "chapter": chapter, "verse": verse},
+        })
+    return {"query": q, "folded": key, "prefix": prefix, "matches": matches}
+
+# ---------- Morphology search ----------
+MORPH_MAX_LIMIT = 500
+MORPH_VALUES: Dict[str, set] = {
+    "lang": set(M.LANGS),
+    "pos": set(M.POS.values()),
+    "type": {v for t in M.TYPES.values() for v in t.values()},
+    "stem": {v for t in M.STEMS.values() for v in t.values()},
+    "tense": set(M.TENSES.values()),
+    "person": set(M.PERSONS.values()),
+    "gender": set(M.GENDERS.values()),
+    "number": set(M.NUMBERS.values()),
+    "state": set(M.STATES.values()),
+}
+
+def _chapter_range(chapters: str) -> Tuple[int, int]:
+    try:
+        a, _, b = chapters.partition("-")
+        lo, hi = int(a), int(b or a)
+    except ValueError:
+        raise HTTPException(400, f"Bad chapters {chapters!r}; use e.g. 3 or 1-11.")
+    return lo, hi
+
+@app.get("/morph/search")
+def morph_search(code: str = "", lang: str = "", pos: str = "", type: str = "", stem: str = "", tense: str = "",
+                 person: int = 0, gender: str = "", number: str = "", state: str = "",
+                 book: str = "", chapters: str = "", limit: int = 100, cursor: str = ""):
+    """
+    Morphemes matching parsed-morphology filters, from token_morphs (built by indexes.py).
+    Filters take morph.py names (pos=verb&stem=qal&tense=perfect&person=3&gender=masculine&
+    number=singular) or an OSHB code (code=Vqp3ms); explicit filters override the code.
+    `book` and `chapters` (3 or 1-11) narrow the range. Returns per-book counts and
+    keyset-paginated hits in canonical order.
+    """
+    if "token_morphs" not in db_features()["tables"]:
+        raise HTTPException(503, "Morphology index missing; run `python indexes.py --only morph` against the DB.")
+    filters: Dict[str, Any] = {}
+    if code:
+        code_lang, body = M.split_lang(code.strip())
+        parsed = M.parse_code(body, code_lang)
+        if not parsed.pos:
+            raise HTTPException(400, f"Unknown morph code {code!r}.")
+        filters = {k: v for k, v in parsed._asdict().items() if v is not None and k != "lang"}
+        if len(code.strip()) > len(body):
+            filters["lang"] = code_lang
+    given = {"lang": lang.upper(), "pos": pos, "type": type, "stem": stem, "tense": tense, "person": person,
+             "gender": gender, "number": number, "state": state}
+    for k, v in given.items():
+        if not v:
+            continue
+        if v not in MORPH_VALUES[k]:
+            raise HTTPException(400, f"Unknown {k} {v!r}; expected one of {', '.join(sorted(map(str, MORPH_VALUES[k])))}.")
+        filters[k] = v
+    if not filters:
+        raise HTTPException(400, "Give at least one morphology filter (or code=).")
+
+    lo, hi = 0, 10 ** 15
+    if book:
+        bcode, _ = resolve_book(book)
+        c1, c2 = _chapter_range(chapters) if chapters else (0, 999)
+        lo, hi = pack_ref(bcode, c1, 0, 0), pack_ref(bcode, c2, 999, 999)
+    elif chapters:
+        raise HTTPException(400, "chapters needs a book.")
+    limit = max(1, min(limit, MORPH_MAX_LIMIT))
+    after = _parse_cursor(cursor, 3) if cursor else (lo - 1, 0, 0)
+
+    where = " AND ".join(f"m.{k} = ?" for k in filters)
+    args = (*filters.values(), lo, hi)
+    c = get_conn()
+    counts = c.execute(f"""
+        SELECT m.ref / 1000000000 AS ordinal, COUNT(*)
+        FROM token_morphs m
+        WHERE {where} AND m.ref BETWEEN ? AND ?
+        GROUP BY ordinal
+        ORDER BY ordinal
+    """, args).fetchall()
+    by_book = []
+    for ordinal, n in counts:
+        bcode = _CODE_BY_ORDINAL.get(ordinal, "")
+        by_book.append({"book_code": bcode, "book": BOOK_CODES.get(bcode, bcode), "count": n})
+
+    rows = c.execute(f"""
+        SELECT m.ref, m.token_id, m.morpheme, t.book_code, t.chapter, t.verse, t.token_index,
+               t.surface, t.strong, t.morph
+        FROM token_morphs m
+        JOIN tokens t ON t.id = m.token_id
+        WHERE {where} AND m.ref BETWEEN ? AND ?
+          AND (m.ref, m.token_id, m.morpheme) > (?, ?, ?)
+        ORDER BY m.ref, m.token_id, m.morpheme
+        LIMIT ?
+    """, (*args, *after, limit + 1)).fetchall()
+    more = len(rows) > limit
+    rows = rows[:limit]
+
+    hits = []
+    for r in rows:
+        name = BOOK_CODES.get(r["book_code"], r["book_code"])
+        hits.append({
+            "reference": f"{name} {r['chapter']}:{r['verse']}", "book_code": r["book_code"],
+            "chapter": r["chapter"], "verse": r["verse"], "index": r["token_index"], "morpheme": r["morpheme"],
+            "surface": r["surface"], "strong": r["strong"], "morph": r["morph"],
+        })
+    last = rows[-1] if rows else None
+    return {
+        "filters": filters,
+        "total": sum(b["count"] for b in by_book),
+        "books": by_book,
+        "hits": hits,
+        "next_cursor": f"{last['ref']}-{last['token_id']}-{last['morpheme']}" if more and last else None,
+    }
+
+# ---------- Corpus statistics ----------
+STATS_MAX_LIMIT = 1000
+
+def _require_stats():
+    if "stat_books" not in db_features()["tables"]:
+        raise HTTPException(503, "Statistics missing; run `python stats.py` against the DB.")
+
+def _lemma_info(strong: str) -> Dict[str, str]:
+    entry = LEX.by_strong.get(strong, {})
+    return {"strong": strong, "lemma": entry.get("lemma", ""), "translit": entry.get("translit", "")}
+
+def _first(ref: int) -> Dict[str, Any]:
+    ordinal, chapter, verse, _ = unpack_ref(ref)
+    code = _CODE_BY_ORDINAL.get(ordinal, "")
+    return {"reference": f"{BOOK_CODES.get(code, code)} {chapter}:{verse}", "book_code": code,
+            "chapter": chapter, "verse": verse}
+
+@app.get("/stats/testaments")
+def stats_testaments():
+    """Token, verse, chapter, book and distinct-lemma counts per testament."""
+    _require_stats()
+    c = get_conn()
+    rows = c.execute("""
+        SELECT testament, COUNT(*) AS books, SUM(chapters) AS chapters, SUM(verses) AS verses, SUM(tokens) AS tokens
+        FROM stat_books GROUP BY testament ORDER BY testament DESC
+    """).fetchall()
+    lemmas = dict(c.execute("""
+        SELECT b.testament, COUNT(DISTINCT l.strong)
+        FROM stat_lemma_book l JOIN stat_books b ON b.book_code = l.book_code
+        GROUP BY b.testament
+    """).fetchall())
+    return {"testaments": [{**dict(r), "lemmas": lemmas.get(r["testament"], 0)} for r in rows]}
+
+@app.get("/stats/books")
+def stats_books():
+    """Per-book counts, canonical order."""
+    _require_stats()
+    rows = get_conn().execute(
+        "SELECT book_code, testament, chapters, verses, tokens, lemmas FROM stat_books").fetchall()
+    books = [{"book": BOOK_CODES.get(r["book_code"], r["book_code"]), **dict(r)} for r in rows]
+    return {"books": sorted(books, key=lambda b: BOOK_ORDER.get(b["book_code"], 10_000))}
+
+@app.get("/stats/lemmas")
+def stats_lemmas(book: str = "", limit: int = 100, offset: int = 0):
+    """Most frequent lemmas (by normalized Strong's id), corpus-wide or in one book."""
+    _require_stats()
+    limit = max(1, min(limit, STATS_MAX_LIMIT))
+    offset = max(0, offset)
+    c = get_conn()
+    if book:
+        code, _ = resolve_book(book)
+        rows = c.execute("""
+            SELECT strong, occurrences, first_ref FROM stat_lemma_book
+            WHERE book_code=? ORDER BY occurrences DESC, strong LIMIT ? OFFSET ?
+        """, (code, limit, offset)).fetchall()
+    else:
+        code = None
+        rows = c.execute("""
+            SELECT strong, occurrences, first_ref, books FROM stat_lemma_totals
+            ORDER BY occurrences DESC, strong LIMIT ? OFFSET ?
+        """, (limit, offset)).fetchall()
+    lemmas = []
+    for r in rows:
+        item = {**_lemma_info(r["strong"]), "occurrences": r["occurrences"], "first": _first(r["first_ref"])}
+        if not code:
+            item["books"] = r["books"]
+        lemmas.append(item)
+    return {"book_code": code, "offset": offset, "lemmas": lemmas}
+
+@app.get("/stats/lemmas/{strong}")
+def stats_lemma(strong: str):
+    """Frequency of one lemma in every book it occurs in."""
+    _require_stats()
+    sid = parse_strong_id(strong)
+    if not sid:
+        raise HTTPException(400, "Strong's number must look like H7225 or G3056.")
+    key = f"{sid[0]}{sid[1]}"
+    rows = get_conn().execute(
+        "SELECT book_code, occurrences, first_ref FROM stat_lemma_book WHERE strong=?", (key,)).fetchall()
+    by_book = sorted(({"book_code": r["book_code"], "book": BOOK_CODES.get(r["book_code"], r["book_code"]),
+                       "occurrences": r["occurrences"], "first": _first(r["first_ref"])} for r in rows),
+                     key=lambda b: BOOK_ORDER.get(b["book_code"], 10_000))
+    return {**_lemma_info(key), "occurrences": sum(b["occurrences"] for b in by_book), "books": by_book}
+
+@app.get("/stats/hapax")
+def stats_hapax(book: str = "", limit: int = 100, offset: int = 0):
+    """Hapax legomena: lemmas occurring once in the corpus, in canonical order (optionally within one book)."""
+    _require_stats()
+    limit = max(1, min(limit, STATS_MAX_LIMIT))
+    offset = max(0, offset)
+    lo, hi = 0, 10 ** 15
+    if book:
+        code, _ = resolve_book(book)
+        lo, hi = pack_ref(code, 0, 0, 0), pack_ref(code, 999, 999, 999)
+    c = get_conn()
+    total = c.execute("SELECT COUNT(*) FROM stat_lemma_totals WHERE occurrences=1 AND first_ref BETWEEN ? AND ?",
+                      (lo, hi)).fetchone()[0]
+    rows = c.execute("""
+        SELECT strong, first_ref FROM stat_lemma_totals
+        WHERE occurrences=1 AND first_ref BETWEEN ? AND ?
+        ORDER BY first_ref, strong LIMIT ? OFFSET ?
+    """, (lo, hi, limit, offset)).fetchall()
+    return {"total": total, "offset": offset,
+            "hapax": [{**_lemma_info(r["strong"]), "at": _first(r["first_ref"])} for r in rows]}
+
+@app.get("/stats/glosses/{book}/{chapter:int}")
+def stats_chapter_glosses(book: str, chapter: int, limit: int = 25):
+    """Most frequent glosses in a chapter (top INTERLINEAR_STATS_TOP_GLOSSES are stored)."""
+    _require_stats()
+    code, name = resolve_book(book)
+    rows = get_conn().execute("""
+        SELECT rank, gloss, strong, occurrences FROM stat_chapter_glosses
+        WHERE book_code=? AND chapter=? ORDER BY rank LIMIT ?
+    """, (code, chapter, max(1, limit))).fetchall()
+    if not rows:
+        raise HTTPException(404, f"No statistics for {name} {chapter}.")
+    return {"reference": f"{name} {chapter}", "book_code": code, "chapter": chapter,
+            "glosses": [dict(r) for r in rows]}
+
+# ---------- Collocations ----------
+@app.get("/collocations/{strong}")
+def get_collocations(strong: str, measure: str = "llr", window: int = 0, limit: int = 25):
+    """
+    Lemmas that most often occur with `strong` in the same verse (or within ±window tokens,
+    when collocations.py was run with --window), ranked by log-likelihood (`llr`) or PMI.
+    A primary-key range read of the precomputed top-K.
+    """
+    if "collocations" not in db_features()["tables"]:
+        raise HTTPException(503, "Collocations missing; run `python collocations.py` against the DB.")
+    sid = parse_strong_id(strong)
+    if not sid:
+        raise HTTPException(400, "Strong's number must look like H7225 or G3056.")
+    if measure not in ("llr", "pmi"):
+        raise HTTPException(400, "measure must be llr or pmi.")
+    key = f"{sid[0]}{sid[1]}"
+    scope = f"w{window}" if window else "verse"
+    c = get_conn()
+    units = c.execute("SELECT units FROM collocation_ids WHERE strong=? AND scope=?", (key, scope)).fetchone()
+    if units is None:
+        scopes = [r[0] for r in c.execute("SELECT DISTINCT scope FROM collocation_ids")]
+        if scope not in scopes:
+            raise HTTPException(404, f"No {scope!r} collocations built (available: {', '.join(scopes)}).")
+        raise HTTPException(404, f"{key} does not occur in the corpus.")
+    rows = c.execute("""
+        SELECT rank, other, cooc, score FROM collocations
+        WHERE strong=? AND scope=? AND measure=?
+        ORDER BY rank LIMIT ?
+    """, (key, scope, measure, max(1, limit))).fetchall()
+    return {
+        **_lemma_info(key), "scope": scope, "measure": measure, "units": units[0],
+        "neighbours": [{**_lemma_info(r["other"]), "rank": r["rank"], "cooccurrences": r["cooc"],
+                        "score": r["score"]} for r in rows],
+    }
+
+# ---------- Lexicon search ----------
+LEXICON_SEARCH_MAX_LIMIT = 200
+
+def corpus_frequencies(keys: List[str]) -> Dict[str, int]:
+    """Occurrences per prefixed Strong's key, from stats.py's totals or the concordance counts."""
+    ids = [k for k in keys if parse_strong_id(k)]
+    if not ids:
+        return {}
+    tables = db_features()["tables"]
+    marks = ",".join("?" * len(ids))
+    c = get_conn()
+    if "stat_lemma_totals" in tables:
+        return dict(c.execute(f"SELECT strong, occurrences FROM stat_lemma_totals WHERE strong IN ({marks})", ids).fetchall())
+    if "strong_book_counts" in tables:
+        rows = c.execute(f"""
+            SELECT lang || num, SUM(occurrences) FROM strong_book_counts
+            WHERE (lang, num) IN (VALUES {",".join(["(?, ?)"] * len(ids))})
+            GROUP BY lang, num
+        """, [v for k in ids for v in parse_strong_id(k)]).fetchall()
+        return dict(rows)
+    return {}
+
+@app.get("/lexicon/search")
+def lexicon_search(q: str, limit: int = 25, hits: int = 0):
+    """
+    Lexicon entries whose gloss / KJV usage contains every word of an English query (stemmed:
+    "shepherds" finds "shepherd"), most frequent in the corpus first. Reads the lexicon's
+    reverse gloss index (compiled into the snapshot). `hits=N` adds each entry's first N
+    occurrences from the concordance index.
+    """
+    keys = LEX.search_gloss(q)
+    # Greek entries can exist both by number and by lemma; keep the numbered one.
+    numbered = {LEX.entry(k).get("lemma") for k in keys if not k.startswith("lemma:")}
+    keys = [k for k in keys if not (k.startswith("lemma:") and k[6:] in numbered)]
+    freq = corpus_frequencies(keys)
+    keys.sort(key=lambda k: (-freq.get(k, 0), k))
+    total = len(keys)
+    keys = keys[:max(1, min(limit, LEXICON_SEARCH_MAX_LIMIT))]
+
+    with_hits = hits > 0 and "token_strongs" in db_features()["tables"]
+    entries = []
+    for k in keys:
+        e = LEX.entry(k)
+        item = {"key": k, "lemma": e.get("lemma", ""), "translit": e.get("translit", ""), "gloss": e.get("gloss", ""),
+                "occurrences": freq.get(k, 0)}
+        sid = parse_strong_id(k)
+        if sid:
+            item["concordance"] = f"/concordance/{k}"
+            if with_hits:
+                rows = get_conn().execute(
+                    "SELECT ref FROM token_strongs WHERE lang=? AND num=? ORDER BY ref LIMIT ?", (*sid, hits)).fetchall()
+                item["hits"] = [_first(r[0]) for r in rows]
+        entries.append(item)
+    return {"query": q, "terms": gloss_terms(q), "total": total, "entries": entries}
+
+STARTUP["import_ms"] = round((time.perf_counter() - _T_IMPORT) * 1000, 1)
+print(f"[startup] app imported in {STARTUP['import_ms']:.0f} ms (lexicon {LEX.load_ms:.0f} ms from {LEX.source})")
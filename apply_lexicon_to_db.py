@@ -1,6 +1,22 @@
 # apply_lexicon_to_db.py
-import csv, os, sqlite3, re, argparse
-from typing import Dict
+# Fill (or, with --overwrite, replace) tokens.lemma/translit/gloss from the lexicon CSVs.
+#
+#   python apply_lexicon_to_db.py [--db PATH] [--overwrite] [--dry-run] [--sample N] [--chunk-size N]
+#
+# Set-based: both lexicons go into temp tables, each distinct tokens.strong value is mapped
+# once to the first of its norm_strong_keys() the lexicon has, the new values of every
+# affected token are computed in one INSERT … SELECT into temp._plan, and tokens is updated
+# from that plan with UPDATE … FROM in id-ordered chunks (one commit per chunk).
+import csv, os, time, sqlite3, argparse
+from typing import Dict, List
+
+from strongs import norm_strong_keys
+from books import BOOK_ORDER, book_ordinal, unpack_ref
+from db import has_packed_ids
+from indexes import sync_fts
+from lexicon import Lexicon
+from payloads import build_payloads, has_stored_payloads
+from stats import build_stats
 
 BASE_DIR = os.path.dirname(__file__)
 DB_PATH = os.environ.get("INTERLINEAR_DB", os.path.join(BASE_DIR, "interlinear.sqlite3"))
@@ -9,34 +25,6 @@ DATA_DIR = os.path.join(BASE_DIR, "data")
 STRONGS_CSV = os.path.join(DATA_DIR, "strongs_lexicon.csv")  # strong,lemma,translit,gloss
 GREEK_CSV   = os.path.join(DATA_DIR, "greek_lexicon.csv")    # lemma,translit,gloss (optional)
 
-def norm_strong_keys(raw: str):
-    if not raw:
-        return ()
-    parts = re.split(r"[,\s/;]+", raw.strip())
-    keys = []
-    for p in parts:
-        p = p.strip()
-        if not p:
-            continue
-        if re.match(r"^[HhGg]\d+$", p):
-            prefix = p[0].upper()
-            num = re.sub(r"\D", "", p[1:])
-            if num:
-                keys.append(prefix + num)  # H7225/G3056
-                keys.append(num)           # 7225
-        else:
-            num = re.sub(r"\D", "", p)
-            if num:
-                keys.append("H" + num)
-                keys.append("G" + num)
-                keys.append(num)
-    seen, out = set(), []
-    for k in keys:
-        if k not in seen:
-            seen.add(k)
-            out.append(k)
-    return tuple(out)
-
 def load_strongs_map() -> Dict[str, Dict[str, str]]:
     if not os.path.isfile(STRONGS_CSV):
         return {}
@@ -73,10 +61,102 @@ def load_greek_map() -> Dict[str, Dict[str, str]]:
             }
     return out
 
+TEMP_SCHEMA = """
+CREATE TEMP TABLE _lex_strong (key TEXT PRIMARY KEY, lemma TEXT, translit TEXT, gloss TEXT);
+CREATE TEMP TABLE _lex_greek (lemma TEXT PRIMARY KEY, translit TEXT, gloss TEXT);
+CREATE TEMP TABLE _strong_hit (strong TEXT PRIMARY KEY, key TEXT NOT NULL);
+CREATE TEMP TABLE _plan (
+    id INTEGER PRIMARY KEY,
+    book_code TEXT NOT NULL,
+    via TEXT NOT NULL,            -- 'strong' | 'lemma'
+    old_lemma TEXT, old_translit TEXT, old_gloss TEXT,
+    lemma TEXT, translit TEXT, gloss TEXT,
+    changed INTEGER NOT NULL
+);
+"""
+
+# Token values are compared trimmed, as the lexicon values are.
+PLAN_SQL = """
+INSERT INTO temp._plan
+SELECT id, book_code, via, t_lemma, t_transl, t_gloss, n_lemma, n_transl, n_gloss,
+       (n_lemma, n_transl, n_gloss) IS NOT (t_lemma, t_transl, t_gloss)
+FROM (
+    SELECT id, book_code, via, t_lemma, t_transl, t_gloss,
+           {new_lemma} AS n_lemma, {new_transl} AS n_transl, {new_gloss} AS n_gloss
+    FROM (
+        SELECT t.id, t.book_code,
+               TRIM(COALESCE(t.lemma,'')) AS t_lemma, TRIM(COALESCE(t.translit,'')) AS t_transl,
+               TRIM(COALESCE(t.gloss,'')) AS t_gloss,
+               CASE WHEN ls.key IS NOT NULL THEN 'strong' WHEN lg.lemma IS NOT NULL THEN 'lemma' END AS via,
+               COALESCE(ls.lemma, lg.lemma, '') AS h_lemma,
+               COALESCE(ls.translit, lg.translit, '') AS h_transl,
+               COALESCE(ls.gloss, lg.gloss, '') AS h_gloss
+        FROM tokens t
+        LEFT JOIN temp._strong_hit sh ON sh.strong = t.strong
+        LEFT JOIN temp._lex_strong ls ON ls.key = sh.key
+        LEFT JOIN temp._lex_greek lg ON ls.key IS NULL AND lg.lemma = TRIM(COALESCE(t.lemma,''))
+        WHERE {candidates}
+    )
+    WHERE via IS NOT NULL
+)
+"""
+
+# lexicon value, falling back to the token's (--overwrite); else the token's, falling back to the lexicon's
+OVERWRITE_NEW = ("COALESCE(NULLIF(h_lemma,''), t_lemma)", "COALESCE(NULLIF(h_transl,''), t_transl)",
+                 "COALESCE(NULLIF(h_gloss,''), t_gloss)")
+FILL_NEW = ("COALESCE(NULLIF(t_lemma,''), h_lemma)", "COALESCE(NULLIF(t_transl,''), h_transl)",
+            "COALESCE(NULLIF(t_gloss,''), h_gloss)")
+
+OVERWRITE_CANDIDATES = "TRIM(COALESCE(t.strong,'')) <> ''"
+FILL_CANDIDATES = """(TRIM(COALESCE(t.lemma,''))   = ''
+               OR TRIM(COALESCE(t.translit,'')) = ''
+               OR TRIM(COALESCE(t.gloss,''))    = '')"""
+
+BOOK_OF = {ordinal: code for code, ordinal in BOOK_ORDER.items()}
+
+def load_temp_lexicon(conn: sqlite3.Connection, strongs_map: Dict[str, Dict[str, str]],
+                      greek_map: Dict[str, Dict[str, str]]) -> int:
+    """Fill the temp lexicon tables and map every distinct tokens.strong to its lexicon key. Returns strongs mapped."""
+    conn.executescript(TEMP_SCHEMA)
+    conn.executemany("INSERT INTO temp._lex_strong VALUES (?,?,?,?)",
+                     ((k, e["lemma"], e["translit"], e["gloss"]) for k, e in strongs_map.items()))
+    conn.executemany("INSERT INTO temp._lex_greek VALUES (?,?,?)",
+                     ((k, e["translit"], e["gloss"]) for k, e in greek_map.items()))
+    hits = []
+    for (strong,) in conn.execute("SELECT DISTINCT strong FROM tokens WHERE strong IS NOT NULL"):
+        key = next((k for k in norm_strong_keys(strong.strip()) if k in strongs_map), None)
+        if key:
+            hits.append((strong, key))
+    conn.executemany("INSERT INTO temp._strong_hit VALUES (?,?)", hits)
+    return len(hits)
+
+def ref_label(token_id: int) -> str:
+    ordinal, ch, vs, idx = unpack_ref(token_id)
+    return f"{BOOK_OF.get(ordinal, ordinal)} {ch}:{vs} #{idx}"
+
+def report(conn: sqlite3.Connection, sample: int, packed: bool):
+    """Per-field change counts and a few example rows from temp._plan."""
+    n_lemma, n_transl, n_gloss = conn.execute("""
+        SELECT COALESCE(SUM(lemma IS NOT old_lemma), 0), COALESCE(SUM(translit IS NOT old_translit), 0),
+               COALESCE(SUM(gloss IS NOT old_gloss), 0)
+        FROM temp._plan WHERE changed""").fetchone()
+    print(f"  fields changed: lemma {n_lemma:,}, translit {n_transl:,}, gloss {n_gloss:,}")
+    for pk, *vals in conn.execute("""
+            SELECT id, old_lemma, lemma, old_translit, translit, old_gloss, gloss
+            FROM temp._plan WHERE changed ORDER BY id LIMIT ?""", (sample,)):
+        diffs = [f"{name}: {old!r} -> {new!r}" for name, old, new in
+                 zip(("lemma", "translit", "gloss"), vals[0::2], vals[1::2]) if old != new]
+        print(f"  {ref_label(pk) if packed else f'id {pk}'}: " + "; ".join(diffs))
+
 def main():
-    ap = argparse.ArgumentParser()
+    ap = argparse.ArgumentParser(description="Fill tokens lemma/translit/gloss from the lexicon CSVs.")
+    ap.add_argument("--db", default=DB_PATH, help=f"SQLite path (default: {DB_PATH} or $INTERLINEAR_DB)")
     ap.add_argument("--overwrite", action="store_true",
                     help="Update ALL tokens that have a Strong’s code, regardless of current DB values.")
+    ap.add_argument("--dry-run", action="store_true",
+                    help="Report what would change (counts and sample rows) without writing.")
+    ap.add_argument("--sample", type=int, default=10, help="Changed rows shown in the report (default 10).")
+    ap.add_argument("--chunk-size", type=int, default=50_000, help="Rows per UPDATE/commit (default 50k).")
     args = ap.parse_args()
 
     strongs_map = load_strongs_map()
@@ -85,87 +165,71 @@ def main():
         print("No lexicon CSVs found in ./data. Expected strongs_lexicon.csv and/or greek_lexicon.csv.")
         return
 
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    cur = conn.cursor()
-
-    # Helpful indexes
-    cur.execute("CREATE INDEX IF NOT EXISTS idx_tokens_strong ON tokens(strong)")
-    cur.execute("CREATE INDEX IF NOT EXISTS idx_tokens_lemma ON tokens(lemma)")
-
-    if args.overwrite:
-        # ✅ Select ALL rows with a strong code
-        cur.execute("""
-            SELECT id, strong,
-                   COALESCE(lemma,'')   AS lemma,
-                   COALESCE(translit,'') AS translit,
-                   COALESCE(gloss,'')    AS gloss
-            FROM tokens
-            WHERE TRIM(COALESCE(strong,'')) <> ''
-        """)
-    else:
-        # Fill only empties
-        cur.execute("""
-            SELECT id, strong,
-                   COALESCE(lemma,'')   AS lemma,
-                   COALESCE(translit,'') AS translit,
-                   COALESCE(gloss,'')    AS gloss
-            FROM tokens
-            WHERE TRIM(COALESCE(lemma,''))   = ''
-               OR TRIM(COALESCE(translit,''))= ''
-               OR TRIM(COALESCE(gloss,''))   = ''
-        """)
-
-    rows = cur.fetchall()
+    conn = sqlite3.connect(args.db)
+    conn.execute("PRAGMA temp_store=MEMORY;")
+    t0 = time.perf_counter()
+    mapped = load_temp_lexicon(conn, strongs_map, greek_map)
+    new_cols = OVERWRITE_NEW if args.overwrite else FILL_NEW
+    conn.execute(PLAN_SQL.format(new_lemma=new_cols[0], new_transl=new_cols[1], new_gloss=new_cols[2],
+                                 candidates=OVERWRITE_CANDIDATES if args.overwrite else FILL_CANDIDATES))
+    by_strong, by_lemma, changed = conn.execute(
+        "SELECT COALESCE(SUM(via = 'strong'), 0), COALESCE(SUM(via = 'lemma'), 0), COALESCE(SUM(changed), 0) "
+        "FROM temp._plan").fetchone()
+    print(f"Planned in {time.perf_counter() - t0:.1f}s: {changed:,} tokens to update "
+          f"(matched by strong: {by_strong:,}, by lemma: {by_lemma:,}; {mapped:,} distinct strongs mapped).")
+    books = sorted((r[0] for r in conn.execute("SELECT DISTINCT book_code FROM temp._plan WHERE changed")),
+                   key=lambda b: (book_ordinal(b) or 10_000, b))
+    report(conn, args.sample, has_packed_ids(conn))
+    # Stored payloads of the rewritten books are rebuilt (only books that had them).
+    stored = {r[0] for r in conn.execute("SELECT DISTINCT book_code FROM payloads")} if has_stored_payloads(conn) else set()
+    payloads = [b for b in books if b in stored]
+    if books:
+        print(f"  books: {', '.join(books)}")
+    if payloads:
+        print(f"  stored payloads to rebuild: {', '.join(payloads)}")
+    if args.dry_run:
+        conn.close()
+        print("Dry run: nothing written.")
+        return
 
+    # Rows we rewrite here no longer match what materialize_resolved.py stored for them;
+    # clearing lex_version makes the API resolve them at runtime until it is re-run.
+    has_resolved = "lex_version" in {c[1] for c in conn.execute("PRAGMA table_info(tokens)")}
+    update_sql = """
+        UPDATE tokens
+           SET lemma = p.lemma, translit = p.translit, gloss = p.gloss{}
+          FROM temp._plan p
+         WHERE p.id = tokens.id AND p.changed AND p.id BETWEEN ? AND ?
+    """.format(", lex_version = NULL" if has_resolved else "")
+    ids: List[int] = [r[0] for r in conn.execute("SELECT id FROM temp._plan WHERE changed ORDER BY id")]
+    t1 = time.perf_counter()
     updated = 0
-    by_strong = 0
-    by_lemma = 0
-
-    for r in rows:
-        pk       = r["id"]
-        t_strong = (r["strong"] or "").strip()
-        t_lemma  = (r["lemma"] or "").strip()
-        t_transl = (r["translit"] or "").strip()
-        t_gloss  = (r["gloss"] or "").strip()
-
-        hit = None
-        # Prefer Strong’s
-        for k in norm_strong_keys(t_strong):
-            hit = strongs_map.get(k)
-            if hit:
-                by_strong += 1
-                break
-        # Fallback: lemma (Greek map)
-        if not hit and t_lemma:
-            hit = greek_map.get(t_lemma)
-            if hit:
-                by_lemma += 1
-        if not hit:
-            continue
-
-        # Decide new values
-        if args.overwrite:
-            new_lemma  = hit.get("lemma", "") or t_lemma
-            new_transl = hit.get("translit", "") or t_transl
-            new_gloss  = hit.get("gloss", "") or t_gloss
-        else:
-            new_lemma  = t_lemma  or hit.get("lemma", "")
-            new_transl = t_transl or hit.get("translit", "")
-            new_gloss  = t_gloss  or hit.get("gloss", "")
-
-        # Write if anything changes
-        if (new_lemma, new_transl, new_gloss) != (t_lemma, t_transl, t_gloss):
-            cur.execute("""
-                UPDATE tokens
-                   SET lemma = ?, translit = ?, gloss = ?
-                 WHERE id = ?
-            """, (new_lemma, new_transl, new_gloss, pk))
-            updated += 1
-
-    conn.commit()
+    for i in range(0, len(ids), args.chunk_size):
+        chunk = ids[i:i + args.chunk_size]
+        conn.execute(update_sql, (chunk[0], chunk[-1]))
+        conn.commit()
+        updated += len(chunk)
+        print(f"  … updated {updated:,} tokens", end="\r", flush=True)
+    if updated:
+        print()
+    print(f"Updated {updated:,} tokens in {time.perf_counter() - t1:.1f}s "
+          f"(by strong: {by_strong:,}, by lemma: {by_lemma:,}).")
+
+    lex = Lexicon()
+    lex.load()
+    refreshed = sync_fts(conn, lex)  # search index: only the verses whose tokens changed
+    stats = build_stats(conn, lex)  # statistics: only the books whose tokens changed
+    if payloads:
+        build_payloads(conn, lex, payloads)
     conn.close()
-    print(f"Updated {updated} tokens (by strong: {by_strong}, by lemma: {by_lemma}).")
+    if refreshed:
+        print(f"Search index refreshed for {refreshed} verses.")
+    if stats["rebuilt"]:
+        print(f"Statistics re-aggregated for {stats['rebuilt']} books.")
+    if payloads:
+        print(f"Stored payloads rebuilt for {len(payloads)} books.")
+    if updated and has_resolved:
+        print("Run materialize_resolved.py to refresh resolved columns for the updated rows.")
 
 if __name__ == "__main__":
     main()
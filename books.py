@@ -0,0 +1,67 @@
+# books.py — book codes, names and canonical order.
+
+import os, json
+from typing import Dict
+
+BOOK_CODES_PATH = os.path.join(os.path.dirname(__file__), "data", "book_codes.json")
+
+FALLBACK_BOOK_CODES = {
+    "GEN":"Genesis","EXO":"Exodus","LEV":"Leviticus","NUM":"Numbers","DEU":"Deuteronomy",
+    "JOS":"Joshua","JDG":"Judges","RUT":"Ruth","1SA":"1 Samuel","2SA":"2 Samuel",
+    "1KI":"1 Kings","2KI":"2 Kings","1CH":"1 Chronicles","2CH":"2 Chronicles","EZR":"Ezra",
+    "NEH":"Nehemiah","EST":"Esther","JOB":"Job","PSA":"Psalms","PRO":"Proverbs","ECC":"Ecclesiastes",
+    "SNG":"Song of Solomon","ISA":"Isaiah","JER":"Jeremiah","LAM":"Lamentations","EZK":"Ezekiel",
+    "DAN":"Daniel","HOS":"Hosea","JOL":"Joel","AMO":"Amos","OBA":"Obadiah","JON":"Jonah","MIC":"Micah",
+    "NAM":"Nahum","HAB":"Habakkuk","ZEP":"Zephaniah","HAG":"Haggai","ZEC":"Zechariah","MAL":"Malachi",
+    "MAT":"Matthew","MRK":"Mark","LUK":"Luke","JHN":"John","ACT":"Acts","ROM":"Romans",
+    "1CO":"1 Corinthians","2CO":"2 Corinthians","GAL":"Galatians","EPH":"Ephesians","PHP":"Philippians",
+    "COL":"Colossians","1TH":"1 Thessalonians","2TH":"2 Thessalonians","1TI":"1 Timothy","2TI":"2 Timothy",
+    "TIT":"Titus","PHM":"Philemon","HEB":"Hebrews","JAS":"James","1PE":"1 Peter","2PE":"2 Peter",
+    "1JN":"1 John","2JN":"2 John","3JN":"3 John","JUD":"Jude","REV":"Revelation"
+}
+
+def load_book_codes() -> Dict[str, str]:
+    try:
+        with open(BOOK_CODES_PATH, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+        out = {}
+        for k, v in raw.items():
+            if isinstance(v, dict) and "name" in v:
+                out[k.upper()] = v["name"]
+            else:
+                out[k.upper()] = str(v)
+        return out
+    except Exception:
+        return FALLBACK_BOOK_CODES.copy()
+
+BOOK_CODES = load_book_codes()
+NAME_TO_CODE = {name.lower(): code for code, name in BOOK_CODES.items()}
+
+def _book_order() -> Dict[str, int]:
+    # Canonical order (GEN=1 … REV=66); codes only present in book_codes.json follow.
+    order: Dict[str, int] = {}
+    for code in list(FALLBACK_BOOK_CODES) + list(BOOK_CODES):
+        order.setdefault(code, len(order) + 1)
+    return order
+
+BOOK_ORDER = _book_order()
+
+def book_ordinal(code: str) -> int:
+    return BOOK_ORDER.get((code or "").upper(), 0)
+
+OT_BOOKS = frozenset(list(FALLBACK_BOOK_CODES)[:39])
+
+def testament(code: str) -> str:
+    return "OT" if (code or "").upper() in OT_BOOKS else "NT"
+
+# Packed reference: book ordinal, chapter, verse, token index as one sortable integer,
+# e.g. GEN 1:1 #3 -> 1_001_001_003.
+def pack_ref(code: str, chapter: int, verse: int, token_index: int = 0) -> int:
+    return ((book_ordinal(code) * 1000 + chapter) * 1000 + verse) * 1000 + token_index
+
+def unpack_ref(ref: int) -> tuple:
+    """(book ordinal, chapter, verse, token index)"""
+    ref, idx = divmod(ref, 1000)
+    ref, verse = divmod(ref, 1000)
+    book, chapter = divmod(ref, 1000)
+    return book, chapter, verse, idx
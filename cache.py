@@ -0,0 +1,140 @@
+# cache.py
+# Bounded in-process LRU cache for finished API payloads (serialized JSON bytes).
+# Entries are dropped wholesale when any watched source file (DB, WAL, lexicon CSVs) changes.
+# Each invalidation bumps `generation`; a body computed under an older generation is not stored.
+
+import os, time, threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+def _file_sig(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+class ResponseCache:
+    """
+    LRU keyed by e.g. (book_code, chapter) or (book_code, chapter, verse).
+    Limits: max_entries and/or max_bytes (0 = unlimited for that dimension;
+    both 0 = cache disabled). Values must be bytes so their size is exact.
+    Callers read `generation` before computing a value and pass it to put(),
+    so a value computed across an invalidation is dropped instead of cached.
+    """
+
+    def __init__(self,
+                 max_entries: int = 512,
+                 max_bytes: int = 64 * 1024 * 1024,
+                 watch: Iterable[str] = (),
+                 check_interval: float = 1.0,
+                 on_invalidate: Optional[Callable[[], None]] = None):
+        self.max_entries = max(0, int(max_entries))
+        self.max_bytes = max(0, int(max_bytes))
+        self.watch = list(watch)
+        self.check_interval = check_interval
+        self.on_invalidate = on_invalidate
+        self._data: "OrderedDict[Hashable, bytes]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._sigs = self._signature()
+        self._next_check = time.monotonic() + check_interval
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.max_entries or self.max_bytes)
+
+    def _signature(self):
+        return tuple(_file_sig(p) for p in self.watch)
+
+    def _drop_all(self):
+        # Called with the lock held.
+        self._data.clear()
+        self._bytes = 0
+        self.generation += 1
+
+    def _check_sources(self) -> bool:
+        # Called with the lock held; stats the watched files at most once per interval.
+        # Returns True when the sources changed; the caller runs on_invalidate after unlocking.
+        now = time.monotonic()
+        if now < self._next_check:
+            return False
+        self._next_check = now + self.check_interval
+        sigs = self._signature()
+        if sigs == self._sigs:
+            return False
+        self._sigs = sigs
+        self._drop_all()
+        self.invalidations += 1
+        return True
+
+    def _invalidated(self):
+        # Outside the lock: on_invalidate may be slow (app reloads the lexicon and resets the pool).
+        if self.on_invalidate:
+            self.on_invalidate()
+        with self._lock:
+            self._drop_all()  # values computed from the old sources while the callback ran
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            changed = self._check_sources()
+            val = self._data.get(key)
+            if val is None:
+                self.misses += 1
+            else:
+                self._data.move_to_end(key)
+                self.hits += 1
+        if changed:
+            self._invalidated()
+        return val
+
+    def put(self, key: Hashable, value: bytes, generation: Optional[int] = None):
+        """Store value; skipped when `generation` (read before computing it) is no longer current."""
+        if not self.enabled:
+            return
+        size = len(value)
+        if self.max_bytes and size > self.max_bytes:
+            return  # would evict everything else and still not fit
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._data[key] = value
+            self._bytes += size
+            while self._data and (
+                (self.max_entries and len(self._data) > self.max_entries) or
+                (self.max_bytes and self._bytes > self.max_bytes)
+            ):
+                _, dropped = self._data.popitem(last=False)
+                self._bytes -= len(dropped)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._drop_all()
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
@@ -0,0 +1,175 @@
+# collocations.py
+# Offline collocation stage: which Strong's ids co-occur with which, scored, top-K per id.
+# Reads the normalized token_strongs table (indexes.py), so run it after that; seed.py does.
+#
+#   python collocations.py [--db PATH] [--window N ...] [--top-k 25] [--min-count 3]
+#
+# Scopes:
+#   verse  — unit = verse; two ids co-occur when both appear in it (counted once per verse)
+#   wN     — unit = pair of ids on tokens at most N token positions apart within a verse
+#            (--window N); tokens without a Strong's number still count towards the distance,
+#            and ids of one token (prefix + stem morphemes) are 0 apart
+# For each co-occurring pair the 2x2 contingency table over units gives
+#   pmi  — log2(p(x,y) / (p(x) p(y))); only pairs seen at least --min-count times
+#   llr  — Dunning's log-likelihood ratio, positive associations only
+# and the top-K neighbours per id and measure land in `collocations`, so
+# /collocations/{strong} is a primary-key range read.
+
+import os, sqlite3, argparse, heapq, math, time
+from collections import Counter
+from typing import Dict, Iterator, List, Tuple
+
+BASE_DIR = os.path.dirname(__file__)
+DB_PATH = os.environ.get("INTERLINEAR_DB", os.path.join(BASE_DIR, "interlinear.sqlite3"))
+
+COLLOCATIONS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS collocations (
+    strong TEXT NOT NULL,      -- normalized, e.g. H1285
+    scope TEXT NOT NULL,       -- 'verse' | 'w3' ...
+    measure TEXT NOT NULL,     -- 'llr' | 'pmi'
+    rank INTEGER NOT NULL,     -- 1 = strongest association
+    other TEXT NOT NULL,
+    cooc INTEGER NOT NULL,     -- units containing both
+    score REAL NOT NULL,
+    PRIMARY KEY (strong, scope, measure, rank)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS collocation_ids (
+    strong TEXT NOT NULL,
+    scope TEXT NOT NULL,
+    units INTEGER NOT NULL,    -- units containing the id (its marginal)
+    PRIMARY KEY (strong, scope)
+) WITHOUT ROWID;
+"""
+
+MEASURES = ("llr", "pmi")
+
+def _xlogx(x: float) -> float:
+    return x * math.log(x) if x > 0 else 0.0
+
+def _entropy(*ks: float) -> float:
+    return _xlogx(sum(ks)) - sum(_xlogx(k) for k in ks)
+
+def llr(k11: int, k12: int, k21: int, k22: int) -> float:
+    """Dunning's G² for a 2x2 contingency table."""
+    row = _entropy(k11 + k12, k21 + k22)
+    col = _entropy(k11 + k21, k12 + k22)
+    return max(0.0, 2.0 * (row + col - _entropy(k11, k12, k21, k22)))
+
+def iter_verse_ids(conn: sqlite3.Connection, intern: Dict[str, int]) -> Iterator[List[Tuple[int, int]]]:
+    """Per verse, token-ordered (token_index, id) pairs; ids are normalized and interned as ints via `intern`."""
+    cur = conn.execute("SELECT ref, lang || num FROM token_strongs ORDER BY ref, token_id, morpheme")
+    verse, ids = None, []
+    for ref, sid in cur:
+        v = ref // 1000
+        if v != verse:
+            if ids:
+                yield ids
+            verse, ids = v, []
+        ids.append((ref % 1000, intern.setdefault(sid, len(intern))))  # ref is packed; % 1000 = token_index
+    if ids:
+        yield ids
+
+def count_units(verses: List[List[Tuple[int, int]]], window: int, M: int) -> Tuple[Counter, Counter, int]:
+    """
+    (pair counts keyed a*M+b with a<b, marginal counts per id, number of units); M = number of ids.
+    verses as from iter_verse_ids(); window = max token_index distance (0 = whole verse).
+    """
+    pairs: Counter = Counter()
+    marg: Counter = Counter()
+    units = 0
+    if not window:
+        for ids in verses:
+            uniq = sorted({sid for _, sid in ids})
+            units += 1
+            marg.update(uniq)
+            for i, a in enumerate(uniq):
+                base = a * M
+                for b in uniq[i + 1:]:
+                    pairs[base + b] += 1
+        return pairs, marg, units
+    for ids in verses:
+        for i, (ia, a) in enumerate(ids):
+            for ib, b in ids[i + 1:]:
+                if ib - ia > window:
+                    break  # ids are in token order
+                units += 1
+                marg.update({a, b})  # each id once per unit, also when a == b
+                if a != b:
+                    pairs[min(a, b) * M + max(a, b)] += 1
+    return pairs, marg, units
+
+def top_k(pairs: Counter, marg: Counter, units: int, M: int, k: int, min_count: int) -> Dict[str, Dict[int, List[Tuple[float, int, int]]]]:
+    """measure -> id -> [(score, cooc, other)] best first."""
+    heaps: Dict[str, Dict[int, list]] = {m: {} for m in MEASURES}
+    for key, k11 in pairs.items():
+        a, b = divmod(key, M)
+        na, nb = marg[a], marg[b]
+        expected = na * nb / units
+        if k11 <= expected:
+            continue  # not an attraction; both measures would only rank noise or repulsion
+        scores = {"llr": llr(k11, na - k11, nb - k11, units - na - nb + k11)}
+        if k11 >= min_count:
+            scores["pmi"] = math.log2(k11 / expected)
+        for m, s in scores.items():
+            for x, y in ((a, b), (b, a)):
+                h = heaps[m].setdefault(x, [])
+                item = (s, k11, y)
+                if len(h) < k:
+                    heapq.heappush(h, item)
+                elif item > h[0]:
+                    heapq.heapreplace(h, item)
+    return {m: {x: sorted(h, reverse=True) for x, h in by_id.items()} for m, by_id in heaps.items()}
+
+def stored_windows(conn: sqlite3.Connection) -> List[int]:
+    """Window sizes of the wN scopes already in collocations, so a rebuild can refresh them all."""
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE name='collocation_ids'").fetchone():
+        return []
+    scopes = (r[0] for r in conn.execute("SELECT DISTINCT scope FROM collocation_ids WHERE scope LIKE 'w%'"))
+    return sorted(int(s[1:]) for s in scopes if s[1:].isdigit())
+
+def build_collocations(conn: sqlite3.Connection, windows: List[int] = (), k: int = 25, min_count: int = 3) -> Dict[str, int]:
+    """Rebuild the verse scope plus one wN scope per window. Returns rows written per scope."""
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE name='token_strongs'").fetchone():
+        raise RuntimeError("token_strongs missing; run `python indexes.py --only strongs` first.")
+    conn.executescript(COLLOCATIONS_SCHEMA)
+    intern: Dict[str, int] = {}
+    verses = list(iter_verse_ids(conn, intern))
+    names = {i: s for s, i in intern.items()}
+    out: Dict[str, int] = {}
+    for window in [0, *windows]:
+        scope = f"w{window}" if window else "verse"
+        pairs, marg, units = count_units(verses, window, len(intern))
+        best = top_k(pairs, marg, units, len(intern), k, min_count)
+        rows = [(names[x], scope, m, rank, names[y], cooc, round(s, 4))
+                for m, by_id in best.items() for x, lst in by_id.items()
+                for rank, (s, cooc, y) in enumerate(lst, 1)]
+        conn.execute("DELETE FROM collocations WHERE scope=?", (scope,))
+        conn.execute("DELETE FROM collocation_ids WHERE scope=?", (scope,))
+        conn.executemany("INSERT INTO collocations(strong, scope, measure, rank, other, cooc, score) VALUES (?,?,?,?,?,?,?)",
+                         sorted(rows))
+        conn.executemany("INSERT INTO collocation_ids(strong, scope, units) VALUES (?,?,?)",
+                         sorted((names[x], scope, n) for x, n in marg.items()))
+        conn.commit()
+        out[scope] = len(rows)
+        print(f"  {scope}: {len(pairs):,} pairs over {units:,} units -> {len(rows):,} rows")
+    return out
+
+def main():
+    ap = argparse.ArgumentParser(description="Build Strong's-id collocations (top-K neighbours per id).")
+    ap.add_argument("--db", default=DB_PATH, help=f"SQLite path (default: {DB_PATH} or $INTERLINEAR_DB)")
+    ap.add_argument("--window", type=int, nargs="*", default=[],
+                    help="Also build window scopes of ids on tokens at most N positions apart (e.g. --window 3 5).")
+    ap.add_argument("--top-k", type=int, default=25, help="Neighbours kept per id and measure.")
+    ap.add_argument("--min-count", type=int, default=3, help="Minimum co-occurrences for PMI ranking.")
+    args = ap.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    t0 = time.perf_counter()
+    try:
+        build_collocations(conn, args.window, args.top_k, args.min_count)
+    finally:
+        conn.close()
+    print(f"Collocations built in {time.perf_counter() - t0:.1f}s.")
+
+if __name__ == "__main__":
+    main()
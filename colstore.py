@@ -0,0 +1,167 @@
+# colstore.py
+# Columnar in-memory token store: an alternative to reading tokens from SQLite per request
+# (INTERLINEAR_BACKEND=columnar).
+#
+# The corpus is loaded once, in canonical order, into one array per column. Strings are
+# interned per column and stored as integer codes ('H' when a column has < 65536 distinct
+# values, else 'I'); lemma/translit/gloss are resolved against the lexicon at load time.
+# Tokens of a verse, and verses of a chapter, are contiguous, so a verse-offset index
+# (per book: sorted (chapter, verse) keys + start offsets) turns any verse, chapter or
+# passage into a slice.
+
+import sqlite3, sys, time
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+from books import book_ordinal
+from lexicon import Lexicon
+
+RAW_COLS = ("surface", "lemma", "translit", "gloss", "morph", "strong")
+RESOLVED = ("resolved_lemma", "resolved_translit", "resolved_gloss")
+
+class _Interned:
+    """One string column: values -> codes; the code array is packed once the table is final."""
+    def __init__(self):
+        self.strings: List[str] = []
+        self._index: Dict[str, int] = {}
+        self.codes: Any = []
+
+    def extend(self, values: Iterable[str]):
+        setdefault, index = self._index.setdefault, self._index
+        self.codes += [setdefault(v, len(index)) for v in values]
+
+    def freeze(self):
+        self.strings = list(self._index)  # insertion order == code order
+        self.codes = array("H" if len(self.strings) < 1 << 16 else "I", self.codes)
+        self._index = {}
+
+class ColumnStore:
+    def __init__(self):
+        self.cols: Dict[str, _Interned] = {name: _Interned() for name in RAW_COLS + RESOLVED}
+        self.token_index = array("H")
+        # book_code -> ((chapter, verse) keys sorted, start offset per key + final end offset)
+        self.verses: Dict[str, Tuple[List[Tuple[int, int]], array]] = {}
+        self.lex_version = ""
+        self.load_ms = 0.0
+
+    @classmethod
+    def load(cls, conn: sqlite3.Connection, lex: Lexicon) -> "ColumnStore":
+        t0 = time.perf_counter()
+        store = cls()
+        store.lex_version = lex.version
+        cols = [store.cols[n] for n in RAW_COLS]
+        r_lemma, r_transl, r_gloss = (store.cols[n] for n in RESOLVED)
+        memo: Dict[Tuple[str, str, str, str], Tuple[str, str, str, str]] = {}
+        books = sorted((r[0] for r in conn.execute("SELECT DISTINCT book_code FROM tokens")),
+                       key=lambda b: (book_ordinal(b) or 10_000, b))
+        n = 0
+        for code in books:
+            rows = conn.execute(f"""
+                SELECT chapter, verse, token_index, {", ".join(RAW_COLS)}
+                FROM tokens WHERE book_code=?
+                ORDER BY chapter, verse, token_index
+            """, (code,)).fetchall()
+            if not rows:
+                continue
+            chs, vss, idxs, *raw = zip(*rows)
+            raw = [[v or "" for v in col] for col in raw]
+            for col, values in zip(cols, raw):
+                col.extend(values)
+            resolved = []
+            for k in zip(raw[5], raw[1], raw[2], raw[3]):  # strong, lemma, translit, gloss
+                res = memo.get(k)
+                if res is None:
+                    res = memo[k] = lex.resolve_fields(*k)
+                resolved.append(res)
+            r_lemma.extend(r[0] for r in resolved)
+            r_transl.extend(r[1] for r in resolved)
+            r_gloss.extend(r[2] for r in resolved)
+            store.token_index.extend(idxs)
+
+            keys: List[Tuple[int, int]] = []
+            starts = array("I")
+            for i, key in enumerate(zip(chs, vss)):
+                if not keys or keys[-1] != key:
+                    keys.append(key)
+                    starts.append(n + i)
+            n += len(rows)
+            starts.append(n)
+            store.verses[code] = (keys, starts)
+        for col in store.cols.values():
+            col.freeze()
+        store.load_ms = (time.perf_counter() - t0) * 1000
+        return store
+
+    def __len__(self) -> int:
+        return len(self.token_index)
+
+    # ---------- Slicing ----------
+    def span(self, code: str, sc: int, sv: int, ec: int, ev: int) -> Tuple[int, int]:
+        """Key positions [lo, hi) of the verses between (sc, sv) and (ec, ev) inclusive."""
+        keys, _ = self.verses.get(code, ((), None))
+        return bisect_left(keys, (sc, sv)), bisect_right(keys, (ec, ev))
+
+    def tokens(self, start: int, end: int) -> List[Dict[str, Any]]:
+        """Token dicts for rows [start, end), shaped like payloads.shape_token()."""
+        c = self.cols
+        surface, lemma, transl, gloss, morph, strong = (
+            (c[n].strings, c[n].codes) for n in RAW_COLS)
+        (rl, rlc), (rt, rtc), (rg, rgc) = ((c[n].strings, c[n].codes) for n in RESOLVED)
+        out = []
+        for i in range(start, end):
+            g = rg[rgc[i]]
+            out.append({
+                "surface": surface[0][surface[1][i]], "lemma": lemma[0][lemma[1][i]],
+                "translit": transl[0][transl[1][i]], "gloss": gloss[0][gloss[1][i]],
+                "morph": morph[0][morph[1][i]], "strong": strong[0][strong[1][i]],
+                "index": self.token_index[i],
+                "resolved_lemma": rl[rlc[i]], "resolved_translit": rt[rtc[i]], "resolved_gloss": g,
+                "translation": g,
+            })
+        return out
+
+    def iter_verses(self, code: str, sc: int, sv: int, ec: int, ev: int) -> Iterator[Tuple[int, int, List[Dict[str, Any]]]]:
+        """(chapter, verse, tokens) for every verse in the range, in order."""
+        lo, hi = self.span(code, sc, sv, ec, ev)
+        if lo >= hi:
+            return
+        keys, starts = self.verses[code]
+        for k in range(lo, hi):
+            ch, vs = keys[k]
+            yield ch, vs, self.tokens(starts[k], starts[k + 1])
+
+    def count_tokens(self, code: str, sc: int, sv: int, ec: int, ev: int) -> int:
+        lo, hi = self.span(code, sc, sv, ec, ev)
+        if lo >= hi:
+            return 0
+        starts = self.verses[code][1]
+        return starts[hi] - starts[lo]
+
+    def verse(self, code: str, chapter: int, verse: int) -> List[Dict[str, Any]]:
+        for _, _, toks in self.iter_verses(code, chapter, verse, chapter, verse):
+            return toks
+        return []
+
+    def chapter(self, code: str, chapter: int) -> Dict[int, List[Dict[str, Any]]]:
+        return {vs: toks for _, vs, toks in self.iter_verses(code, chapter, 0, chapter, 1 << 30)}
+
+    # ---------- Reporting ----------
+    def memory_report(self) -> Dict[str, Any]:
+        """Approximate bytes held: code arrays, interned string tables, offset index."""
+        arrays = sum(col.codes.buffer_info()[1] * col.codes.itemsize for col in self.cols.values())
+        arrays += self.token_index.buffer_info()[1] * self.token_index.itemsize
+        strings = sum(sys.getsizeof(col.strings) + sum(sys.getsizeof(s) for s in col.strings)
+                      for col in self.cols.values())
+        index = 0
+        for keys, starts in self.verses.values():
+            index += sys.getsizeof(keys) + sum(sys.getsizeof(k) for k in keys)
+            index += starts.buffer_info()[1] * starts.itemsize
+        return {
+            "tokens": len(self),
+            "verses": sum(len(k) for k, _ in self.verses.values()),
+            "distinct_strings": {name: len(col.strings) for name, col in self.cols.items()},
+            "bytes": {"code_arrays": arrays, "string_tables": strings, "verse_index": index,
+                      "total": arrays + strings + index},
+            "load_ms": round(self.load_ms, 1),
+        }
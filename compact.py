@@ -0,0 +1,418 @@
+# compact.py
+# Dictionary-encoded token layout. Every token row otherwise repeats its lemma, translit,
+# gloss (often a long KJV usage string), morph and strong text, plus the resolved copies
+# written by materialize_resolved.py. Here those values live once each in
+#
+#   glosses(id, gloss)                    — raw and resolved glosses
+#   morphs(id, morph)
+#   lexemes(id, strong, lemma, translit, gloss_id, resolved_lemma, resolved_translit,
+#           resolved_gloss_id, lex_key, lex_version)
+#
+# and a slim token_rows(id, book_code, chapter, verse, token_index, surface, lexeme_id,
+# morph_id) table points at them. `tokens` becomes a view with the usual column shape, so
+# readers (API, build stages, tools) are unchanged; INSTEAD OF triggers route INSERT,
+# UPDATE and DELETE through the dictionaries, and materialize_resolved.py resolves per
+# lexeme instead of per token. Ids are kept, so a packed-id database stays packed.
+#
+#   python compact.py [--db PATH] [--vacuum]   convert (or, if already compact, prune the dictionaries)
+#   python compact.py --expand [--db PATH]     back to the plain tokens table
+#
+# Both directions report the token storage size and chapter read latency before and after.
+
+import os, sqlite3, argparse, random, time
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+
+from books import pack_ref
+from db import SCHEMA as PLAIN_SCHEMA, has_packed_ids
+from lexicon import Lexicon
+
+BASE_DIR = os.path.dirname(__file__)
+DB_PATH = os.environ.get("INTERLINEAR_DB", os.path.join(BASE_DIR, "interlinear.sqlite3"))
+
+PLAIN_COLS = ("id", "book_code", "chapter", "verse", "token_index", "surface",
+              "lemma", "translit", "gloss", "morph", "strong")
+RESOLVED_COLS = ("resolved_lemma", "resolved_translit", "resolved_gloss", "lex_key", "lex_version")
+
+# Lexeme identity: every dictionary-encoded field; gloss columns hold glosses.id.
+LEXEME_COLS = ("strong", "lemma", "translit", "gloss_id",
+               "resolved_lemma", "resolved_translit", "resolved_gloss_id", "lex_key", "lex_version")
+
+COMPACT_TABLES = ("token_rows", "lexemes", "morphs", "glosses")
+
+COMPACT_SCHEMA = """
+CREATE TABLE glosses (
+    id INTEGER PRIMARY KEY,
+    gloss TEXT NOT NULL UNIQUE
+);
+CREATE TABLE morphs (
+    id INTEGER PRIMARY KEY,
+    morph TEXT NOT NULL UNIQUE
+);
+CREATE TABLE lexemes (
+    id INTEGER PRIMARY KEY,
+    strong TEXT,
+    lemma TEXT,
+    translit TEXT,
+    gloss_id INTEGER REFERENCES glosses(id),
+    resolved_lemma TEXT,
+    resolved_translit TEXT,
+    resolved_gloss_id INTEGER REFERENCES glosses(id),
+    lex_key TEXT,
+    lex_version TEXT
+);
+CREATE TABLE token_rows (
+    id INTEGER PRIMARY KEY,          -- tokens.id, unchanged
+    book_code TEXT NOT NULL,
+    chapter INTEGER NOT NULL,
+    verse INTEGER NOT NULL,
+    token_index INTEGER NOT NULL,
+    surface TEXT NOT NULL,
+    lexeme_id INTEGER NOT NULL REFERENCES lexemes(id),
+    morph_id INTEGER REFERENCES morphs(id)
+);
+"""
+
+# Created after the bulk load.
+COMPACT_INDEXES = f"""
+CREATE INDEX IF NOT EXISTS idx_lexemes_key ON lexemes({", ".join(LEXEME_COLS)});
+CREATE INDEX IF NOT EXISTS idx_ref ON token_rows(book_code, chapter, verse);
+"""
+
+VIEW_SQL = """
+CREATE VIEW tokens AS
+SELECT t.id, t.book_code, t.chapter, t.verse, t.token_index, t.surface,
+       l.lemma, l.translit, g.gloss, m.morph, l.strong,
+       l.resolved_lemma, l.resolved_translit, rg.gloss AS resolved_gloss, l.lex_key, l.lex_version
+FROM token_rows t
+JOIN lexemes l ON l.id = t.lexeme_id
+LEFT JOIN glosses g ON g.id = l.gloss_id
+LEFT JOIN morphs m ON m.id = t.morph_id
+LEFT JOIN glosses rg ON rg.id = l.resolved_gloss_id;
+"""
+
+def _lexeme_value(col: str, row: str) -> str:
+    if col == "gloss_id":
+        return f"(SELECT id FROM glosses WHERE gloss = {row}.gloss)"
+    if col == "resolved_gloss_id":
+        return f"(SELECT id FROM glosses WHERE gloss = {row}.resolved_gloss)"
+    return f"{row}.{col}"
+
+def _intern_sql(row: str) -> str:
+    """Statements that make sure the dictionaries hold `row`'s values (trigger body)."""
+    match = " AND ".join(f"{c} IS {_lexeme_value(c, row)}" for c in LEXEME_COLS)
+    return f"""
+    INSERT OR IGNORE INTO glosses(gloss) SELECT {row}.gloss WHERE {row}.gloss IS NOT NULL;
+    INSERT OR IGNORE INTO glosses(gloss) SELECT {row}.resolved_gloss WHERE {row}.resolved_gloss IS NOT NULL;
+    INSERT OR IGNORE INTO morphs(morph) SELECT {row}.morph WHERE {row}.morph IS NOT NULL;
+    INSERT INTO lexemes({", ".join(LEXEME_COLS)})
+        SELECT {", ".join(_lexeme_value(c, row) for c in LEXEME_COLS)}
+        WHERE NOT EXISTS (SELECT 1 FROM lexemes WHERE {match});"""
+
+def _lexeme_id_sql(row: str) -> str:
+    match = " AND ".join(f"{c} IS {_lexeme_value(c, row)}" for c in LEXEME_COLS)
+    return f"(SELECT id FROM lexemes WHERE {match} ORDER BY id LIMIT 1)"
+
+VIEW_TRIGGERS = f"""
+CREATE TRIGGER tokens_view_ins INSTEAD OF INSERT ON tokens BEGIN{_intern_sql("new")}
+    INSERT INTO token_rows(id, book_code, chapter, verse, token_index, surface, lexeme_id, morph_id)
+    VALUES (new.id, new.book_code, new.chapter, new.verse, new.token_index, new.surface,
+            {_lexeme_id_sql("new")}, (SELECT id FROM morphs WHERE morph = new.morph));
+END;
+CREATE TRIGGER tokens_view_upd INSTEAD OF UPDATE ON tokens BEGIN{_intern_sql("new")}
+    UPDATE token_rows
+       SET id = new.id, book_code = new.book_code, chapter = new.chapter, verse = new.verse,
+           token_index = new.token_index, surface = new.surface,
+           lexeme_id = {_lexeme_id_sql("new")}, morph_id = (SELECT id FROM morphs WHERE morph = new.morph)
+     WHERE id = old.id;
+END;
+CREATE TRIGGER tokens_view_del INSTEAD OF DELETE ON tokens BEGIN
+    DELETE FROM token_rows WHERE id = old.id;
+END;
+"""
+
+# Search-index dirty tracking (indexes.FTS_TRIGGERS) moved onto the base table. A lexeme
+# change only dirties the verse when strong/lemma/translit/gloss differ, so re-resolution
+# and prune() merges don't.
+_INDEXED = "SELECT strong, lemma, translit, gloss_id FROM lexemes WHERE id ="
+
+FTS_TRIGGERS = f"""
+CREATE TABLE IF NOT EXISTS fts_dirty (
+    book_code TEXT NOT NULL,
+    chapter INTEGER NOT NULL,
+    verse INTEGER NOT NULL,
+    PRIMARY KEY (book_code, chapter, verse)
+) WITHOUT ROWID;
+CREATE TRIGGER IF NOT EXISTS tokens_fts_ins AFTER INSERT ON token_rows BEGIN
+    INSERT OR IGNORE INTO fts_dirty VALUES (new.book_code, new.chapter, new.verse);
+END;
+CREATE TRIGGER IF NOT EXISTS tokens_fts_del AFTER DELETE ON token_rows BEGIN
+    INSERT OR IGNORE INTO fts_dirty VALUES (old.book_code, old.chapter, old.verse);
+END;
+CREATE TRIGGER IF NOT EXISTS tokens_fts_upd AFTER UPDATE OF book_code, chapter, verse, surface, lexeme_id ON token_rows
+WHEN (old.book_code, old.chapter, old.verse, old.surface) IS NOT (new.book_code, new.chapter, new.verse, new.surface)
+  OR ({_INDEXED} old.lexeme_id) IS NOT ({_INDEXED} new.lexeme_id)
+BEGIN
+    INSERT OR IGNORE INTO fts_dirty VALUES (old.book_code, old.chapter, old.verse);
+    INSERT OR IGNORE INTO fts_dirty VALUES (new.book_code, new.chapter, new.verse);
+END;
+"""
+
+# payloads.PAYLOAD_TRIGGERS on the base table; installed when the payloads tables exist.
+PAYLOAD_TRIGGERS = f"""
+CREATE TRIGGER IF NOT EXISTS tokens_payloads_ins AFTER INSERT ON token_rows BEGIN
+    INSERT OR IGNORE INTO payloads_stale VALUES (new.book_code, new.chapter, new.verse), (new.book_code, new.chapter, 0);
+END;
+CREATE TRIGGER IF NOT EXISTS tokens_payloads_del AFTER DELETE ON token_rows BEGIN
+    INSERT OR IGNORE INTO payloads_stale VALUES (old.book_code, old.chapter, old.verse), (old.book_code, old.chapter, 0);
+END;
+CREATE TRIGGER IF NOT EXISTS tokens_payloads_upd
+AFTER UPDATE OF book_code, chapter, verse, token_index, surface, lexeme_id, morph_id ON token_rows
+WHEN (old.book_code, old.chapter, old.verse, old.token_index, old.surface, old.morph_id)
+     IS NOT (new.book_code, new.chapter, new.verse, new.token_index, new.surface, new.morph_id)
+  OR ({_INDEXED} old.lexeme_id) IS NOT ({_INDEXED} new.lexeme_id)
+BEGIN
+    INSERT OR IGNORE INTO payloads_stale VALUES (old.book_code, old.chapter, old.verse), (old.book_code, old.chapter, 0);
+    INSERT OR IGNORE INTO payloads_stale VALUES (new.book_code, new.chapter, new.verse), (new.book_code, new.chapter, 0);
+END;
+"""
+
+def _has_payloads(conn: sqlite3.Connection) -> bool:
+    return bool(conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='payloads_stale'").fetchone())
+
+def _statements(script: str) -> List[str]:
+    """Split a script into statements (trigger bodies included) so it can run inside our
+    own transaction; executescript() would commit first."""
+    out, buf = [], ""
+    for line in script.splitlines(keepends=True):
+        buf += line
+        if sqlite3.complete_statement(buf):
+            out.append(buf.strip())
+            buf = ""
+    return [s for s in out if s.strip(";").strip()]
+
+def _run(conn: sqlite3.Connection, script: str):
+    for stmt in _statements(script):
+        conn.execute(stmt)
+
+def is_compact(conn: sqlite3.Connection) -> bool:
+    row = conn.execute("SELECT type FROM sqlite_master WHERE name='tokens'").fetchone()
+    return bool(row) and row[0] == "view"
+
+def drop_tokens(conn: sqlite3.Connection):
+    """Remove the tokens table, or the view and its tables on a compact database."""
+    if is_compact(conn):
+        conn.execute("DROP VIEW tokens")
+        for table in COMPACT_TABLES:
+            conn.execute(f"DROP TABLE IF EXISTS {table}")
+    else:
+        conn.execute("DROP TABLE IF EXISTS tokens")
+    conn.commit()
+
+class _Dict:
+    """value -> id, in first-seen order (ids from 1); None stays None."""
+    def __init__(self):
+        self.ids: Dict[Any, int] = {}
+
+    def __call__(self, value):
+        if value is None:
+            return None
+        return self.ids.setdefault(value, len(self.ids) + 1)
+
+def compact(conn: sqlite3.Connection, batch_size: int = 50_000) -> Dict[str, int]:
+    """Convert a plain tokens table to the dictionary-encoded layout, in one transaction."""
+    have = [r[1] for r in conn.execute("PRAGMA table_info(tokens)")]
+    unknown = set(have) - set(PLAIN_COLS) - set(RESOLVED_COLS)
+    if unknown:
+        raise RuntimeError(f"tokens has columns compact.py doesn't encode: {sorted(unknown)}")
+    select = ", ".join(c if c in have else f"NULL AS {c}" for c in PLAIN_COLS + RESOLVED_COLS)
+    dropped = [r[0] for r in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type='index' AND tbl_name='tokens' AND sql IS NOT NULL AND name != 'idx_ref'")]
+
+    glosses, morphs, lexemes = _Dict(), _Dict(), _Dict()
+    conn.commit()
+    conn.execute("BEGIN")
+    try:
+        _run(conn, COMPACT_SCHEMA)
+        cur = conn.execute(f"SELECT {select} FROM tokens ORDER BY id")
+        n = 0
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            out = []
+            for (pk, code, ch, vs, idx, surface, lemma, transl, gloss, morph, strong,
+                 r_lemma, r_transl, r_gloss, lex_key, lex_version) in rows:
+                lexeme = (strong, lemma, transl, glosses(gloss), r_lemma, r_transl, glosses(r_gloss), lex_key, lex_version)
+                out.append((pk, code, ch, vs, idx, surface, lexemes(lexeme), morphs(morph)))
+            conn.executemany("INSERT INTO token_rows(id, book_code, chapter, verse, token_index, surface, lexeme_id, morph_id) "
+                             "VALUES (?,?,?,?,?,?,?,?)", out)
+            n += len(out)
+        conn.executemany("INSERT INTO glosses(id, gloss) VALUES (?, ?)", ((i, g) for g, i in glosses.ids.items()))
+        conn.executemany("INSERT INTO morphs(id, morph) VALUES (?, ?)", ((i, m) for m, i in morphs.ids.items()))
+        conn.executemany(f"INSERT INTO lexemes(id, {', '.join(LEXEME_COLS)}) VALUES ({', '.join('?' * (len(LEXEME_COLS) + 1))})",
+                         ((i, *key) for key, i in lexemes.ids.items()))
+        conn.execute("DROP TABLE tokens")  # takes its indexes and triggers with it
+        _run(conn, COMPACT_INDEXES + VIEW_SQL + VIEW_TRIGGERS + FTS_TRIGGERS)
+        if _has_payloads(conn):
+            _run(conn, PAYLOAD_TRIGGERS)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.execute("ANALYZE")
+    conn.commit()
+    return {"tokens": n, "lexemes": len(lexemes.ids), "glosses": len(glosses.ids), "morphs": len(morphs.ids),
+            "dropped_indexes": dropped}
+
+def prune(conn: sqlite3.Connection) -> Dict[str, int]:
+    """Merge duplicate lexemes and delete dictionary rows no token refers to any more."""
+    keys: Dict[tuple, int] = {}
+    remap: List[Tuple[int, int]] = []
+    for pk, *key in conn.execute(f"SELECT id, {', '.join(LEXEME_COLS)} FROM lexemes ORDER BY id"):
+        first = keys.setdefault(tuple(key), pk)
+        if first != pk:
+            remap.append((pk, first))
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS _remap(old INTEGER PRIMARY KEY, new INTEGER NOT NULL)")
+    conn.execute("DELETE FROM temp._remap")
+    conn.executemany("INSERT INTO temp._remap VALUES (?, ?)", remap)
+    if remap:
+        conn.execute("UPDATE token_rows SET lexeme_id = (SELECT new FROM temp._remap WHERE old = lexeme_id) "
+                     "WHERE lexeme_id IN (SELECT old FROM temp._remap)")
+    out = {"merged": len(remap)}
+    out["lexemes"] = conn.execute("DELETE FROM lexemes WHERE id NOT IN (SELECT lexeme_id FROM token_rows)").rowcount
+    out["glosses"] = conn.execute("""DELETE FROM glosses WHERE id NOT IN (SELECT gloss_id FROM lexemes WHERE gloss_id IS NOT NULL)
+                                     AND id NOT IN (SELECT resolved_gloss_id FROM lexemes WHERE resolved_gloss_id IS NOT NULL)""").rowcount
+    out["morphs"] = conn.execute("DELETE FROM morphs WHERE id NOT IN "
+                                 "(SELECT morph_id FROM token_rows WHERE morph_id IS NOT NULL)").rowcount
+    conn.commit()
+    return out
+
+def expand(conn: sqlite3.Connection) -> int:
+    """Back to a plain tokens table (with resolved columns), in one transaction."""
+    cols = ", ".join(PLAIN_COLS + RESOLVED_COLS)
+    table_sql, index_sql = (st for st in _statements(PLAIN_SCHEMA) if st.startswith("CREATE"))
+    conn.commit()
+    conn.execute("BEGIN")
+    try:
+        conn.execute("DROP INDEX idx_ref")  # the name moves back to the plain table
+        conn.execute(table_sql.replace("IF NOT EXISTS tokens", "tokens_plain"))
+        for name in RESOLVED_COLS:
+            conn.execute(f"ALTER TABLE tokens_plain ADD COLUMN {name} TEXT")
+        n = conn.execute(f"INSERT INTO tokens_plain({cols}) SELECT {cols} FROM tokens ORDER BY id").rowcount
+        conn.execute("DROP VIEW tokens")  # and its INSTEAD OF triggers
+        for table in COMPACT_TABLES:
+            conn.execute(f"DROP TABLE {table}")
+        conn.execute("ALTER TABLE tokens_plain RENAME TO tokens")
+        conn.execute(index_sql)
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE name='fts_dirty'").fetchone():
+            from indexes import FTS_TRIGGERS as PLAIN_FTS_TRIGGERS
+            _run(conn, PLAIN_FTS_TRIGGERS)
+        if _has_payloads(conn):
+            from payloads import PAYLOAD_TRIGGERS as PLAIN_PAYLOAD_TRIGGERS
+            _run(conn, PLAIN_PAYLOAD_TRIGGERS)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.execute("ANALYZE")
+    conn.commit()
+    return n
+
+def materialize_lexemes(conn: sqlite3.Connection, lex: Lexicon, full: bool = False) -> Tuple[int, int]:
+    """
+    materialize_resolved.materialize() for a compact database: resolve each stale lexeme
+    once. Returns (tokens covered, lexemes resolved).
+    """
+    where = "" if full else "WHERE l.lex_version IS NOT ?"
+    rows = conn.execute(f"""
+        SELECT l.id, COALESCE(l.strong,''), COALESCE(l.lemma,''), COALESCE(l.translit,''), COALESCE(g.gloss,'')
+        FROM lexemes l LEFT JOIN glosses g ON g.id = l.gloss_id
+        {where}
+    """, () if full else (lex.version,)).fetchall()
+    if not rows:
+        return 0, 0
+    updates = []
+    for pk, strong, lemma, transl, gloss in rows:
+        r_lemma, r_transl, r_gloss, key = lex.resolve_fields(strong.strip(), lemma.strip(), transl.strip(), gloss.strip())
+        updates.append((r_lemma, r_transl, r_gloss, key, lex.version, pk))
+    conn.executemany("INSERT OR IGNORE INTO glosses(gloss) VALUES (?)", {(u[2],) for u in updates})
+    conn.executemany("""
+        UPDATE lexemes
+           SET resolved_lemma = ?, resolved_translit = ?,
+               resolved_gloss_id = (SELECT id FROM glosses WHERE gloss = ?), lex_key = ?, lex_version = ?
+         WHERE id = ?
+    """, updates)
+    conn.commit()
+    per_lexeme = Counter(dict(conn.execute("SELECT lexeme_id, COUNT(*) FROM token_rows GROUP BY lexeme_id").fetchall()))
+    return sum(per_lexeme[u[-1]] for u in updates), len(updates)
+
+# ---------- Reporting ----------
+def storage_bytes(conn: sqlite3.Connection) -> int:
+    """Bytes of the token tables and their indexes (dbstat when compiled in, else live pages)."""
+    names = ("tokens", "idx_ref", *COMPACT_TABLES, "idx_lexemes_key",
+             "sqlite_autoindex_glosses_1", "sqlite_autoindex_morphs_1")
+    try:
+        return conn.execute(f"SELECT COALESCE(SUM(pgsize), 0) FROM dbstat WHERE name IN ({','.join('?' * len(names))})",
+                            names).fetchone()[0]
+    except sqlite3.OperationalError:
+        pages, free, size = (conn.execute(f"PRAGMA {p}").fetchone()[0] for p in ("page_count", "freelist_count", "page_size"))
+        return (pages - free) * size
+
+def chapter_latency(conn: sqlite3.Connection, samples: int = 200, repeat: int = 3) -> float:
+    """Best-of-`repeat` mean ms to read a whole chapter the way the API does."""
+    chapters = conn.execute("SELECT DISTINCT book_code, chapter FROM tokens").fetchall()
+    picks = random.Random(1).sample(chapters, min(samples, len(chapters)))
+    if has_packed_ids(conn):
+        sql = "SELECT * FROM tokens WHERE id BETWEEN ? AND ? ORDER BY id"
+        params = [(pack_ref(code, ch, 0), pack_ref(code, ch, 999, 999)) for code, ch in picks]
+    else:
+        sql = "SELECT * FROM tokens WHERE book_code=? AND chapter=? ORDER BY verse, token_index"
+        params = picks
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for p in params:
+            conn.execute(sql, p).fetchall()
+        best = min(best, time.perf_counter() - t0)
+    return best / max(1, len(picks)) * 1000
+
+def main():
+    ap = argparse.ArgumentParser(description="Dictionary-encode the tokens table (or expand it back).")
+    ap.add_argument("--db", default=DB_PATH, help=f"SQLite path (default: {DB_PATH} or $INTERLINEAR_DB)")
+    ap.add_argument("--expand", action="store_true", help="Convert back to a plain tokens table.")
+    ap.add_argument("--vacuum", action="store_true", help="VACUUM afterwards so the file shrinks.")
+    ap.add_argument("--samples", type=int, default=200, help="Chapters timed for the latency report.")
+    args = ap.parse_args()
+
+    conn = sqlite3.connect(args.db, isolation_level=None)
+    try:
+        before = storage_bytes(conn), chapter_latency(conn, args.samples)
+        t0 = time.perf_counter()
+        if args.expand:
+            if not is_compact(conn):
+                print("tokens is already a plain table; nothing to do.")
+                return
+            print(f"expanded {expand(conn):,} tokens")
+        elif is_compact(conn):
+            print("pruned: " + ", ".join(f"{k} {v:,}" for k, v in prune(conn).items()))
+        else:
+            st = compact(conn)
+            print(f"encoded {st['tokens']:,} tokens: {st['lexemes']:,} lexemes, {st['glosses']:,} glosses, "
+                  f"{st['morphs']:,} morphs")
+            if st["dropped_indexes"]:
+                print(f"dropped extra indexes on tokens: {', '.join(st['dropped_indexes'])}")
+        print(f"done in {time.perf_counter() - t0:.1f}s")
+        if args.vacuum:
+            conn.execute("VACUUM")
+        after = storage_bytes(conn), chapter_latency(conn, args.samples)
+        size = os.path.getsize(args.db)
+    finally:
+        conn.close()
+    print(f"{'':14} {'before':>10} {'after':>10}")
+    print(f"{'token storage':14} {before[0] / 1e6:8.1f}MB {after[0] / 1e6:8.1f}MB")
+    print(f"{'chapter read':14} {before[1]:8.3f}ms {after[1]:8.3f}ms")
+    print(f"db file: {size / 1e6:.1f} MB" + ("" if args.vacuum else " (run with --vacuum to release freed pages)"))
+
+if __name__ == "__main__":
+    main()
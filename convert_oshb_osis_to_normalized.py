@@ -2,10 +2,19 @@
 # Converts OSHB OSIS (wlc/*.xml) into your normalized CSV schema.
 # Input: folder containing OSIS files (e.g., data/oshb/morphhb-master/wlc)
 # Output: data/interlinear_ot.normalized.csv
+#
+# Each book is streamed with iterparse (verses are written as they close and then cleared),
+# books run in a process pool, and the per-book parts are concatenated in canonical order.
 
-import os, csv, sys
+import os, csv, sys, time, shutil, argparse, tempfile
 import xml.etree.ElementTree as ET
-from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Tuple
+
+try:
+    import resource  # peak RSS report; not available on Windows
+except ImportError:
+    resource = None
 
 OUT_PATH = os.path.join("data", "interlinear_ot.normalized.csv")
 
@@ -23,116 +32,147 @@ OSIS_TO_CODE = {
 
 FIELDS = ["book_code","chapter","verse","token_index","surface","lemma","translit","gloss","morph","strong"]
 
-def debug(msg): 
+# Canonical position of each book (OSIS_TO_CODE is in canonical order).
+OSIS_ORDER = {osis: i for i, osis in enumerate(OSIS_TO_CODE)}
+CODE_ORDER = {code: i for i, code in enumerate(OSIS_TO_CODE.values())}
+
+def debug(msg):
     print(msg, file=sys.stderr)
 
-def parse_osis_file(path, sink):
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+def verse_key(osis_id: str):
+    """'Gen.1.1' -> ('GEN', 1, 1); None for non-OT or malformed IDs."""
+    parts = osis_id.split(".")
+    if len(parts) != 3:
+        return None
+    book_code = OSIS_TO_CODE.get(parts[0])
+    if not book_code:
+        return None
+    try:
+        return book_code, int(parts[1]), int(parts[2])
+    except ValueError:
+        return None
+
+def iter_osis_verses(path) -> Iterator[Tuple[Tuple[str, int, int], List[Tuple[str, str]]]]:
     """
-    Parse a single OSIS XML, accumulate tokens into sink[(code, chap, verse)] = list[...] 
-    We look for:
+    Stream a single OSIS XML, yielding ((code, chap, verse), [(surface, strong, morph), ...])
+    as each verse element closes. We look for:
       - verse elements with @osisID like 'Gen.1.1'
-      - word elements <w> with attributes lemma="H7225" morph="Ncfsa" and text = surface
+      - word elements <w> (any depth inside the verse) with attributes lemma="H7225"
+        morph="HNcfsa" and text = surface
+    Closed verses (and chapters) are cleared so memory stays flat regardless of book size.
     """
-    tree = ET.parse(path)
-    root = tree.getroot()
-
-    # OSIS uses 'osis' namespace sometimes; we’ll support both
-    ns = {"osis": "http://www.bibletechnologies.net/2003/OSIS/namespace"}
-
-    # Find every verse element regardless of prefix
-    verses = root.findall(".//{*}verse")
-    for v in verses:
-        osis_id = v.attrib.get("osisID") or v.attrib.get("{http://www.bibletechnologies.net/2003/OSIS/namespace}osisID")
-        if not osis_id:
-            continue
-        # Examples: Gen.1.1  or Ps.119.1
-        parts = osis_id.split(".")
-        if len(parts) != 3:
-            continue
-        osis_book, chap_str, verse_str = parts
-        book_code = OSIS_TO_CODE.get(osis_book)
-        if not book_code:
-            # skip non-OT or unexpected IDs
-            continue
-        try:
-            chap = int(chap_str)
-            verse = int(verse_str)
-        except:
+    key = None
+    words: List[Tuple[str, str, str]] = []
+    for event, el in ET.iterparse(path, events=("start", "end")):
+        tag = _local(el.tag)
+        if event == "start":
+            if tag == "verse":
+                # OSIS uses the 'osis' namespace sometimes; support both attribute forms
+                osis_id = el.attrib.get("osisID") or el.attrib.get("{http://www.bibletechnologies.net/2003/OSIS/namespace}osisID")
+                key = verse_key(osis_id) if osis_id else None
+                words = []
             continue
-
-        # collect words inside this verse
-        key = (book_code, chap, verse)
-        # Iterate all descendant <w> nodes under verse
-        # Some OSIS uses <w> with namespaces, handle both
-        words = v.findall(".//{*}w")
-        # token_index per verse
-        for w in words:
-            surface = (w.text or "").strip()
-            if not surface:
-                continue
-            lemma_attr = (w.attrib.get("lemma") or "").strip()  # often "H1254"
-            morph_attr = (w.attrib.get("morph") or "").strip()
-
-            # OSHB puts Strong's in lemma attr (e.g., "H7225"); keep that in strong column.
-            strong = lemma_attr if lemma_attr else ""
-
-            sink[key].append({
-                "surface": surface,
-                "lemma": "",          # OSHB lemma attr is a Strong's key; we store that in 'strong'
-                "translit": "",       # not provided by OSIS; can be joined later
-                "gloss": "",          # not provided by OSIS; can be joined later
-                "morph": morph_attr,
-                "strong": strong
-            })
-
-def main():
-    # Find the extracted folder containing wlc/*.xml
-    base = os.path.join("data","oshb")
+        if tag == "w":
+            if key is not None:
+                surface = (el.text or "").strip()
+                if surface:
+                    # OSHB puts Strong's in the lemma attr (e.g., "H7225"); keep that in strong column.
+                    words.append((surface, (el.attrib.get("lemma") or "").strip(),
+                                  (el.attrib.get("morph") or "").strip()))
+        elif tag == "verse":
+            if key is not None:
+                yield key, words
+            key, words = None, []
+            el.clear()
+        elif tag == "chapter":
+            el.clear()
+
+def convert_file(path: str, part_path: str) -> Dict[str, object]:
+    """Write one OSIS file's rows (no header) to part_path; runs in a pool worker."""
+    t0 = time.perf_counter()
+    rows = verses = 0
+    first_book = None
+    next_index: Dict[Tuple[str, int, int], int] = {}  # a repeated verse ID continues its numbering
+    with open(part_path, "w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        for key, words in iter_osis_verses(path):
+            code, chap, verse = key
+            first_book = first_book or code
+            start = next_index.get(key, 1)
+            # lemma/translit/gloss are not in OSIS (OSHB's lemma attr is the Strong's key); joined later
+            w.writerows((code, chap, verse, idx, surface, "", "", "", morph, strong)
+                        for idx, (surface, strong, morph) in enumerate(words, start=start))
+            next_index[key] = start + len(words)
+            rows += len(words)
+            verses += 1
+    return {"book": first_book, "verses": verses, "rows": rows,
+            "seconds": time.perf_counter() - t0, "peak_rss_mb": peak_rss_mb()}
+
+def peak_rss_mb(children: bool = False) -> float:
+    if resource is None:
+        return 0.0
+    kb = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+    return kb / 1024 if sys.platform != "darwin" else kb / 1024 / 1024  # macOS reports bytes
+
+def find_wlc_dir(base: str) -> str:
     # Try common subpaths after unzipping the GitHub archive
-    candidates = []
     for root, dirs, files in os.walk(base):
         if os.path.basename(root).lower() == "wlc":
             if any(f.lower().endswith(".xml") for f in files):
-                candidates.append(root)
-    if not candidates:
-        sys.exit("❌ Could not find a 'wlc' folder with OSIS XML under data/oshb. Check your unzip location.")
+                return root
+    sys.exit(f"❌ Could not find a 'wlc' folder with OSIS XML under {base}. Check your unzip location.")
 
-    wlc_dir = candidates[0]
-    print(f"🔎 Using OSIS from: {wlc_dir}")
+def file_order(fname: str):
+    # WLC files are named after the OSIS book (Gen.xml); unknown names sort last, by name.
+    return OSIS_ORDER.get(os.path.splitext(fname)[0], len(OSIS_ORDER)), fname
 
-    sink = defaultdict(list)
-    files = [f for f in os.listdir(wlc_dir) if f.lower().endswith(".xml")]
-    files.sort()
-    total_files = len(files)
-    for i, fname in enumerate(files, 1):
-        path = os.path.join(wlc_dir, fname)
-        parse_osis_file(path, sink)
-        if i % 5 == 0 or i == total_files:
-            print(f"  … parsed {i}/{total_files} files", file=sys.stderr)
-
-    # Write normalized CSV
-    out_path = OUT_PATH
-    os.makedirs(os.path.dirname(out_path), exist_ok=True)
-    total_rows = 0
-    with open(out_path, "w", encoding="utf-8", newline="") as f:
-        w = csv.DictWriter(f, fieldnames=FIELDS)
-        w.writeheader()
-        for (code, chap, verse), toks in sorted(sink.items()):
-            for idx, t in enumerate(toks, start=1):
-                w.writerow({
-                    "book_code": code,
-                    "chapter": chap,
-                    "verse": verse,
-                    "token_index": idx,
-                    "surface": t["surface"],
-                    "lemma": t["lemma"],
-                    "translit": t["translit"],
-                    "gloss": t["gloss"],
-                    "morph": t["morph"],
-                    "strong": t["strong"]
-                })
-                total_rows += 1
+def main():
+    ap = argparse.ArgumentParser(description="Convert OSHB OSIS (wlc/*.xml) into the normalized tokens CSV.")
+    ap.add_argument("--wlc-dir", help="Folder with the OSIS XML files (default: first 'wlc' folder under data/oshb).")
+    ap.add_argument("--out", default=OUT_PATH)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Books parsed in parallel.")
+    args = ap.parse_args()
 
+    wlc_dir = args.wlc_dir or find_wlc_dir(os.path.join("data", "oshb"))
+    print(f"🔎 Using OSIS from: {wlc_dir}")
+    files = sorted((f for f in os.listdir(wlc_dir) if f.lower().endswith(".xml")), key=file_order)
+    if not files:
+        sys.exit(f"❌ No OSIS XML files in {wlc_dir}.")
+
+    out_path = args.out
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    t0 = time.perf_counter()
+    results: Dict[str, Dict[str, object]] = {}
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(out_path) or ".") as parts_dir:
+        parts = {f: os.path.join(parts_dir, f + ".csv") for f in files}
+        with ProcessPoolExecutor(max_workers=max(1, args.workers)) as pool:
+            futures = {pool.submit(convert_file, os.path.join(wlc_dir, f), parts[f]): f for f in files}
+            for i, fut in enumerate(as_completed(futures), 1):
+                fname = futures[fut]
+                r = results[fname] = fut.result()
+                debug(f"  … {i}/{len(files)} {r['book'] or fname}: {r['verses']:,} verses, {r['rows']:,} rows "
+                      f"in {r['seconds']:.2f}s")
+
+        # Merge in canonical order (a book's verses are already in document order).
+        merged = sorted(files, key=lambda f: (CODE_ORDER.get(results[f]["book"], len(CODE_ORDER)), file_order(f)))
+        tmp_out = out_path + ".tmp"
+        with open(tmp_out, "w", encoding="utf-8", newline="") as f:
+            csv.writer(f).writerow(FIELDS)
+            for fname in merged:
+                with open(parts[fname], encoding="utf-8", newline="") as part:
+                    shutil.copyfileobj(part, f)
+        os.replace(tmp_out, out_path)
+
+    total_rows = sum(r["rows"] for r in results.values())
+    elapsed = time.perf_counter() - t0
+    busy = sum(r["seconds"] for r in results.values())
+    print(f"⏱️  {len(files)} files in {elapsed:.1f}s ({total_rows / elapsed:,.0f} rows/s; "
+          f"{busy:.1f}s parse time, workers: {min(max(1, args.workers), len(files))})")
+    if resource is not None:
+        print(f"🧠 Peak RSS: main {peak_rss_mb():.0f} MB, largest worker {peak_rss_mb(children=True):.0f} MB")
     print(f"✅ Wrote normalized OT → {out_path} (rows: {total_rows:,})")
 
 if __name__ == "__main__":
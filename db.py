@@ -1,13 +1,23 @@
 
 import sqlite3
 import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List
 
 DB_PATH = os.environ.get("INTERLINEAR_DB", "interlinear.sqlite3")
 
+# tokens.id is books.pack_ref(book_code, chapter, verse, token_index), so the table B-tree is
+# clustered by reference: a verse, chapter or passage is one contiguous id range, read in
+# order without an index probe per row or a sort. PRAGMA user_version records the layout;
+# tools/migrate_packed_ids.py converts databases built with the old AUTOINCREMENT ids.
+PACKED_IDS_VERSION = 1
+
 SCHEMA = """
 PRAGMA journal_mode=WAL;
 CREATE TABLE IF NOT EXISTS tokens (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    id INTEGER PRIMARY KEY,          -- books.pack_ref(book_code, chapter, verse, token_index)
     book_code TEXT NOT NULL,
     chapter INTEGER NOT NULL,
     verse INTEGER NOT NULL,
@@ -22,11 +32,103 @@ CREATE TABLE IF NOT EXISTS tokens (
 CREATE INDEX IF NOT EXISTS idx_ref ON tokens(book_code, chapter, verse);
 """
 
+def readonly_uri(path: str) -> str:
+    return Path(path).resolve().as_uri() + "?mode=ro"
+
+class ReadPool:
+    """
+    One long-lived, read-only connection per worker thread.
+
+    Connections open via a mode=ro URI with query_only on, so a stray write fails
+    loudly instead of taking a lock. Each keeps its own page cache and statement
+    cache (sqlite3 reuses prepared statements for identical SQL text); mmap lets
+    all of them share the OS page cache for the DB file.
+    """
+
+    def __init__(self, path: str,
+                 cache_size_kib: int = 16384,
+                 mmap_size: int = 256 * 1024 * 1024,
+                 cached_statements: int = 256):
+        self.path = path
+        self.cache_size_kib = cache_size_kib
+        self.mmap_size = mmap_size
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stats: Dict[int, Dict[str, Any]] = {}  # id(conn) -> counters
+        self._generation = 0
+
+    def open(self) -> sqlite3.Connection:
+        """A fresh connection with the pool's settings, not bound to any thread."""
+        conn = sqlite3.connect(readonly_uri(self.path), uri=True,
+                               check_same_thread=False,
+                               cached_statements=self.cached_statements)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA query_only=ON")
+        conn.execute(f"PRAGMA cache_size=-{int(self.cache_size_kib)}")
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        return conn
+
+    def connection(self) -> sqlite3.Connection:
+        """The calling thread's connection, opened on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.generation != self._generation:
+            self._discard(conn)
+            conn = None
+        if conn is None:
+            conn = self.open()
+            self._local.conn = conn
+            self._local.generation = self._generation
+        with self._lock:
+            st = self._stats.setdefault(id(conn), {
+                "thread": threading.current_thread().name,
+                "opened_at": time.time(),
+                "uses": 0,
+            })
+            st["uses"] += 1
+        return conn
+
+    def _discard(self, conn: sqlite3.Connection):
+        with self._lock:
+            self._stats.pop(id(conn), None)
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        self._local.conn = None
+
+    def reset(self):
+        """Make every thread reopen its connection on next use (e.g. after the DB file changed)."""
+        with self._lock:
+            self._generation += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            conns: List[Dict[str, Any]] = [dict(v) for v in self._stats.values()]
+        return {
+            "size": len(conns),
+            "readonly": True,
+            "cache_size_kib": self.cache_size_kib,
+            "mmap_size": self.mmap_size,
+            "cached_statements": self.cached_statements,
+            "connections": conns,
+        }
+
+def has_packed_ids(conn: sqlite3.Connection) -> bool:
+    return conn.execute("PRAGMA user_version").fetchone()[0] >= PACKED_IDS_VERSION
+
+def create_tokens(conn: sqlite3.Connection):
+    """Create the tokens table if missing; a table created here uses packed ids from the start."""
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='tokens'").fetchone()
+    conn.executescript(SCHEMA)
+    if not exists:
+        conn.execute(f"PRAGMA user_version={PACKED_IDS_VERSION}")
+    conn.commit()
+
 def init_db():
     conn = sqlite3.connect(DB_PATH)
     try:
-        conn.executescript(SCHEMA)
-        conn.commit()
+        create_tokens(conn)
     finally:
         conn.close()
 
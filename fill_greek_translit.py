@@ -1,7 +1,9 @@
 # fill_greek_translit.py
 # Auto-fills 'translit' column for data/greek_lexicon.csv where empty, preserving any existing values.
 # Keeps 'gloss' unchanged (you can fill glosses gradually).
-import csv, os, unicodedata
+import csv, os
+
+from folding import strip_diacritics
 
 BASE_DIR = os.path.dirname(__file__)
 DATA_DIR = os.path.join(BASE_DIR, "data")
@@ -18,11 +20,6 @@ MAP = {
     # rough breathing marks (ῥ etc.) handled by base letter; you can refine later
 }
 
-def strip_diacritics(s: str) -> str:
-    # Normalize and remove combining marks; keep base Greek letters for mapping
-    nfkd = unicodedata.normalize("NFKD", s)
-    return "".join(ch for ch in nfkd if not unicodedata.combining(ch))
-
 def transliterate(lemma: str) -> str:
     # Remove diacritics, then map char-by-char
     base = strip_diacritics(lemma)
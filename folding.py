@@ -0,0 +1,22 @@
+# folding.py — search keys that ignore vowel points, cantillation, accents and breathings.
+#
+# Users type unpointed Hebrew and unaccented Greek; the corpus has neither. fold() is applied
+# once at build time (indexes.py stores the folded forms) and to the query, never to the
+# corpus at request time.
+#
+#   בְּ/רֵאשִׁ֖ית -> בראשית     λόγος -> λογοσ     Ἀβραάμ -> αβρααμ     ray-sheeth' -> ray-sheeth'
+
+import unicodedata
+
+# OSHB morpheme separator, maqaf, paseq, sof pasuq: not part of the word a user types.
+_DROP = str.maketrans("", "", "/־׀׃")
+
+def strip_diacritics(s: str) -> str:
+    # NFKD splits precomposed letters (and Hebrew presentation forms like U+FB31) into
+    # base letter + combining marks; drop the marks.
+    nfkd = unicodedata.normalize("NFKD", s)
+    return "".join(ch for ch in nfkd if not unicodedata.combining(ch))
+
+def fold(s: str) -> str:
+    """Lookup key: no marks, no morpheme separators, case-folded (Greek final sigma -> σ)."""
+    return strip_diacritics((s or "").translate(_DROP)).casefold().strip()
@@ -0,0 +1,315 @@
+# indexes.py
+# Derived lookup tables built from `tokens` at seed time, so read endpoints never have to
+# scan or aggregate the token table.
+#
+#   structure(book_code, chapter, verse, token_count) — navigation: books, chapter and verse counts
+#   token_strongs(lang, num, ref, token_id, morpheme)  — normalized Strong's ids, one row per morpheme
+#   strong_book_counts(lang, num, book_code, occurrences)
+#   verse_fts (FTS5, rowid = packed verse ref)          — surface/lemma/translit/gloss text per verse
+#   fts_dirty                                           — verses whose tokens changed since the last FTS sync
+#   folded_forms(field, folded, form, occurrences, strong, first_ref) — accent/point-insensitive lookup keys
+#   token_morphs(ref, token_id, morpheme, lang, pos, type, stem, tense, person, gender, number, state)
+#
+#   python indexes.py [--db PATH] [--only structure strongs fts folded morph] [--sync]
+
+import os, sqlite3, argparse, time, unicodedata
+from collections import Counter
+from typing import Callable, Dict, List, Tuple
+
+from books import pack_ref, testament
+from folding import fold
+from morph import parse_morph
+from lexicon import Lexicon
+from strongs import strong_ids
+
+BASE_DIR = os.path.dirname(__file__)
+DB_PATH = os.environ.get("INTERLINEAR_DB", os.path.join(BASE_DIR, "interlinear.sqlite3"))
+
+STRUCTURE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS structure (
+    book_code TEXT NOT NULL,
+    chapter INTEGER NOT NULL,
+    verse INTEGER NOT NULL,
+    token_count INTEGER NOT NULL,
+    PRIMARY KEY (book_code, chapter, verse)
+) WITHOUT ROWID;
+"""
+
+def build_structure(conn: sqlite3.Connection) -> int:
+    conn.executescript(STRUCTURE_SCHEMA)
+    conn.execute("DELETE FROM structure")
+    conn.execute("""
+        INSERT INTO structure(book_code, chapter, verse, token_count)
+        SELECT book_code, chapter, verse, COUNT(*)
+        FROM tokens
+        GROUP BY book_code, chapter, verse
+    """)
+    n = conn.execute("SELECT COUNT(*) FROM structure").fetchone()[0]
+    conn.commit()
+    return n
+
+STRONG_INDEX_SCHEMA = """
+DROP TABLE IF EXISTS token_strongs;
+CREATE TABLE token_strongs (
+    lang TEXT NOT NULL,          -- 'H' | 'G'
+    num INTEGER NOT NULL,        -- 7225
+    ref INTEGER NOT NULL,        -- books.pack_ref(book, chapter, verse, token_index)
+    token_id INTEGER NOT NULL,   -- tokens.id
+    morpheme INTEGER NOT NULL,   -- position within the raw strong value ("b/7225" -> 1)
+    PRIMARY KEY (lang, num, ref, token_id, morpheme)
+) WITHOUT ROWID;
+DROP TABLE IF EXISTS strong_book_counts;
+CREATE TABLE strong_book_counts (
+    lang TEXT NOT NULL,
+    num INTEGER NOT NULL,
+    book_code TEXT NOT NULL,
+    occurrences INTEGER NOT NULL,
+    PRIMARY KEY (lang, num, book_code)
+) WITHOUT ROWID;
+"""
+
+def iter_token_strongs(rows):
+    """(lang, num, ref, token_id, morpheme) for (id, book_code, chapter, verse, token_index, strong) rows."""
+    for pk, code, ch, vs, idx, strong in rows:
+        if not strong:
+            continue
+        default_lang = "H" if testament(code) == "OT" else "G"
+        ref = pack_ref(code, ch, vs, idx)
+        for morpheme, lang, num in strong_ids(strong, default_lang):
+            yield lang, num, ref, pk, morpheme
+
+def build_strong_index(conn: sqlite3.Connection) -> int:
+    conn.executescript(STRONG_INDEX_SCHEMA)
+    cur = conn.execute("SELECT id, book_code, chapter, verse, token_index, strong FROM tokens")
+    # Materialize first: we're about to write on the same connection.
+    rows = sorted(iter_token_strongs(cur))  # primary-key order makes the inserts append-only
+    conn.executemany("INSERT INTO token_strongs(lang, num, ref, token_id, morpheme) VALUES (?,?,?,?,?)", rows)
+    conn.execute("""
+        INSERT INTO strong_book_counts(lang, num, book_code, occurrences)
+        SELECT ts.lang, ts.num, t.book_code, COUNT(*)
+        FROM token_strongs ts JOIN tokens t ON t.id = ts.token_id
+        GROUP BY ts.lang, ts.num, t.book_code
+    """)
+    conn.commit()
+    return len(rows)
+
+# Hebrew points and cantillation are combining marks, which unicode61 would otherwise treat
+# as separators (splitting every pointed word into fragments). Maqaf, paseq and sof pasuq
+# stay separators.
+_HEBREW_MARKS = "".join(chr(c) for c in [*range(0x0591, 0x05BE), 0x05BF, 0x05C1, 0x05C2, 0x05C4, 0x05C5, 0x05C7])
+
+FTS_SCHEMA = f"""
+DROP TABLE IF EXISTS verse_fts;
+CREATE VIRTUAL TABLE verse_fts USING fts5(
+    surface, lemma, translit, gloss,
+    tokenize = "unicode61 tokenchars '{_HEBREW_MARKS}'"
+);
+CREATE TABLE IF NOT EXISTS fts_dirty (
+    book_code TEXT NOT NULL,
+    chapter INTEGER NOT NULL,
+    verse INTEGER NOT NULL,
+    PRIMARY KEY (book_code, chapter, verse)
+) WITHOUT ROWID;
+"""
+
+# On a dictionary-encoded database (compact.py) tokens is a view and these names already
+# exist as triggers on token_rows, so IF NOT EXISTS leaves those in place.
+FTS_TRIGGERS = """
+CREATE TRIGGER IF NOT EXISTS tokens_fts_ins AFTER INSERT ON tokens BEGIN
+    INSERT OR IGNORE INTO fts_dirty VALUES (new.book_code, new.chapter, new.verse);
+END;
+CREATE TRIGGER IF NOT EXISTS tokens_fts_del AFTER DELETE ON tokens BEGIN
+    INSERT OR IGNORE INTO fts_dirty VALUES (old.book_code, old.chapter, old.verse);
+END;
+CREATE TRIGGER IF NOT EXISTS tokens_fts_upd AFTER UPDATE OF book_code, chapter, verse, surface, lemma, translit, gloss, strong ON tokens BEGIN
+    INSERT OR IGNORE INTO fts_dirty VALUES (old.book_code, old.chapter, old.verse);
+    INSERT OR IGNORE INTO fts_dirty VALUES (new.book_code, new.chapter, new.verse);
+END;
+"""
+
+FTS_SOURCE_SQL = """
+    SELECT book_code, chapter, verse, surface, strong, lemma, translit, gloss
+    FROM tokens
+    {where}
+    ORDER BY book_code, chapter, verse, token_index
+"""
+
+def _doc(words: List[str]) -> str:
+    # NFC: the sources mix presentation forms (U+FB31 "bet with dagesh") with base letter +
+    # marks; app.fts_query() normalizes queries the same way.
+    return unicodedata.normalize("NFC", " ".join(words))
+
+def resolver(lex: Lexicon) -> Callable[..., Tuple[str, str, str, str]]:
+    """lex.resolve_fields memoized on (strong, lemma, translit, gloss) for bulk passes."""
+    memo: Dict[Tuple[str, str, str, str], Tuple[str, str, str, str]] = {}
+    def resolve(strong, lemma, transl, gloss):
+        k = (strong or "", lemma or "", transl or "", gloss or "")
+        res = memo.get(k)
+        if res is None:
+            res = memo[k] = lex.resolve_fields(*k)
+        return res
+    return resolve
+
+def iter_verse_docs(rows, lex: Lexicon):
+    """(rowid, surface, lemma, translit, gloss) per verse from rows ordered by verse then token."""
+    resolve = resolver(lex)
+    key = None
+    cols: Tuple[List[str], List[str], List[str], List[str]] = ([], [], [], [])
+    for code, ch, vs, surface, strong, lemma, transl, gloss in rows:
+        if (code, ch, vs) != key:
+            if key is not None:
+                yield (pack_ref(*key), *(_doc(c) for c in cols))
+            key, cols = (code, ch, vs), ([], [], [], [])
+        res = resolve(strong, lemma, transl, gloss)
+        cols[0].append(surface or "")
+        cols[1].append(res[0])
+        cols[2].append(res[1])
+        cols[3].append(res[2])
+    if key is not None:
+        yield (pack_ref(*key), *(_doc(c) for c in cols))
+
+def _load_lexicon() -> Lexicon:
+    lex = Lexicon()
+    lex.load()
+    return lex
+
+def build_fts(conn: sqlite3.Connection) -> int:
+    conn.executescript(FTS_SCHEMA + FTS_TRIGGERS)
+    docs = list(iter_verse_docs(conn.execute(FTS_SOURCE_SQL.format(where="")), _load_lexicon()))
+    conn.executemany("INSERT INTO verse_fts(rowid, surface, lemma, translit, gloss) VALUES (?,?,?,?,?)", docs)
+    conn.execute("DELETE FROM fts_dirty")
+    conn.execute("INSERT INTO verse_fts(verse_fts) VALUES ('optimize')")
+    conn.commit()
+    return len(docs)
+
+def sync_fts(conn: sqlite3.Connection, lex: Lexicon = None) -> int:
+    """Re-index only the verses the tokens triggers marked dirty. Returns verses refreshed."""
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE name='fts_dirty'").fetchone():
+        return 0
+    dirty = conn.execute("SELECT book_code, chapter, verse FROM fts_dirty").fetchall()
+    if not dirty:
+        return 0
+    lex = lex or _load_lexicon()
+    for code, ch, vs in dirty:
+        conn.execute("DELETE FROM verse_fts WHERE rowid = ?", (pack_ref(code, ch, vs),))
+        rows = conn.execute(FTS_SOURCE_SQL.format(where="WHERE book_code=? AND chapter=? AND verse=?"),
+                            (code, ch, vs)).fetchall()
+        conn.executemany("INSERT INTO verse_fts(rowid, surface, lemma, translit, gloss) VALUES (?,?,?,?,?)",
+                         list(iter_verse_docs(rows, lex)))
+    conn.execute("DELETE FROM fts_dirty")
+    conn.commit()
+    return len(dirty)
+
+FOLDED_SCHEMA = """
+DROP TABLE IF EXISTS folded_forms;
+CREATE TABLE folded_forms (
+    field TEXT NOT NULL,          -- 'surface' | 'lemma' (lexicon-resolved)
+    folded TEXT NOT NULL,         -- folding.fold(form)
+    form TEXT NOT NULL,           -- as written in the corpus
+    occurrences INTEGER NOT NULL,
+    strong TEXT NOT NULL,         -- most frequent normalized Strong's id for this form ('' if none)
+    first_ref INTEGER NOT NULL,   -- books.pack_ref of the first occurrence
+    PRIMARY KEY (field, folded, form)
+) WITHOUT ROWID;
+"""
+
+def build_folded_forms(conn: sqlite3.Connection) -> int:
+    """One row per distinct surface / lemma spelling, keyed by its folded form."""
+    conn.executescript(FOLDED_SCHEMA)
+    resolve = resolver(_load_lexicon())
+    counts: Counter = Counter()
+    strongs: Dict[Tuple[str, str], Counter] = {}
+    first: Dict[Tuple[str, str], int] = {}
+    folded: Dict[str, str] = {}
+    cur = conn.execute("SELECT book_code, chapter, verse, token_index, surface, strong, lemma, translit, gloss FROM tokens")
+    for code, ch, vs, idx, surface, strong, lemma, transl, gloss in cur:
+        ref = pack_ref(code, ch, vs, idx)
+        ids = strong_ids(strong, "H" if testament(code) == "OT" else "G")
+        sid = f"{ids[-1][1]}{ids[-1][2]}" if ids else ""
+        for key in (("surface", (surface or "").strip()), ("lemma", resolve(strong, lemma, transl, gloss)[0].strip())):
+            if not key[1]:
+                continue
+            counts[key] += 1
+            strongs.setdefault(key, Counter())[sid] += 1
+            if ref < first.get(key, ref + 1):
+                first[key] = ref
+            if key[1] not in folded:
+                folded[key[1]] = fold(key[1])
+    rows = sorted((field, folded[form], form, n, strongs[(field, form)].most_common(1)[0][0], first[(field, form)])
+                  for (field, form), n in counts.items() if folded[form])
+    conn.executemany("INSERT INTO folded_forms(field, folded, form, occurrences, strong, first_ref) VALUES (?,?,?,?,?,?)", rows)
+    conn.commit()
+    return len(rows)
+
+MORPH_SCHEMA = """
+DROP TABLE IF EXISTS token_morphs;
+CREATE TABLE token_morphs (
+    ref INTEGER NOT NULL,        -- books.pack_ref(book, chapter, verse, token_index)
+    token_id INTEGER NOT NULL,   -- tokens.id
+    morpheme INTEGER NOT NULL,   -- position within the "/"-separated morph value
+    lang TEXT NOT NULL,          -- 'H' | 'A'
+    pos TEXT, type TEXT, stem TEXT, tense TEXT, person INTEGER, gender TEXT, number TEXT, state TEXT,
+    PRIMARY KEY (ref, token_id, morpheme)
+) WITHOUT ROWID;
+CREATE INDEX idx_morph_verb ON token_morphs(stem, tense, person, gender, number, ref);
+CREATE INDEX idx_morph_pos ON token_morphs(pos, type, ref);
+CREATE INDEX idx_morph_gns ON token_morphs(gender, number, state, ref);
+"""
+
+def iter_token_morphs(rows):
+    """token_morphs rows for (id, book_code, chapter, verse, token_index, morph) rows."""
+    for pk, code, ch, vs, idx, morph in rows:
+        if not morph:
+            continue
+        ref = pack_ref(code, ch, vs, idx)
+        for pos, m in enumerate(parse_morph(morph)):
+            yield (ref, pk, pos, *m)
+
+def build_morph_index(conn: sqlite3.Connection) -> int:
+    conn.executescript(MORPH_SCHEMA)
+    cur = conn.execute("SELECT id, book_code, chapter, verse, token_index, morph FROM tokens")
+    rows = sorted(iter_token_morphs(cur))
+    conn.executemany("INSERT INTO token_morphs VALUES (?,?,?,?,?,?,?,?,?,?,?,?)", rows)
+    conn.execute("ANALYZE token_morphs")  # lets the planner pick between the filter indexes
+    conn.commit()
+    return len(rows)
+
+# name -> builder(conn) -> rows written; run in this order by build_all().
+BUILDERS: List[Tuple[str, Callable[[sqlite3.Connection], int]]] = [
+    ("structure", build_structure),
+    ("strongs", build_strong_index),
+    ("fts", build_fts),
+    ("folded", build_folded_forms),
+    ("morph", build_morph_index),
+]
+
+def build_all(conn: sqlite3.Connection, only: List[str] = ()) -> Dict[str, int]:
+    out: Dict[str, int] = {}
+    for name, fn in BUILDERS:
+        if only and name not in only:
+            continue
+        t0 = time.perf_counter()
+        out[name] = fn(conn)
+        print(f"  {name}: {out[name]:,} rows in {time.perf_counter() - t0:.1f}s")
+    return out
+
+def main():
+    ap = argparse.ArgumentParser(description="Build derived lookup tables from tokens.")
+    ap.add_argument("--db", default=DB_PATH, help=f"SQLite path (default: {DB_PATH} or $INTERLINEAR_DB)")
+    ap.add_argument("--only", nargs="*", default=[], choices=[n for n, _ in BUILDERS],
+                    help="Only build these tables.")
+    ap.add_argument("--sync", action="store_true",
+                    help="Only re-index verses changed since the last build (search index).")
+    args = ap.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    try:
+        if args.sync:
+            print(f"  fts: refreshed {sync_fts(conn):,} verses")
+        else:
+            build_all(conn, args.only)
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
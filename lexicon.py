@@ -0,0 +1,217 @@
+# lexicon.py — Strong's / Greek-lemma lexicon shared by the API and the build scripts.
+#
+# Parsing the CSVs takes ~150 ms, so the parsed lexicon is also kept as a binary snapshot
+# (data/lexicon.snapshot) tagged with the CSVs' content hash. load() uses the snapshot when
+# the hash matches and re-parses + rewrites it otherwise.
+#
+# The snapshot also carries a reverse gloss index (by_word): stemmed English word -> lexicon
+# keys whose gloss / KJV usage mentions it, so English lookups never scan the entries.
+#
+#   python lexicon.py        # (re)compile the snapshot, e.g. as a deploy build step
+
+import os, re, csv, gc, hashlib, pickle, time
+from typing import Dict, List, Optional, Set, Tuple
+
+from strongs import norm_strong_keys
+
+BASE_DIR = os.path.dirname(__file__)
+DATA_DIR = os.path.join(BASE_DIR, "data")
+STRONGS_LEXICON_CSV = os.path.join(DATA_DIR, "strongs_lexicon.csv")
+GREEK_LEXICON_CSV   = os.path.join(DATA_DIR, "greek_lexicon.csv")
+SNAPSHOT_PATH = os.environ.get("INTERLINEAR_LEXICON_SNAPSHOT", os.path.join(DATA_DIR, "lexicon.snapshot"))
+
+# Snapshot layout: MAGIC | format (1 byte) | lexicon version (16 ascii) | pickle((by_strong, by_lemma, by_word))
+SNAPSHOT_MAGIC = b"ILEXSNAP"
+SNAPSHOT_FORMAT = 2  # bump when the pickled structures or gloss_terms() change
+
+# ---------- Gloss words ----------
+_WORD = re.compile(r"[a-z]+")
+# Function words, and KJV-usage notation: "X" marks idiomatic renderings.
+STOPWORDS = frozenset("""
+    a an and as at be by for from in into is it of on or out so than that the their them then there
+    they this to up upon was were what which with x
+""".split())
+
+def stem(word: str) -> str:
+    """
+    Light English suffix stripping (plurals, -ing, -ed), applied identically to glosses and
+    queries: shepherds/shepherding -> shepherd, cities -> city, fed stays fed.
+    """
+    w = word.lower()
+    if len(w) > 4 and w.endswith("ies"):
+        return w[:-3] + "y"
+    for suffix in ("ing", "ed"):
+        if w.endswith(suffix) and len(w) - len(suffix) >= 3:
+            w = w[:-len(suffix)]
+            if len(w) > 3 and w[-1] == w[-2] and w[-1] not in "ls":  # running -> run
+                w = w[:-1]
+            return w
+    if w.endswith(("sses", "ches", "shes", "xes", "zes")):
+        return w[:-2]
+    if len(w) > 3 and w.endswith("s") and not w.endswith(("ss", "us", "is")):
+        return w[:-1]
+    return w
+
+def gloss_terms(text: str) -> List[str]:
+    """Stemmed index terms of a gloss or query, in order, stopwords dropped."""
+    return [stem(w) for w in _WORD.findall((text or "").lower()) if w not in STOPWORDS]
+
+def _read_csv(path: str) -> List[Dict[str, str]]:
+    rows: List[Dict[str, str]] = []
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        r = csv.DictReader(f)
+        for row in r:
+            rows.append({k: (v or "").strip() for k, v in row.items()})
+    return rows
+
+def lexicon_version(paths=(STRONGS_LEXICON_CSV, GREEK_LEXICON_CSV)) -> str:
+    """Short content hash of the lexicon CSVs; changes whenever any of them does."""
+    h = hashlib.sha1()
+    for p in paths:
+        h.update(os.path.basename(p).encode("utf-8"))
+        if os.path.isfile(p):
+            with open(p, "rb") as f:
+                h.update(f.read())
+        else:
+            h.update(b"\0missing")
+    return h.hexdigest()[:16]
+
+class Lexicon:
+    def __init__(self):
+        self.by_strong: Dict[str, Dict[str, str]] = {}
+        self.by_lemma: Dict[str, Dict[str, str]] = {}
+        self.by_word: Dict[str, Tuple[str, ...]] = {}  # stem -> ("H7462", "G4166", "lemma:ποιμήν", ...)
+        self.version = ""
+        self.source = ""      # "snapshot" or "csv"
+        self.load_ms = 0.0
+
+    def load(self, snapshot: Optional[str] = SNAPSHOT_PATH):
+        t0 = time.perf_counter()
+        self.version = lexicon_version()
+        if snapshot and self._load_snapshot(snapshot):
+            self.source = "snapshot"
+        else:
+            self._load_csv()
+            self.source = "csv"
+            if snapshot:
+                self.save_snapshot(snapshot)
+        self.load_ms = (time.perf_counter() - t0) * 1000
+
+    def _load_snapshot(self, path: str) -> bool:
+        try:
+            with open(path, "rb") as f:
+                blob = f.read()
+        except OSError:
+            return False
+        head = len(SNAPSHOT_MAGIC)
+        if (blob[:head] != SNAPSHOT_MAGIC or blob[head] != SNAPSHOT_FORMAT
+                or blob[head + 1:head + 17].decode("ascii", "replace") != self.version):
+            return False
+        gc.disable()  # tens of thousands of small dicts; collector passes only slow this down
+        try:
+            self.by_strong, self.by_lemma, self.by_word = pickle.loads(blob[head + 17:])
+        except Exception:
+            return False
+        finally:
+            gc.enable()
+        return True
+
+    def save_snapshot(self, path: str = SNAPSHOT_PATH) -> bool:
+        body = pickle.dumps((self.by_strong, self.by_lemma, self.by_word), protocol=pickle.HIGHEST_PROTOCOL)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(SNAPSHOT_MAGIC + bytes([SNAPSHOT_FORMAT]) + self.version.encode("ascii") + body)
+            os.replace(tmp, path)
+            return True
+        except OSError as e:
+            # Read-only deploy dir etc.: keep working from the CSVs.
+            print(f"[lexicon] could not write snapshot {path}: {e}")
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return False
+
+    def _load_csv(self):
+        words: Dict[str, Set[str]] = {}
+        if os.path.isfile(STRONGS_LEXICON_CSV):
+            for r in _read_csv(STRONGS_LEXICON_CSV):
+                strong = (r.get("strong") or "").strip()
+                if strong:
+                    entry = {
+                        "lemma": (r.get("lemma") or "").strip(),
+                        "translit": (r.get("translit") or "").strip(),
+                        "gloss": (r.get("gloss") or "").strip(),
+                    }
+                    keys = norm_strong_keys(strong)
+                    for k in keys:
+                        self.by_strong[k] = entry
+                    if keys:
+                        for t in gloss_terms(entry["gloss"]):
+                            words.setdefault(t, set()).add(keys[0])  # the prefixed key, e.g. H7462
+
+        if os.path.isfile(GREEK_LEXICON_CSV):
+            for r in _read_csv(GREEK_LEXICON_CSV):
+                lemma = (r.get("lemma") or "").strip()
+                if lemma:
+                    self.by_lemma[lemma] = {
+                        "lemma": lemma,
+                        "translit": (r.get("translit") or "").strip(),
+                        "gloss": (r.get("gloss") or "").strip(),
+                    }
+                    for t in gloss_terms(self.by_lemma[lemma]["gloss"]):
+                        words.setdefault(t, set()).add("lemma:" + lemma)
+
+        self.by_word = {t: tuple(sorted(keys)) for t, keys in words.items()}
+
+    def entry(self, key: str) -> Dict[str, str]:
+        """Entry for a key as returned by lookup() / search_gloss() ("H7225", "lemma:λόγος")."""
+        if key.startswith("lemma:"):
+            return self.by_lemma.get(key[6:], {})
+        return self.by_strong.get(key, {})
+
+    def search_gloss(self, query: str) -> List[str]:
+        """Keys whose gloss contains every (stemmed) word of the English query."""
+        terms = gloss_terms(query)
+        if not terms:
+            return []
+        hits: Set[str] = set(self.by_word.get(terms[0], ()))
+        for t in terms[1:]:
+            hits.intersection_update(self.by_word.get(t, ()))
+        return sorted(hits)
+
+    def lookup(self, strong: str, lemma: str) -> Tuple[Dict[str, str], str]:
+        """Entry for a token (Strong's first, then lemma) and the key it matched ("" if none)."""
+        for k in norm_strong_keys(strong):
+            hit = self.by_strong.get(k)
+            if hit:
+                return hit, k
+        if lemma:
+            hit = self.by_lemma.get(lemma)
+            if hit:
+                return hit, "lemma:" + lemma
+        return {}, ""
+
+    def resolve_fields(self, strong: str, lemma: str, translit: str, gloss: str) -> Tuple[str, str, str, str]:
+        """(resolved_lemma, resolved_translit, resolved_gloss, lexicon key); DB values win over the lexicon."""
+        if lemma and translit and gloss:
+            return lemma, translit, gloss, ""
+        resolved, key = self.lookup(strong, lemma)
+        return (lemma or resolved.get("lemma", ""),
+                translit or resolved.get("translit", ""),
+                gloss or resolved.get("gloss", ""),
+                key)
+
+def main():
+    lex = Lexicon()
+    lex.load(snapshot=None)
+    lex.save_snapshot(SNAPSHOT_PATH)
+    reload = Lexicon()
+    reload.load()
+    print(f"Compiled {SNAPSHOT_PATH} (version {lex.version}, {os.path.getsize(SNAPSHOT_PATH) / 1e6:.1f} MB): "
+          f"strongs {len(lex.by_strong)}, greek lemmas {len(lex.by_lemma)}, gloss words {len(lex.by_word)}; "
+          f"CSV parse {lex.load_ms:.0f} ms vs snapshot load {reload.load_ms:.1f} ms ({reload.source}).")
+
+if __name__ == "__main__":
+    main()
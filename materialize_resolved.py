@@ -0,0 +1,93 @@
+# materialize_resolved.py
+# Resolve lemma/translit/gloss for every token once, at build time, and store the result
+# (plus the matched lexicon key and the lexicon version) in the tokens table.
+# The API projects these columns; rows whose lex_version doesn't match the lexicon it has
+# loaded are resolved at request time instead, so a stale DB is never wrong, only slower.
+import os, sqlite3, argparse
+from typing import Dict, Tuple
+
+from compact import is_compact, materialize_lexemes
+from lexicon import Lexicon
+
+BASE_DIR = os.path.dirname(__file__)
+DB_PATH = os.environ.get("INTERLINEAR_DB", os.path.join(BASE_DIR, "interlinear.sqlite3"))
+
+RESOLVED_COLUMNS = [
+    ("resolved_lemma", "TEXT"),
+    ("resolved_translit", "TEXT"),
+    ("resolved_gloss", "TEXT"),
+    ("lex_key", "TEXT"),       # e.g. "H7225" or "lemma:λόγος"; "" when the token was already complete
+    ("lex_version", "TEXT"),   # lexicon.lexicon_version() at materialization time
+]
+
+UPDATE_SQL = """
+UPDATE tokens
+   SET resolved_lemma = ?, resolved_translit = ?, resolved_gloss = ?, lex_key = ?, lex_version = ?
+ WHERE id = ?
+"""
+
+def ensure_resolved_columns(conn: sqlite3.Connection):
+    have = {r[1] for r in conn.execute("PRAGMA table_info(tokens)")}
+    for name, typ in RESOLVED_COLUMNS:
+        if name not in have:
+            conn.execute(f"ALTER TABLE tokens ADD COLUMN {name} {typ}")
+    conn.commit()
+
+def materialize(conn: sqlite3.Connection, lex: Lexicon, full: bool = False, batch_size: int = 50_000) -> Tuple[int, int]:
+    """
+    Fill resolved columns for rows whose lex_version differs from lex.version (all rows if full).
+    Returns (rows written, distinct (strong, lemma, translit, gloss) combinations resolved).
+    """
+    if is_compact(conn):
+        return materialize_lexemes(conn, lex, full)  # same values, resolved once per lexeme
+    ensure_resolved_columns(conn)
+    memo: Dict[Tuple[str, str, str, str], Tuple[str, str, str, str]] = {}
+    written = 0
+    last_id = 0
+    # Keyset over id so the UPDATEs never race an open SELECT on the same table.
+    where = "id > ?" if full else "id > ? AND lex_version IS NOT ?"
+    while True:
+        params = (last_id,) if full else (last_id, lex.version)
+        rows = conn.execute(f"""
+            SELECT id, COALESCE(strong,''), COALESCE(lemma,''), COALESCE(translit,''), COALESCE(gloss,'')
+            FROM tokens
+            WHERE {where}
+            ORDER BY id
+            LIMIT ?
+        """, params + (batch_size,)).fetchall()
+        if not rows:
+            break
+        updates = []
+        for pk, strong, lemma, transl, gloss in rows:
+            k = (strong.strip(), lemma.strip(), transl.strip(), gloss.strip())
+            res = memo.get(k)
+            if res is None:
+                res = memo[k] = lex.resolve_fields(*k)
+            updates.append((*res, lex.version, pk))
+        conn.executemany(UPDATE_SQL, updates)
+        conn.commit()
+        written += len(updates)
+        last_id = rows[-1][0]
+        print(f"  … resolved {written:,} rows", end="\r", flush=True)
+    if written:
+        print()
+    return written, len(memo)
+
+def main():
+    ap = argparse.ArgumentParser(description="Store resolved lemma/translit/gloss on tokens for the API to project.")
+    ap.add_argument("--db", default=DB_PATH, help=f"SQLite path (default: {DB_PATH} or $INTERLINEAR_DB)")
+    ap.add_argument("--full", action="store_true",
+                    help="Re-resolve every row, not only rows with a missing or stale lex_version.")
+    args = ap.parse_args()
+
+    lex = Lexicon()
+    lex.load()
+    conn = sqlite3.connect(args.db)
+    try:
+        written, distinct = materialize(conn, lex, full=args.full)
+    finally:
+        conn.close()
+    print(f"Materialized {written:,} tokens ({distinct:,} distinct inputs) at lexicon version {lex.version}.")
+
+if __name__ == "__main__":
+    main()
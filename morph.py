@@ -0,0 +1,116 @@
+# morph.py — OSHB morphology codes split into typed fields.
+#
+# A morph value is a language letter (H Hebrew, A Aramaic) followed by one code per morpheme,
+# separated by "/" exactly like the strong column: "HR/Ncfsa" is a preposition + a common
+# noun, feminine singular absolute; "HVqp3ms" a Qal perfect 3rd masculine singular verb.
+# parse_morph() turns a value into one Morpheme per morpheme, with readable names
+# ("verb", "qal", "perfect", 3, "masculine", "singular", None). "x" and unknown letters map
+# to None. Like strongs.py, results are memoized: a few thousand codes cover the corpus.
+#
+# Reference: https://hb.openscriptures.org/parsing/HebrewMorphologyCodes.html
+
+import os
+from functools import lru_cache
+from typing import NamedTuple, Optional, Tuple
+
+MEMO_SIZE = int(os.environ.get("INTERLINEAR_MORPH_MEMO", "16384"))
+
+POS = {
+    "A": "adjective", "C": "conjunction", "D": "adverb", "N": "noun", "P": "pronoun",
+    "R": "preposition", "S": "suffix", "T": "particle", "V": "verb",
+}
+
+TYPES = {
+    "A": {"a": "adjective", "c": "cardinal", "g": "gentilic", "o": "ordinal"},
+    "N": {"c": "common", "g": "gentilic", "p": "proper"},
+    "P": {"d": "demonstrative", "f": "indefinite", "i": "interrogative", "p": "personal", "r": "relative"},
+    "R": {"d": "article"},
+    "S": {"d": "directional_he", "h": "paragogic_he", "n": "paragogic_nun", "p": "pronominal"},
+    "T": {"a": "affirmation", "d": "article", "e": "exhortation", "i": "interrogative", "j": "interjection",
+          "m": "demonstrative", "n": "negative", "o": "object_marker", "r": "relative"},
+}
+
+# Stem letters are case-sensitive and mean different things in Hebrew and Aramaic.
+STEMS = {
+    "H": {
+        "q": "qal", "N": "niphal", "p": "piel", "P": "pual", "h": "hiphil", "H": "hophal",
+        "t": "hithpael", "o": "polel", "O": "polal", "r": "hithpolel", "m": "poel", "M": "poal",
+        "k": "palel", "K": "pulal", "Q": "qal_passive", "l": "pilpel", "L": "polpal",
+        "f": "hithpalpel", "D": "nithpael", "j": "pealal", "i": "pilel", "u": "hothpaal",
+        "c": "tiphil", "v": "hishtaphel", "w": "nithpalel", "y": "nithpoel", "z": "hithpoel",
+    },
+    "A": {
+        "q": "peal", "Q": "peil", "u": "hithpeel", "p": "pael", "P": "ithpaal", "M": "hithpaal",
+        "a": "aphel", "h": "haphel", "s": "saphel", "e": "shaphel", "H": "hophal", "i": "ithpeel",
+        "t": "hishtaphel", "v": "ishtaphel", "w": "hithaphel", "o": "polel", "z": "ithpoel",
+        "r": "hithpolel", "f": "hithpalpel", "b": "hephal", "c": "tiphel", "m": "poel",
+        "l": "palpel", "L": "ithpalpel", "O": "ithpolel", "G": "ittaphal",
+    },
+}
+
+TENSES = {
+    "p": "perfect", "q": "sequential_perfect", "i": "imperfect", "w": "sequential_imperfect",
+    "h": "cohortative", "j": "jussive", "v": "imperative", "r": "participle",
+    "s": "passive_participle", "a": "infinitive_absolute", "c": "infinitive_construct",
+}
+
+PERSONS = {"1": 1, "2": 2, "3": 3}
+GENDERS = {"b": "both", "c": "common", "f": "feminine", "m": "masculine"}
+NUMBERS = {"d": "dual", "p": "plural", "s": "singular"}
+STATES = {"a": "absolute", "c": "construct", "d": "determined"}
+
+LANGS = {"H": "hebrew", "A": "aramaic"}
+
+class Morpheme(NamedTuple):
+    lang: str                   # "H" | "A"
+    pos: Optional[str]
+    type: Optional[str]
+    stem: Optional[str]
+    tense: Optional[str]
+    person: Optional[int]
+    gender: Optional[str]
+    number: Optional[str]
+    state: Optional[str]
+
+FIELDS = Morpheme._fields
+
+def parse_code(code: str, lang: str = "H") -> Morpheme:
+    """One morpheme code without the language letter: "Vqp3ms", "Ncfsa", "Sp3ms", "Td"."""
+    pos = code[:1]
+    person = gender = number = state = type_ = stem = tense = None
+    if pos == "V":
+        stem = STEMS.get(lang, STEMS["H"]).get(code[1:2])
+        tense = TENSES.get(code[2:3])
+        rest = code[3:]
+        if code[2:3] in ("r", "s"):             # participles: gender, number, state
+            gender, number, state = GENDERS.get(rest[0:1]), NUMBERS.get(rest[1:2]), STATES.get(rest[2:3])
+        else:                                   # finite forms: person, gender, number
+            person, gender, number = PERSONS.get(rest[0:1]), GENDERS.get(rest[1:2]), NUMBERS.get(rest[2:3])
+    else:
+        type_ = TYPES.get(pos, {}).get(code[1:2])
+        rest = code[2:]
+        if pos in ("P", "S"):                   # pronouns and suffixes: person, gender, number
+            person, gender, number = PERSONS.get(rest[0:1]), GENDERS.get(rest[1:2]), NUMBERS.get(rest[2:3])
+        else:                                   # nouns and adjectives: gender, number, state
+            gender, number, state = GENDERS.get(rest[0:1]), NUMBERS.get(rest[1:2]), STATES.get(rest[2:3])
+    return Morpheme(lang, POS.get(pos), type_, stem, tense, person, gender, number, state)
+
+def parse_morph(raw: str) -> Tuple[Morpheme, ...]:
+    """
+    All morphemes of a morph value, in the same positions as the "/"-separated strong value.
+    "HC/Vqw3ms" -> (conjunction, verb qal sequential_imperfect 3 masculine singular).
+    """
+    if not raw:
+        return ()
+    return _parse_cached(raw.strip())
+
+@lru_cache(maxsize=MEMO_SIZE)
+def _parse_cached(raw: str) -> Tuple[Morpheme, ...]:
+    lang, body = (raw[0], raw[1:]) if raw[:1] in LANGS else ("H", raw)
+    return tuple(parse_code(p, lang) for p in body.split("/") if p)
+
+def split_lang(code: str) -> Tuple[str, str]:
+    """("H", "Vqp3ms") for "HVqp3ms"; a bare "Vqp3ms" or "Aampa" (adjective) defaults to Hebrew."""
+    if len(code) > 1 and code[0] in LANGS and code[1] in POS:
+        return code[0], code[1:]
+    return "H", code
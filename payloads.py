@@ -0,0 +1,185 @@
+# payloads.py
+# Response shaping shared by the API and the payload build step, plus that build step:
+# the finished JSON of every verse and chapter is written to a `payloads` table so the API
+# can return the stored bytes without touching individual tokens.
+#
+#   python payloads.py [--db PATH] [--books GEN EXO ...]
+
+import os, json, sqlite3, argparse, time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from books import BOOK_CODES, book_ordinal
+from compact import PAYLOAD_TRIGGERS as COMPACT_PAYLOAD_TRIGGERS, is_compact
+from lexicon import Lexicon
+
+BASE_DIR = os.path.dirname(__file__)
+DB_PATH = os.environ.get("INTERLINEAR_DB", os.path.join(BASE_DIR, "interlinear.sqlite3"))
+
+TOKEN_COLS = "surface, lemma, translit, gloss, morph, strong, token_index"
+RESOLVED_COLS = "resolved_lemma, resolved_translit, resolved_gloss, lex_key, lex_version"
+
+# verse = 0 holds the chapter payload.
+PAYLOADS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS payloads (
+    book_code TEXT NOT NULL,
+    chapter INTEGER NOT NULL,
+    verse INTEGER NOT NULL,
+    lex_version TEXT NOT NULL,
+    body BLOB NOT NULL,
+    PRIMARY KEY (book_code, chapter, verse)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS payloads_stale (
+    book_code TEXT NOT NULL,
+    chapter INTEGER NOT NULL,
+    verse INTEGER NOT NULL,
+    PRIMARY KEY (book_code, chapter, verse)
+) WITHOUT ROWID;
+"""
+
+# A stored body is only valid for the tokens it was built from: any token write marks the
+# verse and its chapter (verse 0) in payloads_stale, which the API checks and build_payloads
+# clears. Resolved columns aren't listed; lex_version covers them.
+# (compact.PAYLOAD_TRIGGERS is the same on the dictionary-encoded layout.)
+PAYLOAD_TRIGGERS = """
+CREATE TRIGGER IF NOT EXISTS tokens_payloads_ins AFTER INSERT ON tokens BEGIN
+    INSERT OR IGNORE INTO payloads_stale VALUES (new.book_code, new.chapter, new.verse), (new.book_code, new.chapter, 0);
+END;
+CREATE TRIGGER IF NOT EXISTS tokens_payloads_del AFTER DELETE ON tokens BEGIN
+    INSERT OR IGNORE INTO payloads_stale VALUES (old.book_code, old.chapter, old.verse), (old.book_code, old.chapter, 0);
+END;
+CREATE TRIGGER IF NOT EXISTS tokens_payloads_upd
+AFTER UPDATE OF book_code, chapter, verse, token_index, surface, lemma, translit, gloss, morph, strong ON tokens BEGIN
+    INSERT OR IGNORE INTO payloads_stale VALUES (old.book_code, old.chapter, old.verse), (old.book_code, old.chapter, 0);
+    INSERT OR IGNORE INTO payloads_stale VALUES (new.book_code, new.chapter, new.verse), (new.book_code, new.chapter, 0);
+END;
+"""
+
+# ---------- Shaping ----------
+def shape_token(row, lex: Lexicon, materialized: bool = False) -> Dict[str, Any]:
+    surface = (row["surface"] or "")
+    lemma   = (row["lemma"] or "")
+    transl  = (row["translit"] or "")
+    gloss   = (row["gloss"] or "")
+    morph   = (row["morph"] or "")
+    strong  = (row["strong"] or "")
+    idx     = int(row["token_index"])
+
+    # Resolved at build time against the lexicon we have loaded? Then it's a pure projection;
+    # stale or never-materialized rows fall back to runtime resolution.
+    if materialized and row["lex_version"] == lex.version:
+        r_lemma  = row["resolved_lemma"] or ""
+        r_transl = row["resolved_translit"] or ""
+        r_gloss  = row["resolved_gloss"] or ""
+    else:
+        r_lemma, r_transl, r_gloss, _ = lex.resolve_fields(strong, lemma, transl, gloss)
+
+    return {
+        "surface": surface, "lemma": lemma, "translit": transl, "gloss": gloss,
+        "morph": morph, "strong": strong, "index": idx,
+        "resolved_lemma": r_lemma, "resolved_translit": r_transl, "resolved_gloss": r_gloss,
+        # your UI wants "the English word being translated"
+        "translation": r_gloss
+    }
+
+def verse_payload(code: str, name: str, chapter: int, verse: int, tokens: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {"reference": f"{name} {chapter}:{verse}", "book": name, "book_code": code, "chapter": chapter, "verse": verse, "tokens": tokens}
+
+def chapter_payload(code: str, name: str, chapter: int, verses: Dict[int, List[Dict[str, Any]]]) -> Dict[str, Any]:
+    return {"reference": f"{name} {chapter}", "book": name, "book_code": code, "chapter": chapter, "verses": verses}
+
+def json_bytes(payload: Dict[str, Any]) -> bytes:
+    # Same encoding FastAPI's JSONResponse uses, done once so the bytes can be cached/stored.
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+# ---------- Build ----------
+def ensure_payloads_table(conn: sqlite3.Connection):
+    conn.executescript(PAYLOADS_SCHEMA)
+    conn.executescript(COMPACT_PAYLOAD_TRIGGERS if is_compact(conn) else PAYLOAD_TRIGGERS)
+
+def has_stored_payloads(conn: sqlite3.Connection) -> bool:
+    """True when a payloads table exists and holds rows (so token writers should rebuild theirs)."""
+    return bool(conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='payloads'").fetchone()) \
+        and bool(conn.execute("SELECT 1 FROM payloads LIMIT 1").fetchone())
+
+def clear_payloads(conn: sqlite3.Connection):
+    """Drop stored payloads (their tokens are about to change); no-op if the table doesn't exist."""
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='payloads'").fetchone():
+        conn.execute("DELETE FROM payloads")
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='payloads_stale'").fetchone():
+            conn.execute("DELETE FROM payloads_stale")
+        conn.commit()
+
+def _token_cols(conn: sqlite3.Connection) -> Tuple[str, bool]:
+    have = {r[1] for r in conn.execute("PRAGMA table_info(tokens)")}
+    materialized = "lex_version" in have
+    return (f"{TOKEN_COLS}, {RESOLVED_COLS}" if materialized else TOKEN_COLS), materialized
+
+def iter_book_chapters(conn: sqlite3.Connection, code: str, lex: Lexicon) -> Iterator[Tuple[int, Dict[int, List[Dict[str, Any]]]]]:
+    """(chapter, {verse: tokens}) for one book, streamed in reference order."""
+    cols, materialized = _token_cols(conn)
+    cur = conn.execute(f"""
+        SELECT chapter, verse, {cols}
+        FROM tokens
+        WHERE book_code=?
+        ORDER BY chapter ASC, verse ASC, token_index ASC
+    """, (code,))
+    chapter: Optional[int] = None
+    verses: Dict[int, List[Dict[str, Any]]] = {}
+    for r in cur:
+        ch = int(r["chapter"])
+        if ch != chapter:
+            if chapter is not None:
+                yield chapter, verses
+            chapter, verses = ch, {}
+        verses.setdefault(int(r["verse"]), []).append(shape_token(r, lex, materialized))
+    if chapter is not None:
+        yield chapter, verses
+
+def build_payloads(conn: sqlite3.Connection, lex: Lexicon, books: Iterable[str] = ()) -> Dict[str, int]:
+    conn.row_factory = sqlite3.Row
+    ensure_payloads_table(conn)
+    books = [b.upper() for b in books] or [r[0] for r in conn.execute("SELECT DISTINCT book_code FROM tokens")]
+    books.sort(key=lambda b: (book_ordinal(b) or 10_000, b))
+    stats = {"books": 0, "chapters": 0, "verses": 0, "bytes": 0}
+    for code in books:
+        name = BOOK_CODES.get(code, code)
+        # Read the whole book before writing so the SELECT cursor isn't open across our INSERTs.
+        rows: List[Tuple[str, int, int, str, bytes]] = []
+        for chapter, verses in iter_book_chapters(conn, code, lex):
+            for v, toks in verses.items():
+                body = json_bytes(verse_payload(code, name, chapter, v, toks))
+                rows.append((code, chapter, v, lex.version, body))
+            body = json_bytes(chapter_payload(code, name, chapter, verses))
+            rows.append((code, chapter, 0, lex.version, body))
+            stats["chapters"] += 1
+            stats["verses"] += len(verses)
+        conn.execute("DELETE FROM payloads WHERE book_code=?", (code,))
+        conn.execute("DELETE FROM payloads_stale WHERE book_code=?", (code,))
+        conn.executemany("INSERT INTO payloads(book_code, chapter, verse, lex_version, body) VALUES (?,?,?,?,?)", rows)
+        conn.commit()
+        stats["books"] += 1
+        stats["bytes"] += sum(len(r[4]) for r in rows)
+        print(f"  … {code}: {stats['chapters']:,} chapters / {stats['verses']:,} verses so far", end="\r", flush=True)
+    print()
+    return stats
+
+def main():
+    ap = argparse.ArgumentParser(description="Store pre-serialized verse/chapter JSON in the payloads table.")
+    ap.add_argument("--db", default=DB_PATH, help=f"SQLite path (default: {DB_PATH} or $INTERLINEAR_DB)")
+    ap.add_argument("--books", nargs="*", default=[], help="Only rebuild these book_code(s).")
+    args = ap.parse_args()
+
+    lex = Lexicon()
+    lex.load()
+    conn = sqlite3.connect(args.db)
+    t0 = time.perf_counter()
+    try:
+        stats = build_payloads(conn, lex, args.books)
+    finally:
+        conn.close()
+    print(f"Stored {stats['verses']:,} verse + {stats['chapters']:,} chapter payloads "
+          f"({stats['bytes'] / 1e6:.1f} MB) for {stats['books']} books in {time.perf_counter() - t0:.1f}s "
+          f"(lexicon {lex.version}).")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# reseed.py
+# Incremental re-seeding (seed.py --incremental): hash each verse of the incoming CSV, compare
+# with the hashes stored for the database, and rewrite only the verses that differ, in one
+# transaction. Tokens are keyed by packed reference (db.py), so a verse is the id range
+# [pack_ref(book, chapter, verse, 0), + 999] and "rewrite" is a range delete + insert.
+#
+#   verse_hashes(ref, hash, tokens)  — ref = books.pack_ref(book, chapter, verse, 0)
+#
+# A verse's hash covers token_index and the six source columns as loaded (not the resolved
+# fields), so it is the same whether computed from CSV rows or from the tokens table.
+# seed.py records the hashes after every load; a database without them is hashed from its
+# tokens on the first incremental run. Verses missing from the CSV are only removed when
+# their book appears in it, so a NT-only CSV leaves the OT alone.
+
+import hashlib, sqlite3
+from itertools import groupby
+from typing import Dict, Iterable, List, Tuple
+
+from books import BOOK_ORDER, unpack_ref
+
+HASH_SCHEMA = """
+CREATE TABLE IF NOT EXISTS verse_hashes (
+    ref INTEGER PRIMARY KEY,     -- books.pack_ref(book, chapter, verse, 0)
+    hash TEXT NOT NULL,          -- sha1 of the verse's (token_index, surface, lemma, translit, gloss, morph, strong)
+    tokens INTEGER NOT NULL
+);
+"""
+
+# Parameters as produced by seed.coerce_tuple(): (id, book_code, chapter, verse, token_index, surface, ..., strong)
+INSERT_SQL = """
+INSERT INTO tokens(id, book_code, chapter, verse, token_index, surface, lemma, translit, gloss, morph, strong)
+VALUES (?,?,?,?,?,?,?,?,?,?,?)
+"""
+
+TOKENS_SQL = """
+SELECT id, token_index, COALESCE(surface,''), COALESCE(lemma,''), COALESCE(translit,''),
+       COALESCE(gloss,''), COALESCE(morph,''), COALESCE(strong,'')
+FROM tokens ORDER BY id
+"""
+
+BOOK_OF = {ordinal: code for code, ordinal in BOOK_ORDER.items()}
+
+def verse_ref(token_id: int) -> int:
+    return token_id - token_id % 1000
+
+def verse_hash(rows: Iterable[tuple]) -> str:
+    """rows: (token_index, surface, lemma, translit, gloss, morph, strong) in token order."""
+    h = hashlib.sha1()
+    for r in rows:
+        h.update("\x1f".join(str(v) for v in r).encode("utf-8"))
+        h.update(b"\x1e")
+    return h.hexdigest()
+
+def ref_label(ref: int) -> str:
+    ordinal, ch, vs, _ = unpack_ref(ref)
+    return f"{BOOK_OF.get(ordinal, ordinal)} {ch}:{vs}"
+
+def hash_tokens(conn: sqlite3.Connection) -> Dict[int, Tuple[str, int]]:
+    """ref -> (hash, token count) for every verse currently in tokens."""
+    out: Dict[int, Tuple[str, int]] = {}
+    for ref, rows in groupby(conn.execute(TOKENS_SQL), key=lambda r: verse_ref(r[0])):
+        rows = [r[1:] for r in rows]
+        out[ref] = (verse_hash(rows), len(rows))
+    return out
+
+def record_verse_hashes(conn: sqlite3.Connection) -> int:
+    """Replace verse_hashes with hashes of the current tokens (after a full or appending load)."""
+    hashes = hash_tokens(conn)
+    conn.execute(HASH_SCHEMA)
+    conn.execute("DELETE FROM verse_hashes")
+    conn.executemany("INSERT INTO verse_hashes(ref, hash, tokens) VALUES (?,?,?)",
+                     ((ref, h, n) for ref, (h, n) in hashes.items()))
+    conn.commit()
+    return len(hashes)
+
+def stored_hashes(conn: sqlite3.Connection) -> Dict[int, str]:
+    conn.execute(HASH_SCHEMA)
+    stored = dict(conn.execute("SELECT ref, hash FROM verse_hashes"))
+    if not stored and conn.execute("SELECT 1 FROM tokens LIMIT 1").fetchone():
+        print("  no verse hashes stored yet; hashing current tokens …")
+        record_verse_hashes(conn)
+        stored = dict(conn.execute("SELECT ref, hash FROM verse_hashes"))
+    return stored
+
+def group_verses(batches: Iterable[List[tuple]]) -> Dict[int, List[tuple]]:
+    """Incoming coerce_tuple() rows grouped by verse ref, each verse sorted by token_index."""
+    verses: Dict[int, List[tuple]] = {}
+    for batch in batches:
+        for row in batch:
+            verses.setdefault(verse_ref(row[0]), []).append(row)
+    for rows in verses.values():
+        rows.sort()
+    return verses
+
+def reseed(conn: sqlite3.Connection, batches: Iterable[List[tuple]], dry_run: bool = False) -> Dict[str, object]:
+    """
+    Bring tokens in line with the incoming rows, touching only verses whose hash differs.
+    Returns verse counts (added/changed/removed/unchanged), tokens written, the affected
+    book codes and up to ten sample references per kind.
+    """
+    incoming = group_verses(batches)
+    new_hashes = {ref: verse_hash(r[4:] for r in rows) for ref, rows in incoming.items()}
+    stored = stored_hashes(conn)
+
+    books = {ref // 1_000_000_000 for ref in incoming}
+    added = sorted(ref for ref in new_hashes if ref not in stored)
+    changed = sorted(ref for ref, h in new_hashes.items() if ref in stored and stored[ref] != h)
+    removed = sorted(ref for ref in stored if ref not in new_hashes and ref // 1_000_000_000 in books)
+    touched = added + changed + removed
+    out: Dict[str, object] = {
+        "added": len(added), "changed": len(changed), "removed": len(removed),
+        "unchanged": len(new_hashes) - len(added) - len(changed), "tokens": 0,
+        "books": sorted({BOOK_OF[ref // 1_000_000_000] for ref in touched}, key=BOOK_ORDER.get),
+        "samples": {kind: [ref_label(r) for r in refs[:10]]
+                    for kind, refs in (("added", added), ("changed", changed), ("removed", removed)) if refs},
+    }
+    if dry_run or not touched:
+        return out
+
+    conn.execute("BEGIN")
+    try:
+        conn.executemany("DELETE FROM tokens WHERE id BETWEEN ? AND ?",
+                         ((ref, ref + 999) for ref in changed + removed))
+        for ref in added + changed:
+            conn.executemany(INSERT_SQL, incoming[ref])
+            out["tokens"] += len(incoming[ref])
+        conn.executemany("INSERT INTO verse_hashes(ref, hash, tokens) VALUES (?,?,?) "
+                         "ON CONFLICT(ref) DO UPDATE SET hash=excluded.hash, tokens=excluded.tokens",
+                         ((ref, new_hashes[ref], len(incoming[ref])) for ref in added + changed))
+        conn.executemany("DELETE FROM verse_hashes WHERE ref=?", ((ref,) for ref in removed))
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return out
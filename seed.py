@@ -5,7 +5,20 @@ import csv
 import sys
 import sqlite3
 import argparse
-from typing import Dict, Any, Iterable
+import time
+import multiprocessing as mp
+from typing import Dict, Any, Iterable, Iterator, List, Tuple
+
+from books import book_ordinal, pack_ref
+from compact import compact, drop_tokens, is_compact
+from db import create_tokens, has_packed_ids
+from lexicon import Lexicon
+from materialize_resolved import materialize
+from payloads import build_payloads, clear_payloads
+from indexes import build_all as build_indexes, sync_fts
+from stats import build_stats
+from collocations import build_collocations, stored_windows
+from reseed import record_verse_hashes, reseed
 
 DEFAULT_DB = os.environ.get("INTERLINEAR_DB", "interlinear.sqlite3")
 
@@ -15,10 +28,15 @@ DEFAULT_CSV = os.path.join(os.path.dirname(__file__), "data", "interlinear_token
 
 INSERT_SQL = """
 INSERT INTO tokens
-(book_code, chapter, verse, token_index, surface, lemma, translit, gloss, morph, strong)
-VALUES (:book_code, :chapter, :verse, :token_index, :surface, :lemma, :translit, :gloss, :morph, :strong)
+(id, book_code, chapter, verse, token_index, surface, lemma, translit, gloss, morph, strong)
+VALUES (:id, :book_code, :chapter, :verse, :token_index, :surface, :lemma, :translit, :gloss, :morph, :strong)
 """
 
+FIELDS = ("book_code", "chapter", "verse", "token_index", "surface", "lemma", "translit", "gloss", "morph", "strong")
+
+# --fast: positional parameters, one tuple per row
+FAST_INSERT_SQL = f"INSERT INTO tokens(id, {', '.join(FIELDS)}) VALUES ({', '.join('?' * (len(FIELDS) + 1))})"
+
 def batched(iterable: Iterable[Dict[str, Any]], n: int):
     """Yield lists of size n from iterable."""
     batch = []
@@ -47,59 +65,94 @@ def coerce_row(row: Dict[str, Any]) -> Dict[str, Any]:
     if not row["book_code"] or not row["surface"]:
         raise ValueError(f"Missing required fields in row: {row}")
 
+    # tokens.id is the packed reference (db.py), so every part must fit its slot.
+    if not book_ordinal(row["book_code"]):
+        raise ValueError(f"Unknown book_code in row: {row}")
+    if not all(0 <= row[k] < 1000 for k in ("chapter", "verse", "token_index")):
+        raise ValueError(f"chapter/verse/token_index out of range (0-999) in row: {row}")
+    row["id"] = pack_ref(row["book_code"], row["chapter"], row["verse"], row["token_index"])
+
     return row
 
-def ensure_schema(conn: sqlite3.Connection):
-    """Create table/indexes if they don't exist (safe to run)."""
-    conn.executescript(
-        """
-        PRAGMA journal_mode=WAL;
-        CREATE TABLE IF NOT EXISTS tokens (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            book_code TEXT NOT NULL,
-            chapter INTEGER NOT NULL,
-            verse INTEGER NOT NULL,
-            token_index INTEGER NOT NULL,
-            surface TEXT NOT NULL,
-            lemma TEXT,
-            translit TEXT,
-            gloss TEXT,
-            morph TEXT,
-            strong TEXT
-        );
-        CREATE INDEX IF NOT EXISTS idx_ref ON tokens(book_code, chapter, verse);
-        """
-    )
-    conn.commit()
+def coerce_tuple(values: List[str], pos: Tuple[int, ...]) -> tuple:
+    """coerce_row() for --fast: a csv.reader row (FIELDS at `pos`) -> FAST_INSERT_SQL parameters."""
+    code, ch, vs, idx, surface, lemma, transl, gloss, morph, strong = (values[i].strip() for i in pos)
+    try:
+        ch, vs, idx = int(ch), int(vs), int(idx)
+    except ValueError as e:
+        raise ValueError(f"Bad numeric fields in row: {values}") from e
+    if not code or not surface:
+        raise ValueError(f"Missing required fields in row: {values}")
+    if not book_ordinal(code):
+        raise ValueError(f"Unknown book_code in row: {values}")
+    if not (0 <= ch < 1000 and 0 <= vs < 1000 and 0 <= idx < 1000):
+        raise ValueError(f"chapter/verse/token_index out of range (0-999) in row: {values}")
+    return (pack_ref(code, ch, vs, idx), code, ch, vs, idx, surface, lemma, transl, gloss, morph, strong)
 
-def seed(csv_path: str,
-         db_path: str,
-         append: bool = False,
-         batch_size: int = 50_000,
-         vacuum: bool = False):
-    if not os.path.isfile(csv_path):
-        raise FileNotFoundError(f"CSV not found: {csv_path}")
+def iter_tuple_batches(csv_path: str, batch_size: int) -> Iterator[List[tuple]]:
+    with open(csv_path, "r", encoding="utf-8-sig", newline="") as f:
+        reader = csv.reader(f)
+        header = [h.strip() for h in next(reader, [])]
+        missing = set(FIELDS) - set(header)
+        if missing:
+            raise RuntimeError(f"CSV missing required columns: {sorted(missing)}")
+        pos = tuple(header.index(k) for k in FIELDS)
+        yield from batched((coerce_tuple(r, pos) for r in reader if r), batch_size)
 
-    # Connect
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
+def _parse_process(csv_path: str, batch_size: int, queue):
+    # Runs in a child process; None marks the end, an exception is passed through.
+    try:
+        for batch in iter_tuple_batches(csv_path, batch_size):
+            queue.put(batch)
+        queue.put(None)
+    except Exception as e:
+        queue.put(e)
 
-    # Speed PRAGMAs (safe for bulk-loading)
-    conn.execute("PRAGMA synchronous=OFF;")
-    conn.execute("PRAGMA temp_store=MEMORY;")
-    conn.execute("PRAGMA cache_size=-200000;")  # ~200MB page cache
-    ensure_schema(conn)
+def _queued_batches(csv_path: str, batch_size: int) -> Iterator[List[tuple]]:
+    queue = mp.Queue(maxsize=4)
+    proc = mp.Process(target=_parse_process, args=(csv_path, batch_size, queue), daemon=True)
+    proc.start()
+    try:
+        while True:
+            item = queue.get()
+            if item is None:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        proc.join(timeout=5)
+        if proc.is_alive():
+            proc.terminate()
 
-    # Clear existing data unless --append
-    if not append:
-        print("🧹 Clearing existing rows in tokens …")
-        conn.execute("DELETE FROM tokens;")
+def load_fast(conn: sqlite3.Connection, csv_path: str, batch_size: int = 50_000, parse_process: bool = False) -> int:
+    """
+    Bulk load into an empty tokens table: tuple rows, one transaction, idx_ref built after
+    the load. A bad row aborts (and rolls back) the whole load instead of being skipped.
+    """
+    conn.execute("DROP INDEX IF EXISTS idx_ref")
+    conn.commit()
+    batches = _queued_batches(csv_path, batch_size) if parse_process else iter_tuple_batches(csv_path, batch_size)
+    total = 0
+    conn.execute("BEGIN")
+    try:
+        for batch in batches:
+            conn.executemany(FAST_INSERT_SQL, batch)
+            total += len(batch)
+            print(f"  … inserted {total:,} rows", end="\r", flush=True)
         conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    print()
+    print("🗂️  Building idx_ref …")
+    ensure_schema(conn)
+    return total
 
-    # Stream CSV and insert in big batches
+def load_rows(conn: sqlite3.Connection, csv_path: str, batch_size: int = 50_000) -> Tuple[int, int]:
+    """Insert CSV rows in batches; a failing batch is retried row by row, skipping bad rows. Returns (inserted, bad)."""
     total = 0
     bad = 0
-    print(f"📥 Reading CSV: {csv_path}")
     with open(csv_path, "r", encoding="utf-8-sig", newline="") as f:
         reader = csv.DictReader(f)
         required = {"book_code","chapter","verse","token_index","surface","lemma","translit","gloss","morph","strong"}
@@ -127,7 +180,93 @@ def seed(csv_path: str,
                 conn.commit()
                 print(f"\n⚠️ Batch error; isolated bad rows so far: {bad:,}")
 
-    print(f"\n✅ Done. Inserted: {total:,} rows. Bad rows skipped: {bad:,}.")
+    print()
+    return total, bad
+
+def ensure_schema(conn: sqlite3.Connection):
+    """Create table/indexes if they don't exist (safe to run)."""
+    create_tokens(conn)
+
+def seed(csv_path: str,
+         db_path: str,
+         append: bool = False,
+         batch_size: int = 50_000,
+         vacuum: bool = False,
+         resolve: bool = True,
+         payloads: bool = False,
+         compact_tokens: bool = False,
+         fast: bool = False,
+         parse_process: bool = False):
+    if not os.path.isfile(csv_path):
+        raise FileNotFoundError(f"CSV not found: {csv_path}")
+
+    # Connect
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+
+    # Speed PRAGMAs (safe for bulk-loading)
+    conn.execute("PRAGMA synchronous=OFF;")
+    conn.execute("PRAGMA temp_store=MEMORY;")
+    conn.execute("PRAGMA cache_size=-200000;")  # ~200MB page cache
+
+    # Recreate the table unless --append, which also moves older databases to packed ids.
+    if not append:
+        print("🧹 Recreating tokens table …")
+        drop_tokens(conn)
+    ensure_schema(conn)
+    if not has_packed_ids(conn):
+        print("⚠️ tokens still uses AUTOINCREMENT ids; run tools/migrate_packed_ids.py after this append.")
+
+    # Stream CSV and insert in big batches
+    bad = 0
+    print(f"📥 Reading CSV: {csv_path}" + (" (fast)" if fast else ""))
+    t0 = time.perf_counter()
+    if fast:
+        total = load_fast(conn, csv_path, batch_size, parse_process)
+    else:
+        total, bad = load_rows(conn, csv_path, batch_size)
+    elapsed = time.perf_counter() - t0
+    print(f"✅ Done. Inserted: {total:,} rows in {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f} rows/s). "
+          f"Bad rows skipped: {bad:,}.")
+    if has_packed_ids(conn):
+        print(f"🔐 Recorded hashes of {record_verse_hashes(conn):,} verses (for --incremental)")
+
+    if resolve:
+        print("🔗 Materializing resolved lemma/translit/gloss …")
+        lex = Lexicon()
+        lex.load()
+        written, _ = materialize(conn, lex)
+        print(f"  resolved {written:,} rows (lexicon {lex.version})")
+
+    print("🗂️  Building derived lookup tables …")
+    build_indexes(conn)
+
+    print("📊 Building corpus statistics …")
+    lex = Lexicon()
+    lex.load()
+    st = build_stats(conn, lex)
+    print(f"  {st['rebuilt']} of {st['checked']} books re-aggregated")
+
+    print("🔗 Building Strong's collocations …")
+    build_collocations(conn, stored_windows(conn))  # refresh every wN scope present too
+
+    # Stored payloads describe the old tokens; rebuild them or drop them.
+    if payloads:
+        print("🧾 Building pre-serialized verse/chapter payloads …")
+        stats = build_payloads(conn, lex)
+        print(f"  stored {stats['verses']:,} verse + {stats['chapters']:,} chapter payloads ({stats['bytes'] / 1e6:.1f} MB)")
+    else:
+        clear_payloads(conn)
+
+    if fast:
+        print("📐 ANALYZE …")
+        conn.execute("ANALYZE;")
+        conn.commit()
+
+    if compact_tokens:
+        print("🗜️  Dictionary-encoding tokens …")
+        st = compact(conn)
+        print(f"  {st['tokens']:,} tokens -> {st['lexemes']:,} lexemes, {st['glosses']:,} glosses, {st['morphs']:,} morphs")
 
     if vacuum:
         print("🧽 VACUUM …")
@@ -136,6 +275,63 @@ def seed(csv_path: str,
     conn.close()
     print(f"📦 DB ready at: {db_path}")
 
+def seed_incremental(csv_path: str,
+                     db_path: str,
+                     batch_size: int = 50_000,
+                     resolve: bool = True,
+                     dry_run: bool = False):
+    """Rewrite only the verses whose content differs from the CSV (see reseed.py), then refresh derived tables."""
+    if not os.path.isfile(csv_path):
+        raise FileNotFoundError(f"CSV not found: {csv_path}")
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA temp_store=MEMORY;")
+    conn.execute("PRAGMA cache_size=-200000;")
+    if not is_compact(conn):  # the compact layout's tokens view is written through its triggers
+        ensure_schema(conn)
+    if not has_packed_ids(conn):
+        raise RuntimeError("--incremental needs packed token ids; run tools/migrate_packed_ids.py first.")
+
+    print(f"📥 Reading CSV: {csv_path} (incremental{', dry run' if dry_run else ''})")
+    t0 = time.perf_counter()
+    diff = reseed(conn, iter_tuple_batches(csv_path, batch_size), dry_run)
+    print(f"🔁 Verses: +{diff['added']:,} added, ~{diff['changed']:,} changed, -{diff['removed']:,} removed, "
+          f"{diff['unchanged']:,} unchanged ({diff['tokens']:,} tokens written) in {time.perf_counter() - t0:.1f}s")
+    for kind, refs in diff["samples"].items():
+        print(f"  {kind}: {', '.join(refs)}" + (" …" if diff[kind] > len(refs) else ""))
+    if dry_run or not diff["books"]:
+        conn.close()
+        print("📦 Nothing written." if dry_run else f"📦 DB already up to date: {db_path}")
+        return diff
+
+    books = diff["books"]
+    lex = Lexicon()
+    lex.load()
+    if resolve:
+        print("🔗 Materializing resolved lemma/translit/gloss …")
+        written, _ = materialize(conn, lex)
+        print(f"  resolved {written:,} rows (lexicon {lex.version})")
+
+    print("🗂️  Refreshing derived lookup tables …")
+    build_indexes(conn, ["structure", "strongs", "folded", "morph"])
+    print(f"  fts: refreshed {sync_fts(conn, lex):,} verses")
+
+    print("📊 Updating corpus statistics …")
+    st = build_stats(conn, lex, books)
+    print(f"  {st['rebuilt']} of {st['checked']} books re-aggregated")
+
+    print("🔗 Building Strong's collocations …")
+    build_collocations(conn, stored_windows(conn))  # refresh every wN scope present too
+
+    # Only the touched books' stored payloads are stale.
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='payloads'").fetchone() \
+            and conn.execute("SELECT 1 FROM payloads LIMIT 1").fetchone():
+        print(f"🧾 Rebuilding stored payloads for {', '.join(books)} …")
+        build_payloads(conn, lex, books)
+
+    conn.close()
+    print(f"📦 DB ready at: {db_path} ({time.perf_counter() - t0:.1f}s)")
+    return diff
+
 def parse_args():
     ap = argparse.ArgumentParser(description="Seed interlinear tokens into SQLite.")
     ap.add_argument("--csv", default=DEFAULT_CSV,
@@ -148,16 +344,53 @@ def parse_args():
                     help="Rows per transaction batch (default 50k).")
     ap.add_argument("--vacuum", action="store_true",
                     help="Run VACUUM after insert (shrinks DB).")
-    return ap.parse_args()
+    ap.add_argument("--no-resolve", action="store_true",
+                    help="Skip materializing resolved lemma/translit/gloss (API then resolves at runtime).")
+    ap.add_argument("--payloads", action="store_true",
+                    help="Also store pre-serialized verse/chapter JSON (payloads table; ~300 MB for the OT).")
+    ap.add_argument("--compact", action="store_true",
+                    help="Dictionary-encode tokens at the end (see compact.py).")
+    ap.add_argument("--fast", action="store_true",
+                    help="Bulk-load mode: tuple rows, one transaction, indexes built after the load, ANALYZE at the end. "
+                         "A bad row aborts the load instead of being skipped.")
+    ap.add_argument("--parse-process", action="store_true",
+                    help="With --fast, parse the CSV in a separate process feeding the writer through a queue.")
+    ap.add_argument("--incremental", action="store_true",
+                    help="Only rewrite verses whose tokens differ from the stored verse hashes (see reseed.py); "
+                         "books absent from the CSV are left alone.")
+    ap.add_argument("--dry-run", action="store_true",
+                    help="With --incremental, report added/changed/removed verses without writing.")
+    args = ap.parse_args()
+    if args.incremental and (args.append or args.fast or args.compact or args.vacuum or args.payloads):
+        ap.error("--incremental can't be combined with --append/--fast/--compact/--vacuum/--payloads")
+    if args.dry_run and not args.incremental:
+        ap.error("--dry-run requires --incremental")
+    if args.fast and args.append:
+        ap.error("--fast recreates the tokens table; it can't be combined with --append")
+    if args.parse_process and not args.fast:
+        ap.error("--parse-process requires --fast")
+    return args
 
 if __name__ == "__main__":
     args = parse_args()
     try:
-        seed(csv_path=args.csv,
-             db_path=args.db,
-             append=args.append,
-             batch_size=args.batch_size,
-             vacuum=args.vacuum)
+        if args.incremental:
+            seed_incremental(csv_path=args.csv,
+                             db_path=args.db,
+                             batch_size=args.batch_size,
+                             resolve=not args.no_resolve,
+                             dry_run=args.dry_run)
+        else:
+            seed(csv_path=args.csv,
+                 db_path=args.db,
+                 append=args.append,
+                 batch_size=args.batch_size,
+                 vacuum=args.vacuum,
+                 resolve=not args.no_resolve,
+                 payloads=args.payloads,
+                 compact_tokens=args.compact,
+                 fast=args.fast,
+                 parse_process=args.parse_process)
     except Exception as e:
         print(f"❌ Seeding failed: {e}", file=sys.stderr)
         sys.exit(1)
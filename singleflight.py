@@ -0,0 +1,72 @@
+# singleflight.py
+# Request coalescing: concurrent calls for the same key share one in-flight computation.
+# The in-flight slot is a concurrent.futures.Future, so sync callers (FastAPI threadpool
+# handlers) and async callers (await do_async(...)) can wait on the same computation.
+
+import asyncio, threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+        self.executions = 0    # computations actually run
+        self.deduplicated = 0  # callers served by someone else's computation
+        self.errors = 0
+
+    def _join(self, key: Hashable) -> Tuple[Future, bool]:
+        with self._lock:
+            fut = self._calls.get(key)
+            if fut is not None:
+                self.deduplicated += 1
+                return fut, False
+            fut = Future()
+            self._calls[key] = fut
+            self.executions += 1
+            return fut, True
+
+    def _finish(self, key: Hashable, fut: Future, result: Any = None, error: BaseException = None):
+        with self._lock:
+            self._calls.pop(key, None)
+            if error is not None:
+                self.errors += 1
+        if error is not None:
+            fut.set_exception(error)
+        else:
+            fut.set_result(result)
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Run fn() unless a call for key is already in flight; returns (result, shared)."""
+        fut, leader = self._join(key)
+        if not leader:
+            return fut.result(), True
+        try:
+            result = fn()
+        except BaseException as e:
+            self._finish(key, fut, error=e)
+            raise
+        self._finish(key, fut, result=result)
+        return result, False
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Async variant: awaits fn() or joins an in-flight call (sync or async) for key."""
+        fut, leader = self._join(key)
+        if not leader:
+            return await asyncio.wrap_future(fut), True
+        try:
+            result = await fn()
+        except BaseException as e:
+            self._finish(key, fut, error=e)
+            raise
+        self._finish(key, fut, result=result)
+        return result, False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "executions": self.executions,
+                "deduplicated": self.deduplicated,
+                "errors": self.errors,
+            }
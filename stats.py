@@ -0,0 +1,186 @@
+# stats.py
+# Corpus statistics build stage: aggregate tables the /stats endpoints read instead of
+# running GROUP BY over tokens per request. Runs at the end of seed.py and
+# apply_lexicon_to_db.py; on its own:
+#
+#   python stats.py [--db PATH] [--books GEN EXO ...] [--full]
+#
+# Each book's tokens are fingerprinted (content + lexicon version) and only books whose
+# fingerprint changed are re-aggregated; corpus-wide totals are then re-derived from the
+# per-book tables, which is cheap.
+#
+#   stat_books(book_code, testament, chapters, verses, tokens, lemmas, fingerprint)
+#   stat_lemma_book(strong, book_code, occurrences, first_ref)  — lemma frequency per book
+#   stat_lemma_totals(strong, occurrences, books, first_ref)     — corpus-wide; hapax = occurrences 1
+#   stat_chapter_glosses(book_code, chapter, rank, gloss, strong, occurrences)  — top glosses
+
+import os, sqlite3, argparse, hashlib, time
+from collections import Counter
+from typing import Dict, Iterable, List
+
+from books import book_ordinal, pack_ref, testament
+from indexes import resolver
+from lexicon import Lexicon
+from strongs import strong_ids
+
+BASE_DIR = os.path.dirname(__file__)
+DB_PATH = os.environ.get("INTERLINEAR_DB", os.path.join(BASE_DIR, "interlinear.sqlite3"))
+
+TOP_GLOSSES = int(os.environ.get("INTERLINEAR_STATS_TOP_GLOSSES", "25"))  # kept per chapter
+
+STATS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS stat_books (
+    book_code TEXT PRIMARY KEY,
+    testament TEXT NOT NULL,
+    chapters INTEGER NOT NULL,
+    verses INTEGER NOT NULL,
+    tokens INTEGER NOT NULL,
+    lemmas INTEGER NOT NULL,     -- distinct Strong's ids in the book
+    fingerprint TEXT NOT NULL    -- sha1 of the book's tokens + lexicon version
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS stat_lemma_book (
+    strong TEXT NOT NULL,        -- normalized, e.g. H7225
+    book_code TEXT NOT NULL,
+    occurrences INTEGER NOT NULL,
+    first_ref INTEGER NOT NULL,  -- books.pack_ref of the first occurrence in the book
+    PRIMARY KEY (strong, book_code)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_stat_lemma_book ON stat_lemma_book(book_code, occurrences);
+CREATE TABLE IF NOT EXISTS stat_lemma_totals (
+    strong TEXT PRIMARY KEY,
+    occurrences INTEGER NOT NULL,
+    books INTEGER NOT NULL,
+    first_ref INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_stat_lemma_totals ON stat_lemma_totals(occurrences, first_ref);
+CREATE TABLE IF NOT EXISTS stat_chapter_glosses (
+    book_code TEXT NOT NULL,
+    chapter INTEGER NOT NULL,
+    rank INTEGER NOT NULL,       -- 1 = most frequent
+    gloss TEXT NOT NULL,         -- lexicon-resolved gloss, as the API shows it
+    strong TEXT NOT NULL,
+    occurrences INTEGER NOT NULL,
+    PRIMARY KEY (book_code, chapter, rank)
+) WITHOUT ROWID;
+"""
+
+STAT_TABLES = ("stat_books", "stat_lemma_book", "stat_chapter_glosses")  # per-book rows
+
+BOOK_SQL = """
+    SELECT chapter, verse, token_index, surface, strong, lemma, translit, gloss, morph
+    FROM tokens
+    WHERE book_code=?
+    ORDER BY chapter, verse, token_index
+"""
+
+def fingerprint(rows: List[tuple], lex_version: str) -> str:
+    h = hashlib.sha1(lex_version.encode())
+    for r in rows:
+        h.update("\x1f".join("" if v is None else str(v) for v in r).encode("utf-8"))
+        h.update(b"\x1e")
+    return h.hexdigest()
+
+def aggregate_book(code: str, rows: List[tuple], resolve) -> Dict[str, list]:
+    """Per-book stat rows from the book's tokens (BOOK_SQL order)."""
+    default_lang = "H" if testament(code) == "OT" else "G"
+    lemma_n: Counter = Counter()
+    first: Dict[str, int] = {}
+    glosses: Dict[int, Counter] = {}
+    verses = set()
+    for ch, vs, idx, _surface, strong, lemma, transl, gloss, _morph in rows:
+        verses.add((ch, vs))
+        ids = strong_ids(strong, default_lang)
+        for _, lang, num in ids:
+            key = f"{lang}{num}"
+            lemma_n[key] += 1
+            first.setdefault(key, pack_ref(code, ch, vs, idx))  # rows arrive in canonical order
+        r_gloss = resolve(strong, lemma, transl, gloss)[2].strip()
+        if r_gloss:
+            main = f"{ids[-1][1]}{ids[-1][2]}" if ids else ""
+            glosses.setdefault(ch, Counter())[(r_gloss, main)] += 1
+
+    top = []
+    for ch, counter in glosses.items():
+        ranked = sorted(counter.items(), key=lambda kv: (-kv[1], kv[0]))[:TOP_GLOSSES]
+        top += [(code, ch, rank, g, s, n) for rank, ((g, s), n) in enumerate(ranked, 1)]
+    return {
+        "book": [(code, testament(code), len({ch for ch, _ in verses}), len(verses), len(rows), len(lemma_n))],
+        "lemmas": [(key, code, n, first[key]) for key, n in lemma_n.items()],
+        "glosses": top,
+    }
+
+def _delete_book(conn: sqlite3.Connection, code: str):
+    for table in STAT_TABLES:
+        conn.execute(f"DELETE FROM {table} WHERE book_code=?", (code,))
+
+def rebuild_totals(conn: sqlite3.Connection):
+    conn.execute("DELETE FROM stat_lemma_totals")
+    conn.execute("""
+        INSERT INTO stat_lemma_totals(strong, occurrences, books, first_ref)
+        SELECT strong, SUM(occurrences), COUNT(*), MIN(first_ref)
+        FROM stat_lemma_book
+        GROUP BY strong
+    """)
+
+def build_stats(conn: sqlite3.Connection, lex: Lexicon, books: Iterable[str] = (), full: bool = False) -> Dict[str, int]:
+    """
+    Re-aggregate books whose tokens (or the lexicon) changed since the last run; all of them
+    if full. `books` limits which books are checked. Returns counts of books checked/rebuilt/removed.
+    """
+    conn.executescript(STATS_SCHEMA)
+    present = [r[0] for r in conn.execute("SELECT DISTINCT book_code FROM tokens")]
+    stored = dict(conn.execute("SELECT book_code, fingerprint FROM stat_books").fetchall())
+    wanted = [b.upper() for b in books] or present
+    wanted.sort(key=lambda b: (book_ordinal(b) or 10_000, b))
+
+    stats = {"checked": 0, "rebuilt": 0, "removed": 0}
+    for code in set(stored) - set(present):
+        _delete_book(conn, code)
+        stats["removed"] += 1
+
+    resolve = resolver(lex)
+    for code in wanted:
+        rows = conn.execute(BOOK_SQL, (code,)).fetchall()
+        stats["checked"] += 1
+        if not rows:
+            continue
+        fp = fingerprint(rows, lex.version)
+        if not full and stored.get(code) == fp:
+            continue
+        agg = aggregate_book(code, rows, resolve)
+        _delete_book(conn, code)
+        conn.executemany("INSERT INTO stat_books(book_code, testament, chapters, verses, tokens, lemmas, fingerprint) "
+                         "VALUES (?,?,?,?,?,?,?)", [(*agg["book"][0], fp)])
+        conn.executemany("INSERT INTO stat_lemma_book(strong, book_code, occurrences, first_ref) VALUES (?,?,?,?)",
+                         agg["lemmas"])
+        conn.executemany("INSERT INTO stat_chapter_glosses(book_code, chapter, rank, gloss, strong, occurrences) "
+                         "VALUES (?,?,?,?,?,?)", agg["glosses"])
+        stats["rebuilt"] += 1
+        print(f"  … {code}: {len(rows):,} tokens", end="\r", flush=True)
+
+    if stats["rebuilt"] or stats["removed"]:
+        rebuild_totals(conn)
+    conn.commit()
+    print()
+    return stats
+
+def main():
+    ap = argparse.ArgumentParser(description="Build corpus statistics tables for the /stats endpoints.")
+    ap.add_argument("--db", default=DB_PATH, help=f"SQLite path (default: {DB_PATH} or $INTERLINEAR_DB)")
+    ap.add_argument("--books", nargs="*", default=[], help="Only check these book_code(s).")
+    ap.add_argument("--full", action="store_true", help="Rebuild every book, even if unchanged.")
+    args = ap.parse_args()
+
+    lex = Lexicon()
+    lex.load()
+    conn = sqlite3.connect(args.db)
+    t0 = time.perf_counter()
+    try:
+        stats = build_stats(conn, lex, args.books, args.full)
+    finally:
+        conn.close()
+    print(f"Statistics: {stats['rebuilt']} of {stats['checked']} books rebuilt, {stats['removed']} removed "
+          f"in {time.perf_counter() - t0:.1f}s (lexicon {lex.version}).")
+
+if __name__ == "__main__":
+    main()
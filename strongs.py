@@ -0,0 +1,88 @@
+# strongs.py — one Strong's-key resolver for the API, the lexicon loader and the build tools.
+#
+# Raw strong values come in many shapes: "H7225", "G3056", "7225", "b/7225" (OSHB morpheme
+# prefixes), "c/d/776", "1254 a". norm_strong_keys() turns one into the ordered lexicon keys
+# to probe. Bulk jobs see the same few thousand distinct strings hundreds of thousands of
+# times, so results are memoized on (raw, bias).
+
+import os, re
+from functools import lru_cache
+from typing import Optional, Tuple
+
+MEMO_SIZE = int(os.environ.get("INTERLINEAR_STRONG_MEMO", "65536"))
+
+_SPLIT = re.compile(r"[,\s/;]+")
+_PREFIXED = re.compile(r"^([HhGg])(\d+)[A-Za-z]?$")  # H7225, g3056, H1254a
+_NON_DIGIT = re.compile(r"\D")
+
+# Candidate order for bare numbers ("7225"), by testament bias.
+_BARE_ORDER = {
+    None: ("H", "G", ""),   # API / apply_lexicon_to_db.py default
+    "H":  ("H", "", "G"),   # OT tools: prefer Hebrew
+    "G":  ("G", "", "H"),   # NT tools: prefer Greek
+}
+
+def norm_strong_keys(raw: str, bias: Optional[str] = None) -> Tuple[str, ...]:
+    """
+    Ordered, de-duplicated lexicon keys for a raw strong value.
+    Explicit prefixes are kept (H7225 -> H7225, 7225); bare numbers expand per bias
+    (None: H, G, bare; "H": H, bare, G; "G": G, bare, H). Morpheme prefixes like the
+    "b" in "b/7225" carry no digits and are skipped.
+    """
+    if not raw:
+        return ()
+    return _norm_cached(raw, bias.upper() if bias else None)
+
+@lru_cache(maxsize=MEMO_SIZE)
+def _norm_cached(raw: str, bias: Optional[str]) -> Tuple[str, ...]:
+    order = _BARE_ORDER[bias]
+    keys = []
+    for p in _SPLIT.split(raw.strip()):
+        if not p:
+            continue
+        m = _PREFIXED.match(p)
+        if m:
+            num = m.group(2)
+            keys += [m.group(1).upper() + num, num]
+        else:
+            num = _NON_DIGIT.sub("", p)
+            if num:
+                keys += [pre + num for pre in order]
+    # dedupe preserving order
+    return tuple(dict.fromkeys(keys))
+
+def strong_ids(raw: str, default_lang: str = "H") -> Tuple[Tuple[int, str, int], ...]:
+    """
+    Normalized ids for a raw strong value, one per numbered morpheme:
+    (morpheme position, "H"|"G", number). Bare numbers take default_lang (the testament's
+    language). "c/d/776" -> ((2, "H", 776),); "G3056" -> ((0, "G", 3056),).
+    """
+    if not raw:
+        return ()
+    return _ids_cached(raw, default_lang.upper())
+
+@lru_cache(maxsize=MEMO_SIZE)
+def _ids_cached(raw: str, default_lang: str) -> Tuple[Tuple[int, str, int], ...]:
+    out = []
+    for pos, p in enumerate(x for x in _SPLIT.split(raw.strip()) if x):
+        m = _PREFIXED.match(p)
+        if m:
+            out.append((pos, m.group(1).upper(), int(m.group(2))))
+        else:
+            num = _NON_DIGIT.sub("", p)
+            if num:
+                out.append((pos, default_lang, int(num)))
+    return tuple(out)
+
+def parse_strong_id(s: str) -> Optional[Tuple[str, int]]:
+    """Parse a prefixed Strong's number: "H7225" -> ("H", 7225); None for anything else."""
+    m = _PREFIXED.match((s or "").strip())
+    return (m.group(1).upper(), int(m.group(2))) if m else None
+
+def memo_stats():
+    info = _norm_cached.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "size": info.currsize, "max_size": info.maxsize}
+
+def clear_memo():
+    _norm_cached.cache_clear()
+    _ids_cached.cache_clear()
@@ -0,0 +1,78 @@
+# tools/bench_backends.py
+# Compare the SQLite and columnar token backends (INTERLINEAR_BACKEND): one-off load cost and
+# memory footprint of the column store, then verse/chapter/passage build latency for both.
+
+import os, sys, time, random, argparse, tracemalloc
+
+BASE = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, BASE)
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark the sqlite vs columnar token backends.")
+    ap.add_argument("--db", default=os.environ.get("INTERLINEAR_DB", os.path.join(BASE, "interlinear.sqlite3")))
+    ap.add_argument("--samples", type=int, default=50, help="Chapters sampled (each also samples one verse and a passage).")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    os.environ["INTERLINEAR_DB"] = args.db
+    os.environ["INTERLINEAR_BACKEND"] = "columnar"
+    import app  # reads INTERLINEAR_DB / INTERLINEAR_BACKEND at import
+    from colstore import ColumnStore
+
+    # Load once under tracemalloc for the real heap cost (includes transient load garbage as peak).
+    conn = app.POOL.open()
+    tracemalloc.start()
+    store = ColumnStore.load(conn, app.LEX)
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    mem = store.memory_report()
+    app._STORE = store
+
+    print(f"db: {args.db}")
+    print(f"column store: {mem['tokens']:,} tokens, {mem['verses']:,} verses, loaded in {mem['load_ms']:.0f} ms (traced)")
+    for k, v in mem["bytes"].items():
+        print(f"  {k:13} {v / 1e6:8.1f} MB")
+    print(f"  {'traced heap':13} {held / 1e6:8.1f} MB (peak during load {peak / 1e6:.1f} MB)")
+    print("  distinct strings: " + ", ".join(f"{k}={v:,}" for k, v in mem["distinct_strings"].items()))
+
+    chapters = conn.execute("SELECT DISTINCT book_code, chapter FROM tokens").fetchall()
+    rnd = random.Random(1)
+    picks = rnd.sample(chapters, min(args.samples, len(chapters)))
+    # Always include the heaviest chapter.
+    picks.append(conn.execute("SELECT book_code, chapter FROM tokens GROUP BY book_code, chapter "
+                              "ORDER BY COUNT(*) DESC LIMIT 1").fetchone())
+    cases = []
+    for code, ch in picks:
+        name = app.BOOK_CODES.get(code, code)
+        verses = [r[0] for r in conn.execute("SELECT DISTINCT verse FROM tokens WHERE book_code=? AND chapter=? ORDER BY verse",
+                                             (code, ch))]
+        vs = rnd.choice(verses)
+        ev = verses[min(len(verses) - 1, verses.index(vs) + 9)]  # up to a ten-verse passage
+        cases += [("verse", lambda c=code, n=name, h=ch, v=vs: app.build_verse_payload(c, n, h, v)),
+                  ("chapter", lambda c=code, n=name, h=ch: app.build_chapter_payload(c, n, h)),
+                  ("passage", lambda c=code, n=name, h=ch, v=vs, e=ev: app.build_range_payload(c, n, h, v, h, e))]
+    conn.close()
+
+    totals = {kind: {"sqlite": 0.0, "columnar": 0.0} for kind, _ in cases}
+    for backend in ("sqlite", "columnar"):
+        app.BACKEND = backend
+        for kind, build in cases:
+            totals[kind][backend] += timed(build, args.repeat)
+
+    n = len(picks)
+    print(f"samples: {n} each (best of {args.repeat})")
+    print(f"{'':8} {'sqlite':>10} {'columnar':>10} {'speedup':>8}")
+    for kind, t in totals.items():
+        print(f"{kind:8} {t['sqlite'] / n * 1e3:8.2f}ms {t['columnar'] / n * 1e3:8.2f}ms "
+              f"{t['sqlite'] / t['columnar']:7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# tools/bench_payloads.py
+# Compare serving chapters/verses by runtime enrichment + JSON encoding against returning the
+# pre-serialized bytes from the payloads table (built by payloads.py).
+
+import os, sys, time, random, argparse
+
+BASE = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, BASE)
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark runtime serialization vs stored payloads.")
+    ap.add_argument("--db", default=os.environ.get("INTERLINEAR_DB", os.path.join(BASE, "interlinear.sqlite3")))
+    ap.add_argument("--samples", type=int, default=50, help="Chapters sampled (each also samples one verse).")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    os.environ["INTERLINEAR_DB"] = args.db
+    import app  # reads INTERLINEAR_DB at import
+
+    if not app.has_payloads():
+        raise SystemExit("No payloads table; run `python payloads.py` first.")
+    conn = app.get_conn()
+    chapters = conn.execute("SELECT book_code, chapter FROM payloads WHERE verse = 0").fetchall()
+    rnd = random.Random(1)
+    picks = rnd.sample(chapters, min(args.samples, len(chapters)))
+    # Always include the heaviest chapter.
+    picks.append(conn.execute("SELECT book_code, chapter FROM payloads WHERE verse = 0 ORDER BY length(body) DESC LIMIT 1").fetchone())
+
+    totals = {"chapter": [0.0, 0.0, 0.0, 0], "verse": [0.0, 0.0, 0.0, 0]}  # query+shape, encode, stored, bytes
+    for code, ch in picks:
+        name = app.BOOK_CODES.get(code, code)
+        vs = conn.execute("SELECT verse FROM payloads WHERE book_code=? AND chapter=? AND verse > 0 ORDER BY verse LIMIT 1",
+                          (code, ch)).fetchone()[0]
+        for kind, build, verse in (("chapter", lambda: app.build_chapter_payload(code, name, ch), 0),
+                                   ("verse", lambda: app.build_verse_payload(code, name, ch, vs), vs)):
+            payload = build()
+            t = totals[kind]
+            t[0] += timed(build, args.repeat)
+            t[1] += timed(lambda: app._json_bytes(payload), args.repeat)
+            t[2] += timed(lambda: app.stored_payload(code, ch, verse), args.repeat)
+            t[3] += len(app.stored_payload(code, ch, verse))
+
+    n = len(picks)
+    print(f"db: {args.db} | samples: {n} chapters + {n} verses (best of {args.repeat})")
+    print(f"{'':8} {'query+enrich':>13} {'json encode':>12} {'runtime total':>14} {'stored read':>13} {'speedup':>8} {'avg bytes':>10}")
+    for kind, (build, enc, stored, nbytes) in totals.items():
+        print(f"{kind:8} {build / n * 1e3:11.2f}ms {enc / n * 1e3:10.2f}ms {(build + enc) / n * 1e3:12.2f}ms "
+              f"{stored / n * 1e3:11.3f}ms {(build + enc) / stored:7.0f}x {nbytes / n:10,.0f}")
+    total = conn.execute("SELECT COUNT(*), SUM(length(body)) FROM payloads").fetchone()
+    print(f"payloads table: {total[0]:,} rows, {total[1] / 1e6:.1f} MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# tools/bench_seed.py
+# Token load throughput of seed.py: the default batch/dict path vs --fast (tuple rows, one
+# transaction, idx_ref after the load) vs --fast --parse-process. Only the load into an
+# empty tokens table is timed, not the derived build stages. --record appends one JSON
+# line per run so throughput can be tracked over time.
+
+import os, sys, json, time, sqlite3, argparse, tempfile
+from datetime import datetime, timezone
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE)
+import seed
+from db import create_tokens
+
+MODES = ("default", "fast", "fast+process")
+
+def run(mode: str, csv_path: str, batch_size: int, workdir: str) -> dict:
+    path = os.path.join(workdir, f"bench_{mode.replace('+', '_')}.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA synchronous=OFF;")
+    conn.execute("PRAGMA temp_store=MEMORY;")
+    conn.execute("PRAGMA cache_size=-200000;")  # as seed.py
+    create_tokens(conn)
+    t0 = time.perf_counter()
+    if mode == "default":
+        rows, _ = seed.load_rows(conn, csv_path, batch_size)
+    else:
+        rows = seed.load_fast(conn, csv_path, batch_size, parse_process=mode == "fast+process")
+    elapsed = time.perf_counter() - t0
+    conn.close()
+    return {"mode": mode, "rows": rows, "seconds": round(elapsed, 3), "rows_per_sec": round(rows / elapsed)}
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark seed.py token load modes.")
+    ap.add_argument("--csv", default=seed.DEFAULT_CSV, help="Normalized tokens CSV (e.g. the full OT+NT).")
+    ap.add_argument("--modes", nargs="*", default=list(MODES), choices=MODES)
+    ap.add_argument("--batch-size", type=int, default=50_000)
+    ap.add_argument("--record", help="Append results as JSON lines to this file.")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        results = [run(mode, args.csv, args.batch_size, workdir) for mode in args.modes]
+
+    base = results[0]["rows_per_sec"]
+    print(f"csv: {args.csv}")
+    print(f"{'mode':14} {'rows':>10} {'seconds':>9} {'rows/s':>10} {'vs first':>9}")
+    for r in results:
+        print(f"{r['mode']:14} {r['rows']:10,} {r['seconds']:9.2f} {r['rows_per_sec']:10,} {r['rows_per_sec'] / base:8.1f}x")
+    if args.record:
+        stamp = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        with open(args.record, "a", encoding="utf-8") as f:
+            for r in results:
+                f.write(json.dumps({"at": stamp, "csv": os.path.basename(args.csv), **r}) + "\n")
+
+if __name__ == "__main__":
+    main()
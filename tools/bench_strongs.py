@@ -0,0 +1,111 @@
+# tools/bench_strongs.py
+# Micro-benchmark: per-token cost of Strong's-key normalization, the old per-call regex
+# version vs strongs.norm_strong_keys (precompiled + memoized).
+# Uses the strong column of the DB when available, otherwise OSHB-shaped samples built
+# from data/strongs_lexicon.csv.
+
+import os, re, sys, csv, time, random, sqlite3, argparse
+
+BASE = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, BASE)
+import strongs
+
+DB = os.environ.get("INTERLINEAR_DB", os.path.join(BASE, "interlinear.sqlite3"))
+STRONGS_CSV = os.path.join(BASE, "data", "strongs_lexicon.csv")
+
+def legacy_norm_strong_keys(raw: str):
+    """The resolver as it was copied into app.py / apply_lexicon_to_db.py."""
+    if not raw:
+        return []
+    parts = re.split(r"[,\s/;]+", raw.strip())
+    keys = []
+    for p in parts:
+        if not p:
+            continue
+        if re.match(r"^[HhGg]\d+$", p):
+            prefix = p[0].upper(); num = re.sub(r"\D", "", p[1:])
+            if num:
+                keys += [prefix+num, num]
+        else:
+            num = re.sub(r"\D", "", p)
+            if num:
+                keys += ["H"+num, "G"+num, num]
+    seen = set(); out=[]
+    for k in keys:
+        if k not in seen:
+            seen.add(k); out.append(k)
+    return out
+
+def sample_from_db(path: str, limit: int):
+    if not os.path.isfile(path):
+        return []
+    con = sqlite3.connect(path)
+    try:
+        return [r[0] or "" for r in con.execute("SELECT strong FROM tokens ORDER BY id LIMIT ?", (limit,))]
+    except sqlite3.Error:
+        return []
+    finally:
+        con.close()
+
+def sample_synthetic(limit: int, seed: int = 7):
+    rnd = random.Random(seed)
+    nums = []
+    with open(STRONGS_CSV, "r", encoding="utf-8-sig", newline="") as f:
+        for row in csv.DictReader(f):
+            s = (row.get("strong") or "").strip()
+            if s.startswith("H"):
+                nums.append(s[1:])
+    # Zipf-ish reuse of a few thousand lemmas, OSHB prefix shapes mixed in.
+    hot = nums[:3000]
+    shapes = ["{n}", "b/{n}", "c/{n}", "c/d/{n}", "l/{n}", "{n} a", "H{n}", "d/{n}"]
+    out = []
+    for _ in range(limit):
+        n = hot[min(int(rnd.paretovariate(1.1)) - 1, len(hot) - 1)]
+        out.append(rnd.choice(shapes).format(n=n))
+    return out
+
+def per_token_ns(fn, data, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter_ns()
+        for s in data:
+            fn(s)
+        best = min(best, (time.perf_counter_ns() - t0) / len(data))
+    return best
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark Strong's-key normalization per token.")
+    ap.add_argument("--db", default=DB)
+    ap.add_argument("--tokens", type=int, default=300_000, help="Tokens to normalize per run.")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    data = sample_from_db(args.db, args.tokens)
+    source = f"db:{args.db}"
+    if not data:
+        data = sample_synthetic(args.tokens)
+        source = "synthetic (strongs_lexicon.csv)"
+
+    mismatches = sum(1 for s in set(data)
+                     if tuple(legacy_norm_strong_keys(s)) != strongs.norm_strong_keys(s))
+
+    legacy = per_token_ns(legacy_norm_strong_keys, data, args.repeat)
+
+    def cold(s):
+        strongs.clear_memo()
+        return strongs.norm_strong_keys(s)
+    uncached = per_token_ns(cold, data, 1)
+
+    strongs.clear_memo()
+    warm = per_token_ns(strongs.norm_strong_keys, data, args.repeat)
+
+    print(f"source: {source} | tokens: {len(data):,} | distinct: {len(set(data)):,}")
+    print(f"  legacy (re per call)       {legacy:8.0f} ns/token")
+    print(f"  strongs.py, memo disabled  {uncached:8.0f} ns/token")
+    print(f"  strongs.py, memoized       {warm:8.0f} ns/token  ({legacy / warm:.1f}x)")
+    print(f"  memo: {strongs.memo_stats()}")
+    if mismatches:
+        print(f"  note: {mismatches} distinct inputs differ from legacy keys (e.g. H1254a keeps its H prefix)")
+
+if __name__ == "__main__":
+    main()
@@ -1,44 +1,51 @@
 # tools/export_ot_interlinear.py
-# Export OT interlinear JSON without relying on strong LIKE 'H%'.
-# Detect OT per-verse by normalizing token strongs and checking for an H#### candidate.
+# Export static interlinear JSON, one file per verse: out/ot/{BOOK}/{chapter}/{verse}.json
+# (and out/nt/... with --testament nt|all).
+#
+# OT verses are detected without relying on strong LIKE 'H%': a verse is OT when any token's
+# normalized strongs (OT bias) include an H#### candidate. NT verses are those of NT books;
+# their strongs resolve with Greek bias, falling back to greek_lexicon.csv by lemma.
+#
+# Each book is read once in reference order and serialized compactly (--pretty for indent=2).
+# Books are sharded across worker processes. A per-book .hashes.json records each file's
+# sha1, so unchanged files are not rewritten, files of verses no longer exported are removed,
+# and changed files are written to a temp file and renamed into place.
+# --write-db stores the resolved fields on the tokens and refreshes what derives from them
+# (materialized columns, search index, statistics, stored payloads) for the rewritten books.
 
-import os, re, csv, json, argparse, sqlite3
+import os, sys, csv, json, time, hashlib, argparse, sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from functools import partial
+from itertools import groupby
+from typing import Dict, List
 
-BASE = os.path.dirname(os.path.dirname(__file__))
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE)
+from books import book_ordinal, pack_ref, testament
+from db import has_packed_ids
+from strongs import norm_strong_keys as _norm_strong_keys
+from indexes import sync_fts
+from lexicon import Lexicon
+from materialize_resolved import materialize
+from payloads import build_payloads, has_stored_payloads
+from stats import build_stats
+
+# OT bias: digits-only strongs try H#### before the bare number and G####.
+norm_strong_keys = partial(_norm_strong_keys, bias="H")
+nt_strong_keys = partial(_norm_strong_keys, bias="G")
 DATA = os.path.join(BASE, "data")
-OUT  = os.path.join(BASE, "out", "ot")
+OUT  = os.path.join(BASE, "out")
 DB   = os.environ.get("INTERLINEAR_DB", os.path.join(BASE, "interlinear.sqlite3"))
 STRONGS_CSV = os.path.join(DATA, "strongs_lexicon.csv")  # strong,lemma,translit,gloss
+GREEK_CSV   = os.path.join(DATA, "greek_lexicon.csv")    # lemma,translit,gloss (optional)
+HASHES = ".hashes.json"  # per book directory: {"chapter/verse.json": sha1}
+
+BOOK_COLS = "id, chapter, verse, token_index, surface, lemma, translit, gloss, morph, strong"
 
 def ensure_dir(p): os.makedirs(p, exist_ok=True)
-def clean(s): 
-    import re as _re; return _re.sub(r"\s+", " ", (s or "").strip())
-
-def norm_strong_keys(raw: str):
-    """Return candidate strong keys, preferring Hebrew for digits-only (OT bias)."""
-    if not raw: return ()
-    parts = re.split(r"[,\s/;]+", raw.strip())
-    keys = []
-    for p in parts:
-        p = p.strip()
-        if not p: continue
-        if re.match(r"^[HhGg]\d+$", p):
-            prefix = p[0].upper()
-            num = re.sub(r"\D", "", p[1:])
-            if num:
-                keys += [prefix+num, num]        # e.g., H7225, 7225
-        else:
-            num = re.sub(r"\D", "", p)
-            if num:
-                keys += ["H"+num, num, "G"+num]  # prefer Hebrew first
-    # dedupe preserving order
-    seen, out = set(), []
-    for k in keys:
-        if k not in seen:
-            seen.add(k); out.append(k)
-    return tuple(out)
-
-def load_strongs_map(path: str):
+
+def load_strongs_map(path: str, keys=norm_strong_keys):
     if not os.path.isfile(path):
         raise SystemExit(f"Missing {path}. Put strongs_lexicon.csv in ./data/")
     out = {}
@@ -50,116 +57,206 @@ def load_strongs_map(path: str):
             entry = {"lemma": (row.get("lemma") or "").strip(),
                      "translit": (row.get("translit") or "").strip(),
                      "gloss": (row.get("gloss") or "").strip()}
-            for k in norm_strong_keys(s):
+            for k in keys(s):
                 out[k] = entry
     return out
 
-def export_verse(book_code, chapter, verse, tokens, out_base):
-    payload = {
+def load_greek_map(path: str):
+    if not os.path.isfile(path):
+        return {}
+    out = {}
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        for row in csv.DictReader(f):
+            lemma = (row.get("lemma") or "").strip()
+            if lemma:
+                out[lemma] = {"lemma": lemma, "translit": (row.get("translit") or "").strip(),
+                              "gloss": (row.get("gloss") or "").strip()}
+    return out
+
+# Per worker process: lexicon maps, loaded once by init_worker().
+_MAPS: Dict[str, dict] = {}
+
+def init_worker():
+    _MAPS["ot"] = load_strongs_map(STRONGS_CSV)
+    _MAPS["nt"] = load_strongs_map(STRONGS_CSV, nt_strong_keys)
+    _MAPS["greek"] = load_greek_map(GREEK_CSV)
+
+def is_ot_verse(rows) -> bool:
+    # any token whose normalized candidates include an H#### key
+    return any(k.startswith("H") for r in rows for k in norm_strong_keys(r[9] or ""))
+
+def verse_payload(book_code, chapter, verse, rows, part: str, updates: list) -> dict:
+    strongs = _MAPS[part]
+    keys = norm_strong_keys if part == "ot" else nt_strong_keys
+    tokens = []
+    for pk, _ch, _vs, index, surface, lemma, transl, gloss, morph, strong in rows:
+        surface, lemma, transl = surface or "", lemma or "", transl or ""
+        gloss, morph, strong = gloss or "", morph or "", strong or ""
+        resolved = next((strongs[k] for k in keys(strong) if k in strongs), None)
+        if resolved is None and part == "nt":
+            resolved = _MAPS["greek"].get(lemma.strip())
+        resolved = resolved or {}
+
+        r_lemma  = lemma  or resolved.get("lemma", "")
+        r_transl = transl or resolved.get("translit", "")
+        r_gloss  = gloss  or resolved.get("gloss", "")
+        if (r_lemma, r_transl, r_gloss) != (lemma, transl, gloss):
+            updates.append((r_lemma, r_transl, r_gloss, pk))
+
+        tokens.append({
+            "surface": surface, "lemma": lemma, "translit": transl, "gloss": gloss,
+            "morph": morph, "strong": strong, "index": int(index),
+            "resolved_lemma": r_lemma, "resolved_translit": r_transl, "resolved_gloss": r_gloss,
+            "translation": r_gloss
+        })
+    return {
         "reference": f"{book_code} {chapter}:{verse}",
         "book": book_code, "book_code": book_code,
         "chapter": chapter, "verse": verse,
         "tokens": tokens,
     }
-    dirp = os.path.join(out_base, book_code, str(chapter))
-    ensure_dir(dirp)
-    fp = os.path.join(dirp, f"{verse}.json")
-    with open(fp, "w", encoding="utf-8") as f:
-        json.dump(payload, f, ensure_ascii=False, indent=2)
-    return fp
+
+def write_atomic(path: str, body: bytes):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(body)
+    os.replace(tmp, path)
+
+def iter_book_rows(conn: sqlite3.Connection, book: str):
+    """All of a book's tokens, in reference order, in one query."""
+    if has_packed_ids(conn):
+        return conn.execute(f"SELECT {BOOK_COLS} FROM tokens WHERE id BETWEEN ? AND ? ORDER BY id",
+                            (pack_ref(book, 0, 0, 0), pack_ref(book, 999, 999, 999)))
+    return conn.execute(f"SELECT {BOOK_COLS} FROM tokens WHERE book_code=? ORDER BY chapter, verse, token_index",
+                        (book,))
+
+def export_book(book: str, out_base: str, db_path: str, pretty: bool, collect_updates: bool) -> Dict[str, object]:
+    """Export one book's verses (runs in a worker). Returns counters and, if asked, DB updates."""
+    t0 = time.perf_counter()
+    part = "nt" if testament(book) == "NT" else "ot"
+    stats = {"book": book, "verses": 0, "tokens": 0, "written": 0, "unchanged": 0, "removed": 0,
+             "bytes": 0, "seconds": 0.0, "updates": []}
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    book_dir = os.path.join(out_base, part, book)
+    manifest_path = os.path.join(book_dir, HASHES)
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            old_hashes: Dict[str, str] = json.load(f)
+    except (OSError, ValueError):
+        old_hashes = {}
+    hashes: Dict[str, str] = {}
+    updates: List[tuple] = []
+    dump = partial(json.dumps, ensure_ascii=False, indent=2) if pretty else \
+        partial(json.dumps, ensure_ascii=False, separators=(",", ":"))
+    try:
+        for (ch, vs), rows in groupby(iter_book_rows(conn, book), key=lambda r: (r[1], r[2])):
+            rows = list(rows)
+            if part == "ot" and not is_ot_verse(rows):
+                continue  # skip NT-like verses
+            payload = verse_payload(book, int(ch), int(vs), rows, part, updates)
+            body = dump(payload).encode("utf-8")
+            rel = f"{int(ch)}/{int(vs)}.json"
+            digest = hashlib.sha1(body).hexdigest()
+            hashes[rel] = digest
+            path = os.path.join(book_dir, rel)
+            if old_hashes.get(rel) == digest and os.path.exists(path):
+                stats["unchanged"] += 1
+            else:
+                ensure_dir(os.path.dirname(path))
+                write_atomic(path, body)
+                stats["written"] += 1
+            stats["verses"] += 1
+            stats["tokens"] += len(rows)
+            stats["bytes"] += len(body)
+    finally:
+        conn.close()
+    for rel in set(old_hashes) - set(hashes):
+        try:
+            os.remove(os.path.join(book_dir, rel))
+            stats["removed"] += 1
+        except OSError:
+            pass
+    if hashes or old_hashes:
+        ensure_dir(book_dir)
+        write_atomic(manifest_path, json.dumps(hashes, sort_keys=True).encode("utf-8"))
+    if collect_updates:
+        stats["updates"] = updates
+    stats["seconds"] = time.perf_counter() - t0
+    return stats
 
 def main():
-    ap = argparse.ArgumentParser(description="Export OT interlinear JSON (normalize strongs; OT bias).")
+    ap = argparse.ArgumentParser(description="Export interlinear JSON per verse (normalize strongs; OT bias).")
     ap.add_argument("--books", nargs="*", default=[], help="Optional: restrict to these book_code(s).")
+    ap.add_argument("--testament", choices=("ot", "nt", "all"), default="ot", help="Which verses to export (default ot).")
+    ap.add_argument("--out", default=OUT, help=f"Output root; files go under ot/ and nt/ (default {OUT}).")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Books exported in parallel.")
+    ap.add_argument("--pretty", action="store_true", help="Indent JSON (larger files).")
     ap.add_argument("--write-db", action="store_true", help="Write resolved lemma/translit/gloss back to SQLite.")
+    ap.add_argument("--record", help="Append wall time and output size as a JSON line to this file.")
     args = ap.parse_args()
 
-    strongs = load_strongs_map(STRONGS_CSV)
-
-    conn = sqlite3.connect(DB); conn.row_factory = sqlite3.Row
-    cur = conn.cursor()
+    parts = ("ot", "nt") if args.testament == "all" else (args.testament,)
+    conn = sqlite3.connect(DB)
+    present = [r[0] for r in conn.execute("SELECT DISTINCT book_code FROM tokens")]
+    wanted = {b.upper() for b in args.books}
+    books = [b for b in present if (not wanted or b.upper() in wanted) and testament(b).lower() in parts]
+    # Biggest books first so the pool's tail is short.
+    sizes = dict(conn.execute("SELECT book_code, COUNT(*) FROM tokens GROUP BY book_code"))
+    books.sort(key=lambda b: (-sizes.get(b, 0), book_ordinal(b)))
+    conn.close()
 
-    # Get all books present (optionally restricted)
-    if args.books:
-        placeholders = ",".join("?"*len(args.books))
-        cur.execute(f"SELECT DISTINCT book_code FROM tokens WHERE UPPER(book_code) IN ({placeholders}) ORDER BY book_code",
-                    tuple(b.upper() for b in args.books))
-    else:
-        cur.execute("SELECT DISTINCT book_code FROM tokens ORDER BY book_code")
-    books = [row["book_code"] for row in cur.fetchall()]
+    t0 = time.perf_counter()
+    job = partial(export_book, out_base=args.out, db_path=DB, pretty=args.pretty,
+                  collect_updates=args.write_db)
+    results = []
+    with ProcessPoolExecutor(max_workers=max(1, args.workers), initializer=init_worker) as pool:
+        for i, st in enumerate(pool.map(job, books), 1):
+            results.append(st)
+            print(f"  … {i}/{len(books)} {st['book']}: {st['verses']:,} verses ({st['written']:,} written) "
+                  f"in {st['seconds']:.1f}s", end="\r", flush=True)
+    if results:
+        print()
 
-    total_verses = 0
-    total_tokens = 0
     updated_rows = 0
-
-    for book in books:
-        # enumerate verses
-        cur.execute("""SELECT chapter, verse FROM tokens WHERE book_code=? GROUP BY chapter, verse ORDER BY chapter, verse""", (book,))
-        refs = [(int(r["chapter"]), int(r["verse"])) for r in cur.fetchall()]
-
-        for ch, vs in refs:
-            rows = cur.execute("""
-                SELECT id, token_index, surface, lemma, translit, gloss, morph, strong
-                FROM tokens
-                WHERE book_code=? AND chapter=? AND verse=?
-                ORDER BY token_index
-            """, (book, ch, vs)).fetchall()
-
-            # Detect if this verse is OT: any token whose normalized candidates include an H#### key
-            is_ot = False
-            for r in rows:
-                for k in norm_strong_keys(r["strong"] or ""):
-                    if k.startswith("H"):
-                        is_ot = True
-                        break
-                if is_ot: break
-            if not is_ot:
-                continue  # skip NT-like verses
-
-            out_tokens = []
-            for r in rows:
-                pk      = r["id"]
-                surface = r["surface"] or ""
-                lemma   = r["lemma"] or ""
-                transl  = r["translit"] or ""
-                gloss   = r["gloss"] or ""
-                morph   = r["morph"] or ""
-                strong  = r["strong"] or ""
-                index   = int(r["token_index"])
-
-                resolved = {}
-                for k in norm_strong_keys(strong):
-                    hit = strongs.get(k)
-                    if hit:
-                        resolved = hit; break
-
-                r_lemma  = lemma  or resolved.get("lemma", "")
-                r_transl = transl or resolved.get("translit", "")
-                r_gloss  = gloss  or resolved.get("gloss", "")
-
-                if args.write_db and (r_lemma != lemma or r_transl != transl or r_gloss != gloss):
-                    cur.execute("UPDATE tokens SET lemma=?, translit=?, gloss=? WHERE id=?",
-                                (r_lemma, r_transl, r_gloss, pk))
-                    updated_rows += cur.rowcount
-
-                out_tokens.append({
-                    "surface": surface, "lemma": lemma, "translit": transl, "gloss": gloss,
-                    "morph": morph, "strong": strong, "index": index,
-                    "resolved_lemma": r_lemma, "resolved_translit": r_transl, "resolved_gloss": r_gloss,
-                    "translation": r_gloss
-                })
-                total_tokens += 1
-
-            export_verse(book, ch, vs, out_tokens, OUT)
-            total_verses += 1
-
     if args.write_db:
+        conn = sqlite3.connect(DB)
+        # As apply_lexicon_to_db.py: rewritten rows drop their materialized lex_version so
+        # materialize() below re-resolves them.
+        has_resolved = "lex_version" in {c[1] for c in conn.execute("PRAGMA table_info(tokens)")}
+        update_sql = "UPDATE tokens SET lemma=?, translit=?, gloss=?{} WHERE id=?".format(
+            ", lex_version=NULL" if has_resolved else "")
+        for st in results:
+            conn.executemany(update_sql, st["updates"])
+            updated_rows += len(st["updates"])
         conn.commit()
-    conn.close()
+        # Refresh what is derived from the rewritten books: resolved columns, search index,
+        # statistics and stored payloads.
+        changed = sorted((st["book"] for st in results if st["updates"]), key=book_ordinal)
+        if changed:
+            lex = Lexicon()
+            lex.load()
+            if has_resolved:
+                materialize(conn, lex)
+            sync_fts(conn, lex)
+            build_stats(conn, lex, changed)
+            if has_stored_payloads(conn):
+                stored = {r[0] for r in conn.execute("SELECT DISTINCT book_code FROM payloads")}
+                build_payloads(conn, lex, [b for b in changed if b in stored])
+        conn.close()
 
-    print(f"Exported {total_verses} OT verses, {total_tokens} tokens to {OUT}")
+    total = {k: sum(st[k] for st in results) for k in ("verses", "tokens", "written", "unchanged", "removed", "bytes")}
+    elapsed = time.perf_counter() - t0
+    label = "+".join(p.upper() for p in parts)
+    print(f"Exported {total['verses']} {label} verses, {total['tokens']} tokens to {args.out} "
+          f"({total['written']} written, {total['unchanged']} unchanged, {total['removed']} removed; "
+          f"{total['bytes'] / 1e6:.1f} MB) in {elapsed:.1f}s")
     if args.write_db:
         print(f"DB rows updated with resolved fields: {updated_rows}")
+    if args.record:
+        with open(args.record, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"at": datetime.now(timezone.utc).isoformat(timespec="seconds"), "testament": args.testament,
+                                "books": len(books), "seconds": round(elapsed, 2), "workers": args.workers,
+                                "pretty": args.pretty, **total}) + "\n")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
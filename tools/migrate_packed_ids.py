@@ -0,0 +1,148 @@
+# tools/migrate_packed_ids.py
+# Convert an existing database in place so tokens.id is the packed reference
+# books.pack_ref(book_code, chapter, verse, token_index) (see db.py). The table is rebuilt in
+# reference order, so verse/chapter/passage reads become one clustered id range scan
+# instead of an idx_ref probe plus a rowid lookup per token and a sort on token_index.
+#
+#   python tools/migrate_packed_ids.py [--db PATH] [--dedupe] [--vacuum]
+#
+# Duplicate (book_code, chapter, verse, token_index) positions cannot share a packed id;
+# --dedupe keeps the first-loaded row (lowest id) of each position and drops the rest.
+#
+# Extra columns (materialized resolved fields), indexes and triggers on tokens are kept;
+# token_strongs / token_morphs are re-pointed at the new ids. Everything runs in one
+# transaction, so an interrupted migration leaves the database as it was.
+
+import os, sys, time, sqlite3, argparse
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE)
+from books import BOOK_ORDER
+from compact import is_compact
+from db import PACKED_IDS_VERSION, has_packed_ids
+
+# Derived tables holding tokens.id; their packed `ref` column is exactly the new id.
+TOKEN_ID_TABLES = ("token_strongs", "token_morphs")
+
+PACKED_SQL = "((o.ordinal * 1000 + t.chapter) * 1000 + t.verse) * 1000 + t.token_index"
+
+# Keep the lowest id of each token position (--dedupe).
+DEDUPE_SQL = ("DELETE FROM tokens WHERE id NOT IN (SELECT MIN(id) FROM tokens "
+              "GROUP BY UPPER(book_code), chapter, verse, token_index)")
+
+def column_defs(conn: sqlite3.Connection) -> list:
+    defs = []
+    for _cid, name, typ, notnull, default, _pk in conn.execute("PRAGMA table_info(tokens)"):
+        if name == "id":
+            defs.append("id INTEGER PRIMARY KEY")
+            continue
+        d = f"{name} {typ}".strip()
+        if notnull:
+            d += " NOT NULL"
+        if default is not None:
+            d += f" DEFAULT {default}"
+        defs.append(d)
+    return defs
+
+def problems(conn: sqlite3.Connection) -> list:
+    """Rows that cannot be packed: unknown books, parts outside 0-999, duplicate positions."""
+    out = []
+    unknown = [r[0] for r in conn.execute(
+        "SELECT DISTINCT book_code FROM tokens WHERE UPPER(book_code) NOT IN (SELECT book_code FROM temp._ordinals)")]
+    if unknown:
+        out.append(f"unknown book codes: {', '.join(map(str, unknown))}")
+    n = conn.execute("""SELECT COUNT(*) FROM tokens WHERE chapter NOT BETWEEN 0 AND 999
+                        OR verse NOT BETWEEN 0 AND 999 OR token_index NOT BETWEEN 0 AND 999""").fetchone()[0]
+    if n:
+        out.append(f"{n:,} rows with chapter/verse/token_index outside 0-999")
+    dups = conn.execute("""SELECT book_code, chapter, verse, token_index FROM tokens
+                           GROUP BY UPPER(book_code), chapter, verse, token_index HAVING COUNT(*) > 1 LIMIT 5""").fetchall()
+    if dups:
+        out.append("duplicate token positions, e.g. " + "; ".join(f"{b} {c}:{v} #{i}" for b, c, v, i in dups)
+                   + f"\n    rerun with --dedupe, or remove them yourself: {DEDUPE_SQL};")
+    return out
+
+def chapter_plan(conn: sqlite3.Connection, packed: bool) -> str:
+    if packed:
+        sql = "SELECT * FROM tokens WHERE id BETWEEN 1001000000 AND 1001999999 ORDER BY id"
+    else:
+        sql = "SELECT * FROM tokens WHERE book_code='GEN' AND chapter=1 ORDER BY verse, token_index"
+    return " / ".join(r[-1] for r in conn.execute("EXPLAIN QUERY PLAN " + sql))
+
+def dedupe(conn: sqlite3.Connection) -> int:
+    """Drop all but the lowest-id row of each duplicate position (and their derived rows)."""
+    conn.execute(DEDUPE_SQL)
+    n = conn.execute("SELECT changes()").fetchone()[0]
+    if n:
+        for table in TOKEN_ID_TABLES:
+            if conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table,)).fetchone():
+                conn.execute(f"DELETE FROM {table} WHERE token_id NOT IN (SELECT id FROM tokens)")
+    return n
+
+def migrate(conn: sqlite3.Connection, dedupe_rows: bool = False) -> tuple:
+    """Returns (tokens migrated, duplicate rows dropped)."""
+    conn.execute("CREATE TEMP TABLE _ordinals(book_code TEXT PRIMARY KEY, ordinal INTEGER NOT NULL)")
+    conn.executemany("INSERT INTO temp._ordinals VALUES (?, ?)", BOOK_ORDER.items())
+
+    cols = [r[1] for r in conn.execute("PRAGMA table_info(tokens)") if r[1] != "id"]
+    extras = conn.execute("SELECT sql FROM sqlite_master WHERE tbl_name='tokens' "
+                          "AND type IN ('index', 'trigger') AND sql IS NOT NULL").fetchall()
+    conn.execute("BEGIN")
+    try:
+        dropped = dedupe(conn) if dedupe_rows else 0
+        bad = problems(conn)
+        if bad:
+            raise SystemExit("Cannot migrate:\n  " + "\n  ".join(bad))
+        conn.execute(f"CREATE TABLE tokens_packed ({', '.join(column_defs(conn))})")
+        conn.execute(f"""
+            INSERT INTO tokens_packed(id, {", ".join(cols)})
+            SELECT {PACKED_SQL}, {", ".join("t." + c for c in cols)}
+            FROM tokens t JOIN temp._ordinals o ON o.book_code = UPPER(t.book_code)
+            ORDER BY 1
+        """)
+        n = conn.execute("SELECT changes()").fetchone()[0]
+        conn.execute("DROP TABLE tokens")
+        conn.execute("ALTER TABLE tokens_packed RENAME TO tokens")
+        for (sql,) in extras:
+            conn.execute(sql)
+        for table in TOKEN_ID_TABLES:
+            if conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table,)).fetchone():
+                conn.execute(f"UPDATE {table} SET token_id = ref")
+        conn.execute(f"PRAGMA user_version={PACKED_IDS_VERSION}")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.execute("ANALYZE tokens")
+    conn.commit()
+    return n, dropped
+
+def main():
+    ap = argparse.ArgumentParser(description="Rebuild tokens with packed-reference ids (clustered by reference).")
+    ap.add_argument("--db", default=os.environ.get("INTERLINEAR_DB", os.path.join(BASE, "interlinear.sqlite3")))
+    ap.add_argument("--dedupe", action="store_true",
+                    help="Drop duplicate token positions, keeping the lowest id of each.")
+    ap.add_argument("--vacuum", action="store_true", help="VACUUM afterwards to reclaim the old table's pages.")
+    args = ap.parse_args()
+
+    conn = sqlite3.connect(args.db, isolation_level=None)
+    try:
+        if has_packed_ids(conn):
+            print(f"{args.db}: tokens already uses packed ids; nothing to do.")
+            return
+        if is_compact(conn):
+            raise SystemExit(f"{args.db} is dictionary-encoded; run `python compact.py --expand` first.")
+        print(f"before: {chapter_plan(conn, packed=False)}")
+        t0 = time.perf_counter()
+        n, dropped = migrate(conn, args.dedupe)
+        if args.dedupe:
+            print(f"dropped {dropped:,} duplicate rows")
+        print(f"migrated {n:,} tokens in {time.perf_counter() - t0:.1f}s")
+        print(f"after:  {chapter_plan(conn, packed=True)}")
+        if args.vacuum:
+            conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
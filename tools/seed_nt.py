@@ -1,4 +1,9 @@
-import os, csv, sqlite3, argparse
+import os, sys, csv, sqlite3, argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from books import pack_ref
+from db import create_tokens
+from indexes import build_all as build_indexes
 
 NT = {"MAT","MRK","LUK","JHN","ACT","ROM","1CO","2CO","GAL","EPH","PHP","COL",
       "1TH","2TH","1TI","2TI","TIT","PHM","HEB","JAS","1PE","2PE",
@@ -14,13 +19,7 @@ con = sqlite3.connect(DB)
 cur = con.cursor()
 
 # ensure schema
-cur.execute("""CREATE TABLE IF NOT EXISTS tokens(
-  id INTEGER PRIMARY KEY AUTOINCREMENT,
-  book_code TEXT, chapter INTEGER, verse INTEGER,
-  token_index INTEGER,
-  surface TEXT, lemma TEXT, translit TEXT, gloss TEXT,
-  morph TEXT, strong TEXT
-)""")
+create_tokens(con)  # tokens.id = books.pack_ref(...); see db.py
 cur.execute("CREATE INDEX IF NOT EXISTS idx_tokens_loc ON tokens(book_code,chapter,verse)")
 cur.execute("CREATE INDEX IF NOT EXISTS idx_tokens_strong ON tokens(strong)")
 
@@ -35,14 +34,13 @@ with open(args.csv, "r", encoding="utf-8-sig", newline="") as f:
         bc = (row.get("book_code") or row.get("book") or "").upper().strip()
         if bc not in NT:
             continue
+        ch, vs, idx = int(row.get("chapter") or 0), int(row.get("verse") or 0), int(row.get("token_index") or 0)
         cur.execute("""
-          INSERT INTO tokens(book_code,chapter,verse,token_index,surface,lemma,translit,gloss,morph,strong)
-          VALUES(?,?,?,?,?,?,?,?,?,?)
+          INSERT INTO tokens(id,book_code,chapter,verse,token_index,surface,lemma,translit,gloss,morph,strong)
+          VALUES(?,?,?,?,?,?,?,?,?,?,?)
         """, (
-          bc,
-          int(row.get("chapter") or 0),
-          int(row.get("verse") or 0),
-          int(row.get("token_index") or 0),
+          pack_ref(bc, ch, vs, idx),
+          bc, ch, vs, idx,
           row.get("surface",""),
           row.get("lemma",""),
           row.get("translit",""),
@@ -52,5 +50,7 @@ with open(args.csv, "r", encoding="utf-8-sig", newline="") as f:
         ))
         inserted += 1
 
-con.commit(); con.close()
+con.commit()
+build_indexes(con)
+con.close()
 print(f"Inserted {inserted} NT tokens into {DB}")
\ No newline at end of file
@@ -1,7 +1,11 @@
 # tools/seed_ot.py
-import os, csv, sqlite3, argparse
+import os, sys, csv, sqlite3, argparse
 
 BASE = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, BASE)
+from books import pack_ref
+from db import create_tokens
+from indexes import build_all as build_indexes
 DB   = os.environ.get("INTERLINEAR_DB", os.path.join(BASE, "interlinear.sqlite3"))
 
 ap = argparse.ArgumentParser()
@@ -11,14 +15,7 @@ args = ap.parse_args()
 con = sqlite3.connect(DB)
 cur = con.cursor()
 # ensure schema
-cur.execute("""
-CREATE TABLE IF NOT EXISTS tokens(
-  id INTEGER PRIMARY KEY AUTOINCREMENT,
-  book_code TEXT, chapter INTEGER, verse INTEGER,
-  token_index INTEGER,
-  surface TEXT, lemma TEXT, translit TEXT, gloss TEXT,
-  morph TEXT, strong TEXT
-)""")
+create_tokens(con)  # tokens.id = books.pack_ref(...); see db.py
 cur.execute("CREATE INDEX IF NOT EXISTS idx_tokens_loc ON tokens(book_code,chapter,verse)")
 cur.execute("CREATE INDEX IF NOT EXISTS idx_tokens_strong ON tokens(strong)")
 
@@ -27,14 +24,14 @@ count=0
 with open(args.csv, "r", encoding="utf-8-sig", newline="") as f:
   r=csv.DictReader(f)
   for row in r:
+    bc = (row.get("book_code") or row.get("book") or "").strip()
+    ch, vs, idx = int(row.get("chapter") or 0), int(row.get("verse") or 0), int(row.get("token_index") or 0)
     cur.execute("""
-      INSERT INTO tokens(book_code,chapter,verse,token_index,surface,lemma,translit,gloss,morph,strong)
-      VALUES(?,?,?,?,?,?,?,?,?,?)
+      INSERT INTO tokens(id,book_code,chapter,verse,token_index,surface,lemma,translit,gloss,morph,strong)
+      VALUES(?,?,?,?,?,?,?,?,?,?,?)
     """, (
-      (row.get("book_code") or row.get("book") or "").strip(),
-      int(row.get("chapter") or 0),
-      int(row.get("verse") or 0),
-      int(row.get("token_index") or 0),
+      pack_ref(bc, ch, vs, idx),
+      bc, ch, vs, idx,
       row.get("surface",""),
       row.get("lemma",""),
       row.get("translit",""),
@@ -44,5 +41,7 @@ with open(args.csv, "r", encoding="utf-8-sig", newline="") as f:
     ))
     count+=1
 
-con.commit(); con.close()
+con.commit()
+build_indexes(con)
+con.close()
 print(f"Inserted {count} OT tokens into {DB}")